@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from type_inference import ColumnType, convert_column
+
+BABYFEED_COLUMNS = ["Child", "Log Type", "Breast Used", "Start Date", "End Date", "Duration(mins)", "Amount(ml)",
+                    "Milk Type", "Nappy", "Title", "Notes", "Weight(kg)", "Length(cm)"]
+DATE_FORMAT = "%d/%m/%Y %H:%M"
+SENTINELS = ["(null)", "null"]
+CATEGORY_COLUMNS = ["Child", "Log Type", "Breast Used", "Milk Type", "Nappy"]
+KEY_COLUMNS = ["Child", "Log Type", "Start Date"]
+READ_DTYPES = {col: str for col in BABYFEED_COLUMNS}
+READ_DTYPES.update({"Duration(mins)": np.float64, "Weight(kg)": np.float64, "Length(cm)": np.float64})
+
+
+def is_babyfeed_export(header):
+    # `header` is the CSV's first line
+    return [col.strip() for col in header.split(",")] == BABYFEED_COLUMNS
+
+
+def _parse_times(series):
+    # The export's day-first timestamps aren't zero-padded ("3/8/2024 9:05"), so
+    # they're parsed with Arrow's strptime in one pass; sentinels and bad values become NaT
+    parsed = pc.strptime(pa.array(series, type=pa.string()), format=DATE_FORMAT, unit="s", error_is_null=True)
+    return pd.Series(parsed.to_numpy(zero_copy_only=False).astype("datetime64[us]"), index=series.index, name=series.name)
+
+
+def read_export(source):
+    # One babyfeedtimer CSV as typed columns, events in start-time order. Fixed
+    # formats are applied directly; nothing is inferred.
+    raw = pd.read_csv(source, dtype=READ_DTYPES, na_values=SENTINELS)
+    events = pd.DataFrame({
+        col: raw[col].astype("category") for col in CATEGORY_COLUMNS
+    })
+    for col in ("Start Date", "End Date"):
+        events[col] = _parse_times(raw[col])
+    # Fractional minutes are kept, and a missing duration stays missing rather than 0
+    events["Duration(mins)"] = raw["Duration(mins)"].astype(np.float32)
+    events["Amount(ml)"] = convert_column(raw["Amount(ml)"], ColumnType("Numeric", unit="ml"), "Numeric").astype(np.float32)
+    for col in ("Title", "Notes"):
+        events[col] = raw[col]
+    for col in ("Weight(kg)", "Length(cm)"):
+        # The app writes 0 when nothing was measured
+        events[col] = raw[col].where(raw[col] > 0).astype(np.float32)
+    events = events[BABYFEED_COLUMNS]
+    return events.sort_values("Start Date", kind="stable", ignore_index=True)
+
+
+def event_keys(events):
+    # One 64-bit hash per (Child, Log Type, Start Date); categoricals hash by value,
+    # so keys agree across exports with different category sets
+    return pd.util.hash_pandas_object(events[KEY_COLUMNS], index=False).to_numpy()
+
+
+def summarize(events, freq):
+    # Per (child, period) totals. Every column is a sum, so summaries of disjoint
+    # event sets add up to the summary of their union.
+    log_type = events["Log Type"]
+    is_bottle = (log_type == "Bottle").to_numpy()
+    is_breast = (log_type == "Breast").to_numpy()
+    is_sleep = (log_type == "Sleep").to_numpy()
+    is_nappy = (log_type == "Nappy").to_numpy()
+    amount = events["Amount(ml)"].fillna(0).to_numpy(dtype=np.float64)
+    # Untimed events add nothing to the minute totals
+    duration = events["Duration(mins)"].fillna(0).to_numpy(dtype=np.float64)
+    nappy = events["Nappy"]
+    metrics = pd.DataFrame({
+        "Child": events["Child"],
+        "period": events["Start Date"].dt.floor(freq),
+        "feeds": (is_bottle | is_breast).astype(np.int32),
+        "feed_ml": np.where(is_bottle, amount, 0.0),
+        "breast_mins": np.where(is_breast, duration, 0.0),
+        "expressed_ml": np.where((log_type == "Expressed").to_numpy(), amount, 0.0),
+        "sleeps": is_sleep.astype(np.int32),
+        "sleep_mins": np.where(is_sleep, duration, 0.0),
+        "nappies": is_nappy.astype(np.int32),
+        "wet_nappies": (is_nappy & nappy.isin(["Wet", "Wet&Dirty"]).to_numpy()).astype(np.int32),
+        "dirty_nappies": (is_nappy & nappy.isin(["Dirty", "Wet&Dirty"]).to_numpy()).astype(np.int32),
+    })
+    return metrics.groupby(["Child", "period"], observed=True, sort=True).sum()
+
+
+def _merge_summaries(old, new):
+    if old is None or old.empty:
+        return new
+    return pd.concat([old, new]).groupby(level=[0, 1], observed=True, sort=True).sum()
+
+
+class BabyfeedStore:
+    # Typed events of one or more exports, sorted by start time, with daily and
+    # hourly summaries. Newer exports are appended: only events whose
+    # (Child, Log Type, Start Date) is new are added, and only they are summarized.
+
+    def __init__(self, events=None):
+        self.events = None
+        self.daily = None
+        self.hourly = None
+        self._keys = np.empty(0, dtype=np.uint64)
+        if events is not None:
+            self.append(events)
+
+    @classmethod
+    def from_csv(cls, source):
+        return cls(read_export(source))
+
+    @classmethod
+    def load(cls, path):
+        return cls(pd.read_parquet(path))
+
+    def save(self, path):
+        self.events.to_parquet(path, index=False)
+
+    def append(self, events):
+        # Returns the number of events that were new
+        keys = event_keys(events)
+        # The last occurrence of a key within the batch wins, as in a newer export
+        _, last = np.unique(keys[::-1], return_index=True)
+        keep = np.zeros(len(keys), dtype=bool)
+        keep[len(keys) - 1 - last] = True
+        keep &= ~np.isin(keys, self._keys, assume_unique=False)
+        fresh = events[keep]
+        if fresh.empty:
+            return 0
+
+        self._keys = np.sort(np.concatenate([self._keys, keys[keep]]))
+        if self.events is None or self.events.empty:
+            merged = fresh.sort_values("Start Date", kind="stable", ignore_index=True)
+        else:
+            merged = pd.concat([self.events, fresh], ignore_index=True)
+            if fresh["Start Date"].min() < self.events["Start Date"].max():
+                # Only back-filled events need a re-sort; the usual newer export just extends the end
+                merged = merged.sort_values("Start Date", kind="stable", ignore_index=True)
+        for col in CATEGORY_COLUMNS:
+            if not isinstance(merged[col].dtype, pd.CategoricalDtype):
+                merged[col] = merged[col].astype("category")
+        self.events = merged
+        self.daily = _merge_summaries(self.daily, summarize(fresh, "D"))
+        self.hourly = _merge_summaries(self.hourly, summarize(fresh, "h"))
+        return len(fresh)
+
+    def append_csv(self, source):
+        return self.append(read_export(source))
+
+    def between(self, start, end):
+        # Events with start <= Start Date < end, by binary search on the sorted times
+        times = self.events["Start Date"].to_numpy()
+        lo, hi = np.searchsorted(times, [np.datetime64(start), np.datetime64(end)])
+        return self.events.iloc[lo:hi]
@@ -0,0 +1,148 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+MOMENT_BUDGET_BYTES = 64 * 1024 * 1024
+CHUNK_ROWS = 65536
+SCALE_SAMPLE_ROWS = 10000
+
+
+def numeric_columns(frame):
+    return frame.select_dtypes(include='number').columns.tolist()
+
+
+def standardization(frame, columns):
+    # Per-column shift and scale applied before the float32 products, so sums of
+    # squares stay well inside float32 precision. Correlation ignores both, so
+    # estimates from a strided sample of rows are enough.
+    sample = frame[columns].iloc[::max(1, len(frame) // SCALE_SAMPLE_ROWS)]
+    sample = sample.to_numpy(dtype=np.float64, na_value=np.nan)
+    with warnings.catch_warnings():
+        # All-missing columns
+        warnings.simplefilter('ignore', RuntimeWarning)
+        center = np.nanmean(sample, axis=0)
+        scale = np.nanstd(sample, axis=0)
+    center = np.where(np.isfinite(center), center, 0.0)
+    scale = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+    return center, scale
+
+
+def _moments(x):
+    # Pairwise-complete sufficient statistics of one float32 block, stacked as
+    # [count, sum, sum of squares, cross products]; entry [k, i, j] only counts
+    # rows where both column i and column j are present. Only the columns with
+    # missing values need the count/sum products; the rest are column totals.
+    p = x.shape[1]
+    valid = ~np.isnan(x)
+    missing = np.flatnonzero(~valid.all(axis=0))
+    filled = np.where(valid, x, np.float32(0)) if len(missing) else x
+    squares = np.square(filled)
+    count = np.full((p, p), float(len(x)))
+    total = np.repeat(filled.sum(axis=0, dtype=np.float64)[:, None], p, axis=1)
+    square_total = np.repeat(squares.sum(axis=0, dtype=np.float64)[:, None], p, axis=1)
+    if len(missing):
+        present = valid[:, missing].astype(np.float32)
+        count[:, missing] = valid.astype(np.float32).T @ present
+        count[missing, :] = count[:, missing].T
+        total[:, missing] = filled.T @ present
+        square_total[:, missing] = squares.T @ present
+    return np.stack([count, total, square_total, filled.T @ filled])
+
+
+def _blocks(frame, columns, rows, center, scale):
+    # Standardized float32 blocks of the given rows, CHUNK_ROWS at a time
+    values = frame[columns]
+    for start in range(0, len(rows), CHUNK_ROWS):
+        block = values.iloc[rows[start:start + CHUNK_ROWS]].to_numpy(dtype=np.float64, na_value=np.nan)
+        yield start, ((block - center) / scale).astype(np.float32)
+
+
+def row_moments(frame, columns, rows, center, scale):
+    # Moments of the given row positions
+    total = np.zeros((4, len(columns), len(columns)))
+    for _, block in _blocks(frame, columns, rows, center, scale):
+        total += _moments(block)
+    return total
+
+
+def correlation(moments):
+    # Same pairwise-complete Pearson correlation as DataFrame.corr()
+    count, total, squares, products = moments
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = products - total * total.T / count
+        var = squares - total * total / count
+        corr = cov / np.sqrt(var * var.T)
+    corr = np.clip(corr, -1.0, 1.0)
+    diagonal = np.diag_indices_from(corr)
+    corr[diagonal] = np.where(np.isnan(corr[diagonal]), np.nan, 1.0)
+    return corr
+
+
+class MomentIndex:
+    # Prefix sums of the numeric columns' moments over buckets of one date column,
+    # in date order. Buckets are calendar days, merged into runs of days when the
+    # column count would make per-day matrices exceed the memory budget. A date
+    # range is whole buckets from the prefix sums plus the rows of at most two
+    # partial buckets at its ends.
+
+    def __init__(self, frame, index, columns, budget_bytes=MOMENT_BUDGET_BYTES):
+        self.frame = frame
+        self.columns = columns
+        self.order = index.order
+        self.center, self.scale = standardization(frame, columns)
+        n = len(self.order)
+        days = index.values.astype('datetime64[D]')
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]]) if n else np.zeros(1, dtype=np.int64)
+        max_buckets = max(1, budget_bytes // (4 * 8 * max(1, len(columns)) ** 2) - 1)
+        if len(starts) > max_buckets:
+            # Runs of days with roughly equal row counts keep the partial ends cheap
+            targets = np.arange(max_buckets) * n // max_buckets
+            starts = np.unique(starts[np.minimum(np.searchsorted(starts, targets), len(starts) - 1)])
+        self.edges = edges = np.r_[starts, n]
+        # Row b + 1 collects bucket b, then becomes the prefix sum in place
+        cumulative = np.zeros((len(edges), 4, len(columns), len(columns)))
+        for offset, block in _blocks(frame, columns, self.order, self.center, self.scale):
+            stop = offset + len(block)
+            bounds = np.r_[offset, edges[(edges > offset) & (edges < stop)], stop] - offset
+            bucket = np.searchsorted(edges, offset, side='right')
+            for k in range(len(bounds) - 1):
+                cumulative[bucket + k] += _moments(block[bounds[k]:bounds[k + 1]])
+        np.cumsum(cumulative, axis=0, out=cumulative)
+        self.cumulative = cumulative
+
+    @property
+    def nbytes(self):
+        return self.cumulative.nbytes
+
+    def _rows(self, start, stop):
+        return row_moments(self.frame, self.columns, self.order[start:stop], self.center, self.scale)
+
+    def moments(self, start, stop):
+        # Moments of the rows at sorted positions [start, stop)
+        first = np.searchsorted(self.edges, start, side='left')
+        last = np.searchsorted(self.edges, stop, side='right') - 1
+        if first >= last:
+            return self._rows(start, stop)
+        total = self.cumulative[last] - self.cumulative[first]
+        if start < self.edges[first]:
+            total = total + self._rows(start, self.edges[first])
+        if self.edges[last] < stop:
+            total = total + self._rows(self.edges[last], stop)
+        return total
+
+
+def correlation_frame(engine, date_filter=None, row_filter=None):
+    # Correlation of the numeric columns over the filtered rows. A date slicer range
+    # alone is answered from the date column's moment index, so moving the slicer
+    # only reads the rows at its ends.
+    columns = numeric_columns(engine.frame)
+    if date_filter is not None and row_filter is None:
+        column, _, (start, end) = date_filter
+        index = engine.moment_index(column)
+        moments = index.moments(*engine.date_positions(column, start, end))
+    else:
+        mask = engine.combined_mask(date_filter, row_filter)
+        rows = np.arange(len(engine.frame)) if mask is None else np.flatnonzero(mask)
+        moments = row_moments(engine.frame, columns, rows, *standardization(engine.frame, columns))
+    return pd.DataFrame(correlation(moments), index=columns, columns=columns)
@@ -0,0 +1,269 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from correlation import MomentIndex, numeric_columns
+from ingest_cache import frame_bytes
+from word_index import TokenIndex
+
+FILTER_OPS = ("equals", "greater than", "less than", "contains")
+
+
+class _SortedIndex:
+    # Row order of a numeric/date column with missing values dropped, so ranges
+    # are two searchsorted calls instead of a full-column comparison
+    __slots__ = ('order', 'values')
+
+    def __init__(self, values):
+        order = np.argsort(values, kind='stable')
+        valid = ~np.isnat(values) if values.dtype.kind == 'M' else ~np.isnan(values)
+        # NaN/NaT sort last, so the valid rows are a prefix of the order
+        self.order = order[:int(valid.sum())]
+        self.values = values[self.order]
+
+    @property
+    def nbytes(self):
+        return self.order.nbytes + self.values.nbytes
+
+    def rows(self, low=None, high=None, low_side='left', high_side='left'):
+        start = 0 if low is None else np.searchsorted(self.values, low, side=low_side)
+        stop = len(self.values) if high is None else np.searchsorted(self.values, high, side=high_side)
+        return self.order[start:stop]
+
+
+class _TextIndex:
+    # Each row's code into the column's distinct values, with those values kept as
+    # text and lowercased text, so text filters only ever look at the distinct values
+    __slots__ = ('codes', 'text', 'lower', 'missing')
+
+    def __init__(self, series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            uniques = pd.Series(series.cat.categories)
+            if (codes < 0).any():
+                codes = np.where(codes < 0, len(uniques), codes)
+                uniques = pd.concat([uniques.astype(object), pd.Series([np.nan], dtype=object)], ignore_index=True)
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=False)
+            uniques = pd.Series(uniques)
+        self.codes = codes
+        self.missing = uniques.isna().to_numpy()
+        # Same spelling as series.astype(str), which the filters used to run on
+        self.text = uniques.astype(str)
+        self.lower = self.text.str.lower()
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + frame_bytes(self.text.to_frame()) + frame_bytes(self.lower.to_frame())
+
+    def rows_where(self, hits):
+        return hits[self.codes]
+
+
+def _column_values(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if getattr(series.dt, 'tz', None) is not None:
+            # Wall-clock time, which is what .dt.date and the date picker show
+            series = series.dt.tz_localize(None)
+        return series.to_numpy(dtype='datetime64[ns]')
+    if pd.api.types.is_bool_dtype(series):
+        return None
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return None
+
+
+def _coerce(value, values):
+    # Filter values arrive as text; compare them as the column's own type
+    try:
+        if values.dtype.kind == 'M':
+            return np.datetime64(pd.Timestamp(value).tz_localize(None), 'ns')
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class FilterEngine:
+    # Indexes one typed frame and answers filters with cached boolean masks over
+    # its rows. Identical filters from different visualizations and reruns share
+    # one mask; indexes are built per column on first use.
+
+    def __init__(self, df, max_masks=64):
+        self.frame = df
+        self.frame_bytes = frame_bytes(df)
+        self.max_masks = max_masks
+        self.hits = 0
+        self.misses = 0
+        self._sorted = {}
+        self._text = {}
+        self._tokens = {}
+        self._moments = {}
+        self._orders = {}
+        self._masks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _index(self, store, column, build):
+        with self._lock:
+            if column in store:
+                return store[column]
+        # Built outside the lock since builds can need other indexes; a concurrent
+        # duplicate build is identical and simply discarded
+        index = build()
+        with self._lock:
+            return store.setdefault(column, index)
+
+    def sorted_index(self, column):
+        def build():
+            values = _column_values(self.frame[column])
+            return None if values is None else _SortedIndex(values)
+        return self._index(self._sorted, column, build)
+
+    def text_index(self, column):
+        return self._index(self._text, column, lambda: _TextIndex(self.frame[column]))
+
+    def token_index(self, column):
+        # Word counts per row for word clouds, built once per column
+        return self._index(self._tokens, column, lambda: TokenIndex(self.frame[column]))
+
+    def moment_index(self, column):
+        # Per-day moments of every numeric column for correlations under the date slicer
+        return self._index(self._moments, column,
+                           lambda: MomentIndex(self.frame, self.sorted_index(column), numeric_columns(self.frame)))
+
+    def sorted_rows(self, column, descending=False):
+        # Every row position ordered by the column, missing values last either way
+        def build():
+            index = self.sorted_index(column)
+            if index is not None:
+                valid = index.order[::-1] if descending else index.order
+                missing = np.setdiff1d(np.arange(len(self.frame)), index.order, assume_unique=True)
+                return np.concatenate([valid, missing])
+            text = self.text_index(column)
+            ranks = np.empty(len(text.text), dtype=np.int64)
+            ranks[np.argsort(text.text.fillna('').to_numpy(), kind='stable')] = np.arange(len(text.text))
+            if descending:
+                ranks = len(ranks) - 1 - ranks
+            ranks[text.missing] = len(ranks)
+            return np.argsort(ranks[text.codes], kind='stable')
+        return self._index(self._orders, (column, descending), build)
+
+    def date_bounds(self, column):
+        index = self.sorted_index(column)
+        if index is None or not len(index.values):
+            return None
+        return pd.Timestamp(index.values[0]), pd.Timestamp(index.values[-1])
+
+    def date_positions(self, column, start, end):
+        # Positions in the column's sorted index of the inclusive calendar-date range
+        index = self.sorted_index(column)
+        low = np.datetime64(pd.Timestamp(start), 'ns')
+        high = np.datetime64(pd.Timestamp(end) + pd.Timedelta(days=1), 'ns')
+        return tuple(int(pos) for pos in np.searchsorted(index.values, [low, high]))
+
+    def _from_rows(self, rows):
+        mask = np.zeros(len(self.frame), dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def _build_mask(self, column, op, value):
+        if op == "between":
+            # Inclusive calendar-date range on a date column
+            start, stop = self.date_positions(column, *value)
+            return self._from_rows(self.sorted_index(column).order[start:stop])
+
+        if op == "contains":
+            text = self.text_index(column)
+            hits = text.lower.str.contains(value, case=False).to_numpy(dtype=bool)
+            return text.rows_where(hits)
+
+        index = self.sorted_index(column)
+        if index is not None:
+            target = _coerce(value, index.values)
+            if target is None:
+                return np.zeros(len(self.frame), dtype=bool)
+            if op == "equals":
+                return self._from_rows(index.rows(target, target, 'left', 'right'))
+            if op == "greater than":
+                return self._from_rows(index.rows(low=target, low_side='right'))
+            if op == "less than":
+                return self._from_rows(index.rows(high=target))
+
+        text = self.text_index(column)
+        if op == "equals":
+            hits = (text.text == value).to_numpy()
+        elif op == "greater than":
+            hits = (text.text > value).to_numpy() & ~text.missing
+        elif op == "less than":
+            hits = (text.text < value).to_numpy() & ~text.missing
+        else:
+            raise ValueError(f"Unknown filter '{op}'")
+        return text.rows_where(hits)
+
+    def mask(self, column, op, value):
+        key = (column, op, value)
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                self.hits += 1
+                return mask
+            self.misses += 1
+
+        mask = self._build_mask(column, op, value)
+        # Shared between callers, so nobody may edit it in place
+        mask.flags.writeable = False
+        with self._lock:
+            self._masks[key] = mask
+            while len(self._masks) > self.max_masks:
+                self._masks.popitem(last=False)
+        return mask
+
+    def combined_mask(self, *filters):
+        # Mask of the rows passing every (column, op, value) filter, or None for all
+        # rows; None entries are skipped
+        combined = None
+        for spec in filters:
+            if spec is None:
+                continue
+            mask = self.mask(*spec)
+            combined = mask if combined is None else combined & mask
+        return combined
+
+    def select(self, *filters):
+        combined = self.combined_mask(*filters)
+        if combined is None:
+            return self.frame
+        return self.frame[combined]
+
+    @property
+    def nbytes(self):
+        # The typed frame plus every index and mask built so far
+        with self._lock:
+            indexes = [*self._sorted.values(), *self._text.values(), *self._tokens.values(),
+                       *self._moments.values(), *self._orders.values(), *self._masks.values()]
+        return self.frame_bytes + sum(index.nbytes for index in indexes if index is not None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "masks": len(self._masks),
+            "indexed_columns": len(self._sorted) + len(self._text) + len(self._tokens) + len(self._moments),
+            "nbytes": self.nbytes,
+        }
+
+
+class FilterEngineCache:
+    # One engine per typed frame, so the indexes and masks outlive the rerun that
+    # built them. Engines are held in the IngestCache: the typed frame and
+    # everything indexed on it count against the uploads' memory budget.
+
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, key, build_frame):
+        return self.store.hold(("engine", key), lambda: FilterEngine(build_frame()))
@@ -0,0 +1,138 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+
+DEFAULT_BUDGET_BYTES = 1 << 30
+HOT_ENTRIES = 2  # the current upload's frame and the one before it
+
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _pack(df):
+    # Arrow keeps a spilled frame compact and columnar; frames Arrow can't type
+    # (e.g. Excel columns mixing numbers and text) stay as pandas instead.
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        return table, table.nbytes
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return df, frame_bytes(df)
+
+
+class IngestCache:
+    # Parsed uploads keyed by content hash, and whatever else is held for them
+    # (the filter engines of their typed frames), under one LRU memory budget. The
+    # most recently used frames stay as pandas, so a rerun gets them back without
+    # a copy; older ones are spilled to Arrow and turned back into pandas when used.
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES, hot_entries=HOT_ENTRIES):
+        self.budget_bytes = budget_bytes
+        self.hot_entries = hot_entries
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> [frame, Arrow table or held object; its size; whether it was spilled]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self):
+        # Never the most recent entry, which the caller is about to use
+        while self.used_bytes > self.budget_bytes and len(self._entries) > 1:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self.used_bytes -= evicted
+
+    def _resize(self, entry, value, size):
+        self.used_bytes += size - entry[1]
+        entry[0], entry[1] = value, size
+
+    def _to_spill(self):
+        # Frames past the hot_entries most recent ones that are still pandas
+        frames = [(key, entry) for key, entry in self._entries.items() if isinstance(entry[0], pd.DataFrame)]
+        return [(key, entry[0]) for key, entry in frames[:-self.hot_entries or None] if not entry[2]]
+
+    def _spill(self, frames):
+        for key, df in frames:
+            packed, size = _pack(df)
+            with self._lock:
+                entry = self._entries.get(key)
+                # Skip entries evicted or used again in the meantime
+                if entry is not None and entry[0] is df:
+                    self._resize(entry, packed, size)
+                    entry[2] = True
+
+    def _get_or_build(self, key, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry[0]
+                if isinstance(value, pd.DataFrame):
+                    # Copy-on-write (always on from pandas 3, which requirements.txt pins):
+                    # callers' edits never reach the cached frame
+                    return value.copy(deep=False)
+            else:
+                self.misses += 1
+
+        df = build() if entry is None else value.to_pandas()
+        size = frame_bytes(df)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._resize(entry, df, size)
+                entry[2] = False
+                self._entries.move_to_end(key)
+            elif size <= self.budget_bytes:
+                self._entries[key] = [df, size, False]
+                self.used_bytes += size
+            self._evict()
+            spill = self._to_spill()
+        self._spill(spill)
+        return df.copy(deep=False)
+
+    def read(self, file_hash, parse):
+        return self._get_or_build(("raw", file_hash), parse)
+
+    def hold(self, key, build):
+        # Any object with an nbytes property, kept as is and never spilled. Its size
+        # is re-read on every hit, since an engine grows as its indexes are built.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._resize(entry, entry[0], entry[0].nbytes)
+                self._evict()
+                return entry[0]
+            self.misses += 1
+
+        value = build()
+        with self._lock:
+            entry = self._entries.setdefault(key, [value, value.nbytes, True])
+            if entry[0] is value:
+                self.used_bytes += entry[1]
+            self._entries.move_to_end(key)
+            self._evict()
+            spill = self._to_spill()
+        self._spill(spill)
+        return entry[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "spilled_entries": sum(isinstance(entry[0], pa.Table) for entry in self._entries.values()),
+            "used_bytes": self.used_bytes,
+            "budget_bytes": self.budget_bytes,
+        }
@@ -0,0 +1,227 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+POINT_BUDGET = 5000
+DENSITY_BINS = 150
+HISTOGRAM_BINS = 100
+
+
+def _as_float(values):
+    # Datetimes are reduced on their int64 nanoseconds, missing values become NaN
+    if isinstance(values, (pd.Series, pd.Index)):
+        if values.dtype.kind == 'M':
+            values = values.to_numpy(dtype='datetime64[ns]')
+        else:
+            values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        values = values.astype('datetime64[ns]')
+        return np.where(np.isnat(values), np.nan, values.astype(np.int64).astype(np.float64))
+    return values.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: keeps the first and last points and, from each
+    # bucket in between, the point forming the largest triangle with the previous
+    # pick and the next bucket's average. x must be sorted.
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x, y = _as_float(x), _as_float(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # The last bucket looks ahead to the final point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - next_x[b]) * (by - y[a]) - (x[a] - bx) * (next_y[b] - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[b + 1] = a
+    return picked
+
+
+def minmax_indices(y, n_out):
+    # The minimum and maximum of each of n_out / 2 equal-count buckets, in x order;
+    # cheaper than LTTB and never hides a spike
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    y = _as_float(y)
+    starts = np.linspace(0, n, n_out // 2, endpoint=False).astype(np.int64)
+    sizes = np.diff(np.append(starts, n))
+    bucket = np.repeat(np.arange(len(starts)), sizes)
+    picks = []
+    for extreme in (np.minimum, np.maximum):
+        hits = np.flatnonzero(y == np.repeat(extreme.reduceat(y, starts), sizes))
+        # First hit per bucket
+        _, first = np.unique(bucket[hits], return_index=True)
+        picks.append(hits[first])
+    return np.unique(np.concatenate(picks))
+
+
+DOWNSAMPLE_METHODS = {"lttb": lttb_indices, "minmax": lambda x, y, n_out: minmax_indices(y, n_out)}
+
+
+def downsample_series(x, y, budget=POINT_BUDGET, method="lttb"):
+    # Drops missing points, sorts by x and keeps at most `budget` of them
+    frame = pd.DataFrame({'x': x, 'y': y}).dropna().sort_values('x', kind='stable')
+    keep = DOWNSAMPLE_METHODS[method](frame['x'].to_numpy(), frame['y'].to_numpy(), budget)
+    return frame.iloc[keep]
+
+
+def histogram_counts(values, bins=HISTOGRAM_BINS):
+    values = pd.Series(values).dropna()
+    if pd.api.types.is_datetime64_any_dtype(values):
+        counts, edges = np.histogram(_as_float(values), bins=bins)
+        return counts, pd.to_datetime(edges.astype(np.int64))
+    return np.histogram(_as_float(values), bins=bins)
+
+
+def box_stats(values, max_outliers=POINT_BUDGET):
+    # Tukey box: quartiles, whiskers at the furthest points within 1.5 IQR, and the
+    # points beyond them (thinned evenly, extremes kept, when there are too many)
+    values = np.sort(_as_float(pd.Series(values).dropna()))
+    if not len(values):
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    outliers = values[(values < inside[0]) | (values > inside[-1])]
+    if len(outliers) > max_outliers:
+        outliers = outliers[np.linspace(0, len(outliers) - 1, max_outliers).astype(int)]
+    return {
+        'q1': q1, 'median': median, 'q3': q3,
+        'lowerfence': inside[0], 'upperfence': inside[-1],
+        'outliers': outliers, 'count': len(values),
+    }
+
+
+def _bin_codes(values, bins):
+    # Equal-width bin of every value, computed directly rather than searched for
+    low, high = values.min(), values.max()
+    edges = np.linspace(low, high, bins + 1) if high > low else np.linspace(low - 0.5, high + 0.5, bins + 1)
+    codes = ((values - edges[0]) * (bins / (edges[-1] - edges[0]))).astype(np.int64)
+    return np.minimum(codes, bins - 1), edges
+
+
+def density_grid(x, y, bins=DENSITY_BINS):
+    x, y = _as_float(x), _as_float(y)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    if not keep.any():
+        return np.zeros((bins, bins)), np.arange(bins + 1.0), np.arange(bins + 1.0)
+    x_codes, x_edges = _bin_codes(x[keep], bins)
+    y_codes, y_edges = _bin_codes(y[keep], bins)
+    counts = np.bincount(x_codes * bins + y_codes, minlength=bins * bins).reshape(bins, bins)
+    return counts, x_edges, y_edges
+
+
+def _density_trace(counts, x_edges, y_edges, showscale=True):
+    # Empty cells stay transparent instead of drawing the lowest colour
+    z = np.where(counts.T > 0, counts.T, np.nan)
+    return go.Heatmap(x=(x_edges[:-1] + x_edges[1:]) / 2, y=(y_edges[:-1] + y_edges[1:]) / 2, z=z,
+                      colorscale='Viridis', showscale=showscale, colorbar={'title': 'rows'},
+                      hovertemplate='x=%{x}<br>y=%{y}<br>rows=%{z}<extra></extra>')
+
+
+def _reduced_title(how, total, shown=None):
+    if shown is None:
+        return f"{how} of {total:,} rows"
+    return f"{how}: {shown:,} of {total:,} rows"
+
+
+def binned_histogram(series, color, bins=HISTOGRAM_BINS):
+    counts, edges = histogram_counts(series, bins)
+    centers = edges[:-1] + (edges[1:] - edges[:-1]) / 2
+    # Plotly measures bar widths on date axes in milliseconds
+    widths = np.diff(_as_float(edges)) / (1e6 if edges.dtype.kind == 'M' else 1)
+    fig = go.Figure(go.Bar(x=centers, y=counts, width=widths, marker_color=color, name=series.name))
+    fig.update_layout(xaxis_title=series.name, yaxis_title='count', bargap=0,
+                      title=_reduced_title(f"{bins} precomputed bins", len(series)))
+    return fig
+
+
+def summarized_box(df, y_col, x_col=None, budget=POINT_BUDGET):
+    groups = [(None, df[y_col])] if x_col is None else list(df.groupby(x_col, observed=True, sort=True)[y_col])
+    per_group = max(1, budget // max(1, len(groups)))
+    fig = go.Figure()
+    for name, values in groups:
+        stats = box_stats(values, per_group)
+        if stats is None:
+            continue
+        label = [str(name)] if x_col is not None else [y_col]
+        fig.add_trace(go.Box(x=label, q1=[stats['q1']], median=[stats['median']], q3=[stats['q3']],
+                             lowerfence=[stats['lowerfence']], upperfence=[stats['upperfence']],
+                             name=label[0], marker_color='#636efa', showlegend=False))
+        if len(stats['outliers']):
+            fig.add_trace(go.Scatter(x=label * len(stats['outliers']), y=stats['outliers'], mode='markers',
+                                     marker={'color': '#636efa', 'size': 4}, showlegend=False, name=label[0]))
+    fig.update_layout(xaxis_title=x_col, yaxis_title=y_col,
+                      title=_reduced_title("Quartiles and outliers", len(df)))
+    return fig
+
+
+def downsampled_line(df, x_col, y_col, budget=POINT_BUDGET, method="lttb"):
+    points = downsample_series(df[x_col], df[y_col], budget, method)
+    fig = px.line(points, x='x', y='y', labels={'x': x_col, 'y': y_col})
+    fig.update_layout(title=_reduced_title(f"{method.upper()} downsampled", len(df), len(points)))
+    return fig
+
+
+def density_scatter(df, x_col, y_col, color_col=None, budget=POINT_BUDGET, bins=DENSITY_BINS):
+    if color_col is not None:
+        # A density grid has no room for a colour dimension; show an even sample instead
+        sample = df.sample(n=budget, random_state=0).sort_index()
+        fig = px.scatter(sample, x=x_col, y=y_col, color=color_col)
+        fig.update_layout(title=_reduced_title("Random sample", len(df), len(sample)))
+        return fig
+    fig = go.Figure(_density_trace(*density_grid(df[x_col], df[y_col], bins)))
+    fig.update_layout(xaxis_title=x_col, yaxis_title=y_col,
+                      title=_reduced_title(f"{bins}x{bins} density", len(df)))
+    return fig
+
+
+def density_pair_plot(df, cols, bins=DENSITY_BINS):
+    n = len(cols)
+    panel_bins = max(20, bins // n)
+    grids = {}
+    fig = make_subplots(rows=n, cols=n, shared_xaxes='columns', horizontal_spacing=0.02, vertical_spacing=0.02)
+    for row, y_col in enumerate(cols, start=1):
+        for col, x_col in enumerate(cols, start=1):
+            if row == col:
+                counts, edges = histogram_counts(df[x_col], panel_bins)
+                trace = go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, marker_color='#636efa', showlegend=False)
+            else:
+                # The panel across the diagonal is the same grid transposed
+                if (y_col, x_col) in grids:
+                    counts, y_edges, x_edges = grids[(y_col, x_col)]
+                    grids[(x_col, y_col)] = counts.T, x_edges, y_edges
+                else:
+                    grids[(x_col, y_col)] = density_grid(df[x_col], df[y_col], panel_bins)
+                trace = _density_trace(*grids[(x_col, y_col)], showscale=False)
+            fig.add_trace(trace, row=row, col=col)
+            if row == n:
+                fig.update_xaxes(title_text=x_col, row=row, col=col)
+            if col == 1:
+                fig.update_yaxes(title_text=y_col, row=row, col=col)
+    fig.update_layout(bargap=0, title=_reduced_title(f"{panel_bins}x{panel_bins} density per pair", len(df)))
+    return fig
+
+
+def aggregated_bar(df, x_col, y_col, color_col=None):
+    # px.bar stacks one segment per row; summing per (x, colour) draws the same bars
+    keys = [x_col] if color_col in (None, x_col, y_col) else [x_col, color_col]
+    totals = df.groupby(keys, observed=True, dropna=False)[y_col].sum().reset_index()
+    fig = px.bar(totals, x=x_col, y=y_col, color=color_col)
+    fig.update_layout(title=_reduced_title("Summed per bar", len(df), len(totals)))
+    return fig
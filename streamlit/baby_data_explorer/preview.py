@@ -0,0 +1,108 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ingest_cache import frame_bytes
+
+PAGE_SIZES = (25, 50, 100, 500)
+AGGREGATIONS = ("count", "sum", "mean", "median", "min", "max")
+MAX_PIVOT_COLUMNS = 50
+MAX_AGGREGATE_ROWS = 1000
+AGGREGATE_CACHE_BUDGET_BYTES = int(os.environ.get("EDA_AGGREGATE_CACHE_MB", "64")) * 1024 * 1024
+
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
+
+
+def page_bounds(total, page, page_size):
+    # Row positions [start, stop) of the page, clamped to the last page, so a page
+    # number left over from a larger result shows (and reports) the last rows
+    page = min(max(page, 1), page_count(total, page_size))
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total)
+
+
+def preview_page(engine, mask=None, sort_by=None, descending=False, page=1, page_size=PAGE_SIZES[0]):
+    # One page of the filtered rows, optionally sorted. Only these rows are sent to
+    # the browser; the frame itself never leaves the server.
+    if sort_by is None:
+        rows = np.arange(len(engine.frame)) if mask is None else np.flatnonzero(mask)
+    else:
+        rows = engine.sorted_rows(sort_by, descending)
+        if mask is not None:
+            rows = rows[mask[rows]]
+    start, stop = page_bounds(len(rows), page, page_size)
+    return engine.frame.iloc[rows[start:stop]], len(rows)
+
+
+def aggregate(frame, group_by, value=None, func="count", pivot=None):
+    # Group-by/pivot computed with pandas on the server; only the result table is shown.
+    # Pivot columns are limited to the most frequent values.
+    if pivot is not None:
+        top = frame[pivot].value_counts().index[:MAX_PIVOT_COLUMNS]
+        frame = frame[frame[pivot].isin(top)]
+    keys = list(group_by) + ([pivot] if pivot is not None else [])
+    grouped = frame.groupby(keys, observed=True, dropna=False, sort=True)
+    if func == "count" or value is None:
+        result = grouped.size().rename("count")
+    else:
+        result = grouped[value].agg(func).rename(f"{func}({value})")
+    if pivot is not None:
+        table = result.unstack(pivot)
+        # Plain string headers; categorical column labels don't survive the Arrow round trip
+        table.columns = table.columns.astype(str)
+        return table
+    return result.to_frame()
+
+
+class AggregateCache:
+    # Aggregate tables keyed by (dataset version, filters, aggregation), so reruns
+    # and other sessions looking at the same summary don't regroup the frame. Evicted
+    # by size: a group-by over a high-cardinality column can be as large as the frame.
+
+    def __init__(self, budget_bytes=AGGREGATE_CACHE_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (table, its size)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        result = build()
+        size = frame_bytes(result)
+        if size > self.budget_bytes:
+            return result
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.used_bytes -= previous[1]
+            self._entries[key] = (result, size)
+            self.used_bytes += size
+            while self.used_bytes > self.budget_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.used_bytes -= evicted
+        return result
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "used_bytes": self.used_bytes,
+            "budget_bytes": self.budget_bytes,
+        }
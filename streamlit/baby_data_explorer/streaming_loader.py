@@ -0,0 +1,156 @@
+import itertools
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+CHUNK_ROWS = 200_000
+CATEGORY_MAX_UNIQUE = 1000
+CATEGORY_MAX_RATIO = 0.5
+
+
+def _plan_column(series):
+    # Decided once from the first chunk so every chunk of a column gets the same kind
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(series):
+        return 'int'
+    if pd.api.types.is_float_dtype(series):
+        values = series.dropna().to_numpy()
+        return 'nullable_int' if len(values) and np.array_equal(values, np.round(values)) else 'float'
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        unique = series.nunique(dropna=True)
+        if unique <= CATEGORY_MAX_UNIQUE and unique <= max(1, len(series)) * CATEGORY_MAX_RATIO:
+            return 'category'
+        return 'text'
+    return 'keep'
+
+
+def _read_dtypes(plan):
+    # Text columns are read as text in every chunk, so a later chunk of digits or
+    # blanks doesn't come back numeric
+    return {col: str for col, kind in plan.items() if kind in ('category', 'text')}
+
+
+def _rereadable(source):
+    # Paths are opened again; file objects must be able to seek back
+    if isinstance(source, (str, os.PathLike)):
+        return True
+    seekable = getattr(source, 'seekable', None)
+    return bool(seekable()) if seekable is not None else False
+
+
+def _fits(series, kind):
+    # Whether a later chunk still matches the kind planned from the first one
+    if kind == 'bool':
+        return pd.api.types.is_bool_dtype(series)
+    if kind in ('int', 'nullable_int', 'float'):
+        return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+    return True
+
+
+def _compact_column(series, kind):
+    if kind == 'int':
+        return pd.to_numeric(series, downcast='integer')
+    if kind == 'nullable_int':
+        values = series.dropna().to_numpy()
+        if len(values) and not np.array_equal(values, np.round(values)):
+            return series
+        small = pd.to_numeric(series.dropna(), downcast='integer')
+        dtype = pd.api.types.pandas_dtype(small.dtype.name.capitalize())
+        return series.astype(dtype)
+    if kind == 'float':
+        single = series.astype(np.float32)
+        # Only narrow when it is lossless for this chunk
+        if np.array_equal(single.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+            return single
+        return series
+    if kind == 'category':
+        return _as_text(series).astype('category')
+    if kind == 'text':
+        return _as_text(series)
+    return series
+
+
+def _as_text(series):
+    # Missing values stay missing instead of becoming 'nan' / '<NA>' strings
+    if pd.api.types.is_string_dtype(series) and not pd.api.types.is_object_dtype(series):
+        return series
+    return series.astype(str).where(series.notna())
+
+
+def _combine(parts):
+    if isinstance(parts[0].dtype, pd.CategoricalDtype):
+        return pd.Series(union_categoricals(parts, ignore_order=True), name=parts[0].name)
+    return pd.concat(parts, ignore_index=True)
+
+
+def load_csv_streaming(source, chunk_rows=CHUNK_ROWS, track_memory=False, **read_csv_kwargs):
+    # Reads the CSV chunk by chunk, narrowing each chunk before the next one is read,
+    # so the fully widened default-dtype frame never exists in memory at once.
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+
+    if _rereadable(source):
+        # The first chunk is read on its own to plan the columns; the file is then
+        # read again from the start with the text columns' dtypes pinned
+        position = source.tell() if hasattr(source, 'seek') else None
+        head = pd.read_csv(source, nrows=chunk_rows, **read_csv_kwargs)
+        plan = {col: _plan_column(head[col]) for col in head.columns}
+        if len(head) < chunk_rows:
+            reader = [head]
+        else:
+            del head
+            if position is not None:
+                source.seek(position)
+            kwargs = dict(read_csv_kwargs)
+            dtype = kwargs.pop('dtype', None)
+            if dtype is None or isinstance(dtype, dict):
+                dtype = {**_read_dtypes(plan), **(dtype or {})}
+            reader = pd.read_csv(source, chunksize=chunk_rows, dtype=dtype, **kwargs)
+    else:
+        # A stream can only be read once: the first chunk plans the columns and then
+        # goes through the loop like the rest, whose dtypes are inferred per chunk
+        chunked = pd.read_csv(source, chunksize=chunk_rows, **read_csv_kwargs)
+        head = next(chunked, pd.DataFrame())
+        plan = {col: _plan_column(head[col]) for col in head.columns}
+        reader = itertools.chain([head], chunked)
+
+    columns = {col: [] for col in plan}
+    chunks = 0
+    for chunk in reader:
+        for col in chunk.columns:
+            series = chunk[col]
+            if not _fits(series, plan[col]):
+                # Mixed values further down the file: the column becomes text, chunks
+                # already narrowed included
+                plan[col] = 'text'
+                columns[col] = [_compact_column(part, 'text') for part in columns[col]]
+            columns[col].append(_compact_column(series, plan[col]))
+        chunks += 1
+        del chunk
+
+    data = {}
+    for col in list(columns):
+        parts = columns.pop(col)
+        # Chunks can disagree (one narrowed to float32, another kept float64); concat promotes
+        data[col] = _combine(parts) if len(parts) > 1 else parts[0].reset_index(drop=True)
+        del parts
+    df = pd.DataFrame(data)
+
+    report = {
+        'rows': len(df),
+        'columns': len(df.columns),
+        'chunks': chunks,
+        'seconds': time.perf_counter() - start,
+        'frame_bytes': int(df.memory_usage(deep=True).sum()),
+        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
+    }
+    if track_memory:
+        report['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return df, report
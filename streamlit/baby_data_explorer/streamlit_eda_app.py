@@ -1,58 +1,71 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-from st_aggrid import AgGrid, GridOptionsBuilder
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import numpy as np
+import io
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from babyfeed_store import BABYFEED_COLUMNS, BabyfeedStore, is_babyfeed_export, read_export
+from filter_engine import FilterEngineCache
+from ingest_cache import IngestCache, content_hash
+from instrumentation import Metrics, debug_enabled, payload, record_cache, show_debug_panel, stage
+from plot_reduction import POINT_BUDGET
+from preview import (AGGREGATIONS, MAX_AGGREGATE_ROWS, PAGE_SIZES, AggregateCache, aggregate, page_bounds, page_count,
+                     preview_page)
+from streaming_loader import load_csv_streaming
+from type_inference import ColumnType, SchemaCache, convert_column, infer_column_type
+from visualizations import VIZ_TYPES, FigureCache, make_spec
 
 # Set page configuration
 st.set_page_config(page_title="EDA App", layout="wide")
 
 def auto_detect_type(series):
-    if pd.api.types.is_numeric_dtype(series):
-        return 'Numeric'
-    elif pd.api.types.is_datetime64_any_dtype(series):
-        return 'Date'
-    else:
-        try:
-            pd.to_datetime(series)
-            return 'Date'
-        except (ValueError, TypeError):
-            return 'Text'
-
-def filter_dataframe(df, column, filter_type, value):
-    if filter_type == "equals":
-        return df[df[column] == value]
-    elif filter_type == "greater than":
-        return df[df[column] > value]
-    elif filter_type == "less than":
-        return df[df[column] < value]
-    elif filter_type == "contains":
-        return df[df[column].astype(str).str.contains(value, case=False)]
+    return infer_column_type(series).kind
+
+DATA_TYPES = {'Text': 'object', 'Numeric': 'float64', 'Integer': 'int64', 'Date': 'datetime64[ns]'}
+
+@st.cache_resource
+def get_metrics():
+    # EDA_METRICS_JSONL / EDA_METRICS_PROM export every rerun's timings for dashboards
+    return Metrics("eda", os.environ.get("EDA_METRICS_JSONL"), os.environ.get("EDA_METRICS_PROM"))
+
+@st.cache_resource
+def get_ingest_cache():
+    # Shared by all sessions; EDA_CACHE_BUDGET_MB bounds the memory held by parsed
+    # uploads and by the filter engines of their typed frames
+    return IngestCache(int(os.environ.get("EDA_CACHE_BUDGET_MB", "1024")) * 1024 * 1024)
+
+def read_upload(name, data):
+    if name.endswith('.csv'):
+        # babyfeedtimer exports have a known layout, so they skip type sniffing entirely
+        if is_babyfeed_export(data.split(b'\n', 1)[0].decode('utf-8-sig', errors='replace')):
+            return read_export(io.BytesIO(data))
+        df, _ = load_csv_streaming(io.BytesIO(data))
+        return df
+    return pd.read_excel(io.BytesIO(data))
+
+@st.cache_resource
+def get_schema_cache():
+    return SchemaCache()
+
+def apply_data_types(df, selected_types, schema=None):
+    for col, selected_type in selected_types.items():
+        column_type = schema[col] if schema else ColumnType(selected_type)
+        df[col] = convert_column(df[col], column_type, selected_type)
     return df
 
-def create_wordcloud(df, text_column):
-    text = ' '.join(df[text_column].astype(str))
-    wordcloud = WordCloud(width=800, height=400, background_color='white').generate(text)
-    
-    # Convert WordCloud to image
-    plt.figure(figsize=(10, 5))
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis('off')
-    
-    # Convert matplotlib figure to plotly figure
-    fig = px.imshow(wordcloud.to_array())
-    fig.update_layout(
-        xaxis={'showticklabels': False},
-        yaxis={'showticklabels': False},
-        hovermode='closest'
-    )
-    fig.update_traces(hoverinfo='none', hovertemplate=None)
-    return fig
-
-def create_visualization(df, viz_id):
+@st.cache_resource
+def get_filter_engines():
+    return FilterEngineCache(get_ingest_cache())
+
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
+
+def visualization_spec(df, viz_id, date_filter=None, point_budget=POINT_BUDGET):
+    # Renders the visualization's widgets and returns its spec, plus the slot its
+    # chart goes into once built; None when the selection can't produce a figure
     st.subheader(f"Visualization {viz_id}")
     
     # Data filtering for this visualization
@@ -60,99 +73,159 @@ def create_visualization(df, viz_id):
     filter_column = st.selectbox("Select column to filter", df.columns, key=f"filter_col_{viz_id}")
     filter_type = st.selectbox("Select filter type", ["equals", "greater than", "less than", "contains"], key=f"filter_type_{viz_id}")
     filter_value = st.text_input("Enter filter value", key=f"filter_value_{viz_id}")
-    
-    if filter_value:
-        df = filter_dataframe(df, filter_column, filter_type, filter_value)
+    row_filter = (filter_column, filter_type, filter_value) if filter_value else None
 
-    viz_type = st.selectbox(f"Choose visualization type for Visualization {viz_id}", 
-        ["Histogram", "Bar Chart", "Scatter Plot", "Box Plot", "Correlation Heatmap", "Pair Plot", "Time Series Plot", "Word Cloud"],
-        key=f"viz_type_{viz_id}")
+    viz_type = st.selectbox(f"Choose visualization type for Visualization {viz_id}", VIZ_TYPES, key=f"viz_type_{viz_id}")
+    spec = None
 
     if viz_type == "Histogram":
-        numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
+        numeric_cols = df.select_dtypes(include='number').columns
         if not numeric_cols.empty:
             col = st.selectbox("Select a column for the histogram", numeric_cols, key=f"hist_col_{viz_id}")
             color_scheme = st.color_picker("Choose a color", "#3366cc", key=f"hist_color_{viz_id}")
-            fig = px.histogram(df, x=col, color_discrete_sequence=[color_scheme])
-            fig.update_layout(autosize=True)
-            st.plotly_chart(fig, use_container_width=True)
+            spec = make_spec(viz_type, row_filter, date_filter, point_budget, x=col, color=color_scheme)
         else:
             st.error("No numeric columns available for histogram.")
 
     elif viz_type == "Bar Chart":
         x_col = st.selectbox("Select X-axis column", df.columns, key=f"bar_x_{viz_id}")
-        y_col = st.selectbox("Select Y-axis column", df.select_dtypes(include=['float64', 'int64']).columns, key=f"bar_y_{viz_id}")
+        y_col = st.selectbox("Select Y-axis column", df.select_dtypes(include='number').columns, key=f"bar_y_{viz_id}")
         color_col = st.selectbox("Select color column (optional)", [None] + list(df.columns), key=f"bar_color_{viz_id}")
-        fig = px.bar(df, x=x_col, y=y_col, color=color_col)
-        fig.update_layout(autosize=True)
-        st.plotly_chart(fig, use_container_width=True)
+        spec = make_spec(viz_type, row_filter, date_filter, point_budget, x=x_col, y=y_col, color=color_col)
 
     elif viz_type == "Scatter Plot":
-        numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
+        numeric_cols = df.select_dtypes(include='number').columns
         if len(numeric_cols) >= 2:
             x_col = st.selectbox("Select X-axis column", numeric_cols, key=f"scatter_x_{viz_id}")
             y_col = st.selectbox("Select Y-axis column", numeric_cols, key=f"scatter_y_{viz_id}")
             color_col = st.selectbox("Select color column (optional)", [None] + list(df.columns), key=f"scatter_color_{viz_id}")
-            fig = px.scatter(df, x=x_col, y=y_col, color=color_col)
-            fig.update_layout(autosize=True)
-            st.plotly_chart(fig, use_container_width=True)
+            spec = make_spec(viz_type, row_filter, date_filter, point_budget, x=x_col, y=y_col, color=color_col)
         else:
             st.error("At least two numeric columns are required for a scatter plot.")
 
     elif viz_type == "Box Plot":
-        numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
+        numeric_cols = df.select_dtypes(include='number').columns
         if not numeric_cols.empty:
             y_col = st.selectbox("Select column for box plot", numeric_cols, key=f"box_y_{viz_id}")
             x_col = st.selectbox("Select grouping column (optional)", [None] + list(df.columns), key=f"box_x_{viz_id}")
-            fig = px.box(df, y=y_col, x=x_col)
-            fig.update_layout(autosize=True)
-            st.plotly_chart(fig, use_container_width=True)
+            spec = make_spec(viz_type, row_filter, date_filter, point_budget, x=x_col, y=y_col)
         else:
             st.error("No numeric columns available for box plot.")
 
     elif viz_type == "Correlation Heatmap":
-        numeric_df = df.select_dtypes(include=['float64', 'int64'])
-        if not numeric_df.empty:
-            fig = px.imshow(numeric_df.corr(), color_continuous_scale='RdBu_r', zmin=-1, zmax=1)
-            fig.update_layout(autosize=True)
-            st.plotly_chart(fig, use_container_width=True)
+        if not df.select_dtypes(include='number').empty:
+            spec = make_spec(viz_type, row_filter, date_filter)
         else:
             st.error("No numeric columns available for correlation heatmap.")
 
     elif viz_type == "Pair Plot":
-        numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
+        numeric_cols = df.select_dtypes(include='number').columns
         if len(numeric_cols) >= 2:
             cols = st.multiselect("Select columns for pair plot", numeric_cols, default=numeric_cols[:4].tolist(), key=f"pair_cols_{viz_id}")
             if len(cols) < 2:
                 st.error("Please select at least two columns for the pair plot.")
             else:
-                fig = px.scatter_matrix(df[cols])
-                fig.update_layout(autosize=True)
-                st.plotly_chart(fig, use_container_width=True)
+                spec = make_spec(viz_type, row_filter, date_filter, point_budget, columns=tuple(cols))
         else:
             st.error("At least two numeric columns are required for a pair plot.")
 
     elif viz_type == "Time Series Plot":
         date_cols = df.select_dtypes(include=['datetime64']).columns.tolist()
-        numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
+        numeric_cols = df.select_dtypes(include='number').columns
         if date_cols and not numeric_cols.empty:
             date_col = st.selectbox("Select date column", date_cols, key=f"ts_date_{viz_id}")
             value_col = st.selectbox("Select value column", numeric_cols, key=f"ts_value_{viz_id}")
-            fig = px.line(df, x=date_col, y=value_col)
-            fig.update_layout(autosize=True)
-            st.plotly_chart(fig, use_container_width=True)
+            method = st.radio("Downsampling for large data", ["lttb", "minmax"], horizontal=True, key=f"ts_method_{viz_id}")
+            spec = make_spec(viz_type, row_filter, date_filter, point_budget, x=date_col, y=value_col, method=method)
         else:
             st.error("Both date and numeric columns are required for a time series plot.")
 
     elif viz_type == "Word Cloud":
-        text_cols = df.select_dtypes(include=['object']).columns
+        text_cols = df.select_dtypes(include=['object', 'string', 'category']).columns
         if not text_cols.empty:
             text_col = st.selectbox("Select text column for word cloud", text_cols, key=f"wordcloud_col_{viz_id}")
-            fig = create_wordcloud(df, text_col)
-            st.plotly_chart(fig, use_container_width=True)
+            spec = make_spec(viz_type, row_filter, date_filter, x=text_col)
         else:
             st.error("No text columns available for word cloud.")
 
+    return viz_id, st.empty(), spec
+
+@st.cache_resource
+def get_aggregate_cache():
+    # Shared by all sessions; EDA_AGGREGATE_CACHE_MB bounds the memory its tables hold
+    return AggregateCache()
+
+def show_preview(engine, dataset_version, date_filter=None):
+    # The frame stays on the server: the browser gets one page of rows, or the
+    # result of a group-by/pivot computed here
+    df = engine.frame
+    mode = st.radio("Preview mode", ["Rows", "Group & pivot"], horizontal=True, key="preview_mode")
+
+    if mode == "Rows":
+        controls = st.columns(4)
+        sort_by = controls[0].selectbox("Sort by", [None] + list(df.columns), key="preview_sort")
+        descending = controls[1].selectbox("Order", ["Ascending", "Descending"], key="preview_order") == "Descending"
+        page_size = controls[2].selectbox("Rows per page", PAGE_SIZES, key="preview_page_size")
+        mask = engine.combined_mask(date_filter)
+        total = len(df) if mask is None else int(np.count_nonzero(mask))
+        pages = page_count(total, page_size)
+        page = controls[3].number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, key="preview_page")
+        rows, total = preview_page(engine, mask, sort_by, descending, page, page_size)
+        st.dataframe(payload("preview", rows), use_container_width=True)
+        start, stop = page_bounds(total, page, page_size)
+        st.caption(f"Rows {min(start + 1, total):,}-{stop:,} of {total:,}")
+        return
+
+    controls = st.columns(4)
+    group_by = controls[0].multiselect("Group by", list(df.columns), key="agg_group_by")
+    func = controls[1].selectbox("Aggregation", AGGREGATIONS, key="agg_func")
+    numeric_cols = df.select_dtypes(include='number').columns.tolist()
+    value = controls[2].selectbox("Value column", numeric_cols, key="agg_value", disabled=func == "count")
+    pivot = controls[3].selectbox("Pivot column (optional)", [None] + [col for col in df.columns if col not in group_by],
+                                  key="agg_pivot")
+    if not group_by:
+        st.info("Choose at least one column to group by.")
+        return
+    key = (dataset_version, date_filter, tuple(group_by), func, value if func != "count" else None, pivot)
+    result = get_aggregate_cache().get(
+        key, lambda: aggregate(engine.select(date_filter), group_by, value, func, pivot))
+    st.dataframe(payload("preview", result.head(MAX_AGGREGATE_ROWS)), use_container_width=True)
+    if len(result) > MAX_AGGREGATE_ROWS:
+        st.caption(f"Showing the first {MAX_AGGREGATE_ROWS:,} of {len(result):,} groups")
+
+def render_visualizations(engine, dataset_version, slots):
+    # Figures are memoized per spec; only the ones not seen before are built, in parallel
+    specs = [spec for _, _, spec in slots if spec is not None]
+    built = iter(get_figure_cache().build_all(engine, dataset_version, specs))
+    for viz_id, placeholder, spec in slots:
+        if spec is None:
+            continue
+        fig, error = next(built)
+        if error is not None:
+            placeholder.error(f"An error occurred: {str(error)}")
+        else:
+            # Identical specs share one figure object, so the chart needs its own key
+            placeholder.plotly_chart(payload("figures", fig), use_container_width=True, key=f"chart_{viz_id}")
+
+def show_babyfeed_summary(file_hash, events):
+    # Per-session store, so each new export only adds (and summarizes) its new events.
+    # Kept out of the shared caches since it holds one family's log.
+    if 'babyfeed_store' not in st.session_state:
+        st.session_state.babyfeed_store = BabyfeedStore()
+        st.session_state.babyfeed_files = {}
+    store = st.session_state.babyfeed_store
+    if file_hash not in st.session_state.babyfeed_files:
+        st.session_state.babyfeed_files[file_hash] = store.append(events)
+
+    st.subheader("Babyfeedtimer Summary")
+    st.caption(f"{len(store.events):,} events from {len(st.session_state.babyfeed_files)} export(s); "
+               f"{st.session_state.babyfeed_files[file_hash]:,} new in this file")
+    children = store.daily.index.get_level_values("Child").unique().tolist()
+    child = st.selectbox("Child", children, key="babyfeed_child")
+    daily = store.daily.xs(child, level="Child")
+    st.line_chart(daily[["feed_ml", "sleep_mins"]])
+    st.bar_chart(daily[["wet_nappies", "dirty_nappies"]])
+
 def main():
     st.title("Exploratory Data Analysis App")
     st.write("Upload your CSV or Excel file to get started with interactive data analysis and visualization.")
@@ -162,74 +235,100 @@ def main():
 
     if uploaded_file is not None:
         try:
-            # Read the file
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
+            # Read the file; reruns reuse the parsed frame as long as the content is unchanged
+            file_bytes = uploaded_file.getvalue()
+            file_hash = content_hash(file_bytes)
+            ingest_cache = get_ingest_cache()
+            with stage("read"):
+                df = ingest_cache.read(file_hash, lambda: read_upload(uploaded_file.name, file_bytes))
+            if list(df.columns) == BABYFEED_COLUMNS and isinstance(df["Child"].dtype, pd.CategoricalDtype):
+                with stage("babyfeed_summary"):
+                    show_babyfeed_summary(file_hash, df)
 
             # Auto-detect and select data types
             st.subheader("Data Type Selection")
+            with stage("type_inference"):
+                schema = get_schema_cache().get(file_hash, df)
+            selected_types = {}
             for col in df.columns:
-                detected_type = auto_detect_type(df[col])
-                data_types = {'Text': 'object', 'Numeric': 'float64', 'Integer': 'int64', 'Date': 'datetime64[ns]'}
-                selected_type = st.selectbox(f"Select data type for '{col}' (Auto-detected: {detected_type})", 
-                                             options=list(data_types.keys()), 
-                                             index=list(data_types.keys()).index(detected_type),
-                                             key=f"dtype_{col}")
-                
-                # Apply the selected data type
-                if data_types[selected_type] == 'datetime64[ns]':
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-                elif data_types[selected_type] in ['float64', 'int64']:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                else:
-                    df[col] = df[col].astype(str)
+                detected_type = schema[col].kind
+                selected_types[col] = st.selectbox(f"Select data type for '{col}' (Auto-detected: {detected_type})", 
+                                                   options=list(DATA_TYPES.keys()), 
+                                                   index=list(DATA_TYPES.keys()).index(detected_type),
+                                                   key=f"dtype_{col}")
+
+            # Apply the selected data types, cached per (file, type selection) as the
+            # filter engine for that typed frame, which keeps its indexes and masks across reruns
+            raw_df = df
+            dataset_version = (file_hash, tuple(sorted(selected_types.items())))
+            with stage("convert"):
+                engine = get_filter_engines().get(
+                    dataset_version, lambda: apply_data_types(raw_df, selected_types, schema))
+            df = engine.frame
 
             # Date slicer in the sidebar
             st.sidebar.title("Date Slicer")
             date_columns = df.select_dtypes(include=['datetime64']).columns.tolist()
+            date_filter = None
             if date_columns:
                 selected_date_column = st.sidebar.selectbox("Select date column for filtering", date_columns)
-                date_min = df[selected_date_column].min().date()
-                date_max = df[selected_date_column].max().date()
+                date_min, date_max = (bound.date() for bound in engine.date_bounds(selected_date_column))
                 selected_start_date, selected_end_date = st.sidebar.date_input(
                     "Select date range",
                     value=[date_min, date_max],
                     min_value=date_min,
                     max_value=date_max
                 )
-                df_filtered = df[(df[selected_date_column].dt.date >= selected_start_date) & 
-                                 (df[selected_date_column].dt.date <= selected_end_date)]
+                date_filter = (selected_date_column, "between", (selected_start_date, selected_end_date))
             else:
-                df_filtered = df
                 st.sidebar.write("No date columns available for filtering.")
 
+            # Large frames are binned/downsampled before plotting unless raw plotting is asked for
+            st.sidebar.title("Plot Settings")
+            point_budget = st.sidebar.number_input("Max points per plot", min_value=500, value=POINT_BUDGET, step=500)
+            if st.sidebar.checkbox("Plot raw data (every row, slow for large files)"):
+                point_budget = None
+
             # Display interactive data preview
             st.subheader("Data Preview")
-            gb = GridOptionsBuilder.from_dataframe(df_filtered)
-            gb.configure_default_column(enablePivot=True, enableValue=True, enableRowGroup=True)
-            gb.configure_selection(selection_mode="multiple", use_checkbox=True)
-            gb.configure_side_bar()
-            grid_options = gb.build()
-            AgGrid(df_filtered, gridOptions=grid_options, enable_enterprise_modules=True, height=400, width='100%')
+            with stage("preview"):
+                show_preview(engine, dataset_version, date_filter)
 
             # Visualizations
             if 'visualizations' not in st.session_state:
                 st.session_state.visualizations = []
 
             # Display existing visualizations
-            for viz in st.session_state.visualizations:
-                create_visualization(df_filtered, viz)
+            slots = [visualization_spec(df, viz, date_filter, point_budget) for viz in st.session_state.visualizations]
 
             # Create new visualization button
             if st.button("Create New Visualization", key="create_new_viz"):
                 new_viz_id = len(st.session_state.visualizations) + 1
                 st.session_state.visualizations.append(new_viz_id)
-                create_visualization(df_filtered, new_viz_id)
+                slots.append(visualization_spec(df, new_viz_id, date_filter, point_budget))
+
+            with stage("visualizations"):
+                render_visualizations(engine, dataset_version, slots)
+            record_cache("filter_engine", engine.stats())
 
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
 
+def record_cache_stats(rerun):
+    figure_cache = get_figure_cache()
+    rerun.cache("ingest", get_ingest_cache().stats())
+    rerun.cache("figures", figure_cache.stats())
+    rerun.cache("wordcloud_images", figure_cache.images.stats())
+    rerun.cache("aggregates", get_aggregate_cache().stats())
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    metrics = get_metrics()
+    rerun = metrics.start()
+    try:
+        main()
+    finally:
+        record_cache_stats(rerun)
+        record = metrics.finish(rerun)
+    # EDA_DEBUG=1 or ?debug=1 shows this rerun's timings in the sidebar
+    if debug_enabled("EDA_DEBUG"):
+        show_debug_panel(metrics, record)
\ No newline at end of file
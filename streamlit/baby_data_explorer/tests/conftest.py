@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app imports its sibling modules directly, as `streamlit run` does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,46 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from babyfeed_store import BABYFEED_COLUMNS, BabyfeedStore, read_export
+
+HEADER = ",".join(BABYFEED_COLUMNS)
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "babyfeedtimer - 20240823.csv")
+
+
+def export(*rows):
+    return io.BytesIO("\n".join([HEADER, *rows]).encode())
+
+
+def test_durations_keep_fractions_and_missing_values():
+    events = read_export(export(
+        "Chloe,Sleep,(null),3/8/2024 9:05,3/8/2024 10:35,90.5,0 ml,(null),(null),null,null,0,0",
+        "Chloe,Sleep,(null),3/8/2024 13:00,(null),(null),0 ml,(null),(null),null,null,0,0",
+        "Chloe,Breast,Left,3/8/2024 14:00,3/8/2024 14:12,12,0 ml,(null),(null),null,null,0,0",
+    ))
+    assert events["Duration(mins)"].dtype == np.float32
+    assert events["Duration(mins)"].iloc[0] == np.float32(90.5)
+    assert pd.isna(events["Duration(mins)"].iloc[1])
+
+    daily = BabyfeedStore(events).daily.loc[("Chloe", pd.Timestamp("2024-08-03"))]
+    assert daily["sleeps"] == 2
+    assert daily["sleep_mins"] == 90.5
+    assert daily["breast_mins"] == 12
+
+
+def test_sample_export_reads_in_time_order():
+    events = read_export(SAMPLE)
+    assert list(events.columns) == BABYFEED_COLUMNS
+    assert events["Start Date"].is_monotonic_increasing
+    assert isinstance(events["Child"].dtype, pd.CategoricalDtype)
+
+
+def test_newer_export_only_adds_new_events():
+    events = read_export(SAMPLE)
+    whole = BabyfeedStore(events)
+    store = BabyfeedStore(events.iloc[:3000])
+    assert len(store.events) + store.append(events) == len(whole.events)
+    assert store.append(events) == 0
+    pd.testing.assert_frame_equal(store.daily, whole.daily)
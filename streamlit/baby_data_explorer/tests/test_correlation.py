@@ -0,0 +1,65 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation import MomentIndex, correlation_frame
+from filter_engine import FilterEngine
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 5000
+    base = rng.normal(size=n)
+    df = pd.DataFrame({
+        "when": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 60 * 24 * 90, n), unit="min"),
+        "a": base * 50 + 1000,
+        "b": base * 0.01 + rng.normal(scale=0.01, size=n),
+        "c": rng.integers(0, 100, n),
+        "d": -base + rng.normal(size=n),
+        "label": rng.choice(["x", "y"], n),
+    })
+    df.loc[rng.random(n) < 0.1, "b"] = np.nan
+    df.loc[rng.random(n) < 0.2, "d"] = np.nan
+    return df
+
+
+def assert_matches_pandas(result, expected):
+    assert list(result.columns) == list(expected.columns)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), atol=1e-6)
+
+
+def test_whole_frame_matches_pandas(frame):
+    engine = FilterEngine(frame)
+    assert_matches_pandas(correlation_frame(engine), frame.select_dtypes("number").corr())
+
+
+def test_date_range_matches_pandas(frame):
+    engine = FilterEngine(frame)
+    start, end = datetime.date(2024, 1, 20), datetime.date(2024, 2, 11)
+    result = correlation_frame(engine, ("when", "between", (start, end)))
+    days = frame["when"].dt.date
+    expected = frame[(days >= start) & (days <= end)].select_dtypes("number").corr()
+    assert_matches_pandas(result, expected)
+
+
+def test_row_filter_matches_pandas(frame):
+    engine = FilterEngine(frame)
+    result = correlation_frame(engine, ("when", "between", (datetime.date(2024, 1, 1), datetime.date(2024, 3, 1))),
+                               ("label", "equals", "x"))
+    expected = frame[(frame["label"] == "x") & (frame["when"] < "2024-03-02")].select_dtypes("number").corr()
+    assert_matches_pandas(result, expected)
+
+
+def test_merged_buckets_match_daily_buckets(frame):
+    engine = FilterEngine(frame)
+    index = engine.sorted_index("when")
+    columns = ["a", "b", "c", "d"]
+    daily = MomentIndex(frame, index, columns)
+    # Room for only a handful of buckets, so runs of days are merged
+    merged = MomentIndex(frame, index, columns, budget_bytes=8 * 4 * 8 * len(columns) ** 2)
+    assert len(merged.edges) < len(daily.edges)
+    start, stop = engine.date_positions("when", datetime.date(2024, 1, 5), datetime.date(2024, 3, 17))
+    np.testing.assert_allclose(merged.moments(start, stop), daily.moments(start, stop), rtol=1e-5, atol=1e-3)
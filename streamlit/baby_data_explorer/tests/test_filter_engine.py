@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from filter_engine import FilterEngine, FilterEngineCache
+from ingest_cache import IngestCache
+
+
+def frame(n=10000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"x": rng.random(n), "city": rng.choice(["Leeds", "York", "Hull"], n)})
+
+
+def test_engine_size_grows_with_its_indexes():
+    engine = FilterEngine(frame())
+    empty = engine.nbytes
+    assert empty == engine.frame_bytes
+    engine.mask("x", "greater than", "0.5")
+    engine.mask("city", "equals", "York")
+    assert engine.nbytes > empty + 10000 * 16
+
+
+def test_engines_are_evicted_by_bytes():
+    df = frame()
+    cache = IngestCache(budget_bytes=int(FilterEngine(df).nbytes * 2.5))
+    engines = FilterEngineCache(cache)
+    first = engines.get("v1", lambda: df.copy())
+    assert engines.get("v1", lambda: None) is first
+    engines.get("v2", lambda: df.copy())
+    engines.get("v3", lambda: df.copy())
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["used_bytes"] <= cache.budget_bytes
+    assert engines.get("v1", lambda: df.copy()) is not first
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from ingest_cache import IngestCache
+
+
+def frame(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"x": rng.random(n), "city": rng.choice(["Leeds", "York"], n)})
+
+
+def test_hits_share_the_cached_frame_without_copying():
+    cache = IngestCache()
+    first = cache.read("a", frame)
+    again = cache.read("a", lambda: None)
+    assert cache.stats()["hits"] == 1
+    assert np.shares_memory(first["x"].to_numpy(), again["x"].to_numpy())
+
+
+def test_edits_stay_with_the_caller():
+    cache = IngestCache()
+    df = cache.read("a", frame)
+    df["x"] = 0.0
+    df.loc[0, "city"] = "Hull"
+    again = cache.read("a", lambda: None)
+    pd.testing.assert_frame_equal(again, frame())
+
+
+def test_older_frames_spill_to_arrow_and_come_back():
+    cache = IngestCache(hot_entries=1)
+    cache.read("a", frame)
+    cache.read("b", lambda: frame(seed=1))
+    assert cache.stats()["spilled_entries"] == 1
+    pd.testing.assert_frame_equal(cache.read("a", lambda: None), frame())
+    # "a" is current again, so "b" is the one spilled
+    assert cache.stats()["spilled_entries"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_budget_evicts_least_recently_used():
+    size = int(frame().memory_usage(deep=True).sum())
+    cache = IngestCache(budget_bytes=int(size * 2.5), hot_entries=3)
+    for key in "abc":
+        cache.read(key, frame)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["used_bytes"] <= cache.budget_bytes
+    cache.read("a", frame)
+    assert cache.stats()["misses"] == 4
+
+
+class Held:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+
+def test_held_objects_share_the_budget():
+    size = int(frame().memory_usage(deep=True).sum())
+    cache = IngestCache(budget_bytes=size * 3)
+    cache.read("a", frame)
+    held = cache.hold(("engine", "a"), lambda: Held(size))
+    assert cache.hold(("engine", "a"), lambda: None) is held
+    assert cache.stats()["used_bytes"] == 2 * size
+
+    # Growing past the budget pushes out the least recently used frame
+    held.nbytes = size * 3
+    cache.hold(("engine", "a"), lambda: None)
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["used_bytes"] == 3 * size
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from plot_reduction import (box_stats, density_grid, density_pair_plot, downsample_series, lttb_indices,
+                            minmax_indices)
+
+
+def noisy_line(n=100_000, seed=0):
+    rng = np.random.default_rng(seed)
+    y = np.cumsum(rng.normal(size=n))
+    # Isolated spikes a uniform sample would very likely miss
+    if n > 56789:
+        y[[1234, 56789]] = [y.max() + 500, y.min() - 500]
+    return np.arange(n, dtype=float), y
+
+
+@pytest.mark.parametrize("n_out", [3, 10, 999, 5000])
+def test_lttb_keeps_endpoints_within_budget(n_out):
+    x, y = noisy_line()
+    picked = lttb_indices(x, y, n_out)
+
+    assert len(picked) == n_out
+    assert picked[0] == 0 and picked[-1] == len(x) - 1
+    assert np.all(np.diff(picked) > 0)
+
+
+def test_lttb_keeps_isolated_spikes():
+    x, y = noisy_line()
+    picked = lttb_indices(x, y, 2000)
+
+    assert {1234, 56789} <= set(picked.tolist())
+
+
+@pytest.mark.parametrize("n_out", [2, 11, 1000, 5000])
+def test_minmax_keeps_every_bucket_extreme_within_budget(n_out):
+    x, y = noisy_line()
+    picked = minmax_indices(y, n_out)
+
+    assert len(picked) <= n_out
+    assert np.all(np.diff(picked) > 0)
+    assert y.argmax() in picked and y.argmin() in picked
+    starts = np.linspace(0, len(y), n_out // 2, endpoint=False).astype(np.int64)
+    for lo, hi in zip(starts, np.append(starts[1:], len(y))):
+        bucket = y[picked[(picked >= lo) & (picked < hi)]]
+        assert bucket.min() == y[lo:hi].min() and bucket.max() == y[lo:hi].max()
+
+
+@pytest.mark.parametrize("reduce", [lambda x, y, n: lttb_indices(x, y, n), lambda x, y, n: minmax_indices(y, n)])
+def test_short_series_are_kept_whole(reduce):
+    x, y = noisy_line(50)
+
+    np.testing.assert_array_equal(reduce(x, y, 50), np.arange(50))
+    np.testing.assert_array_equal(reduce(x, y, 5000), np.arange(50))
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_series_sorts_and_drops_missing(method):
+    _, y = noisy_line(20_000)
+    shuffle = np.random.default_rng(0).permutation(len(y))
+    x = pd.date_range("2024-01-01", periods=len(y), freq="min").to_numpy()[shuffle]
+    y = y[shuffle]
+    y[:100] = np.nan
+    points = downsample_series(x, y, budget=500, method=method)
+
+    assert len(points) <= 500
+    assert points["x"].is_monotonic_increasing
+    assert points["y"].notna().all()
+    kept = pd.Series(y, index=x).dropna().sort_index()
+    if method == "lttb":
+        assert points["x"].iloc[0] == kept.index[0] and points["x"].iloc[-1] == kept.index[-1]
+    else:
+        assert points["y"].max() == kept.max() and points["y"].min() == kept.min()
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_box_stats_match_pandas_quantiles(seed):
+    rng = np.random.default_rng(seed)
+    series = pd.Series(np.append(rng.lognormal(size=10_001), [np.nan] * 5))
+    stats = box_stats(series)
+    values = series.dropna()
+
+    assert stats["count"] == len(values)
+    assert stats["q1"] == pytest.approx(values.quantile(0.25))
+    assert stats["median"] == pytest.approx(values.quantile(0.5))
+    assert stats["q3"] == pytest.approx(values.quantile(0.75))
+
+    iqr = stats["q3"] - stats["q1"]
+    inside = values[values.between(stats["q1"] - 1.5 * iqr, stats["q3"] + 1.5 * iqr)]
+    assert (stats["lowerfence"], stats["upperfence"]) == (inside.min(), inside.max())
+    np.testing.assert_array_equal(stats["outliers"], np.sort(values[~values.isin(inside)].to_numpy()))
+
+
+def test_box_stats_thins_outliers_but_keeps_the_extremes():
+    values = np.concatenate([np.zeros(1000), np.ones(1000), np.arange(2.0, 502.0)])
+    stats = box_stats(values, max_outliers=20)
+
+    all_outliers = box_stats(values)["outliers"]
+
+    assert len(all_outliers) > 20 and len(stats["outliers"]) == 20
+    assert stats["outliers"][0] == all_outliers[0] and stats["outliers"][-1] == all_outliers[-1] == 501.0
+
+
+def test_box_stats_of_nothing():
+    assert box_stats(pd.Series([np.nan, np.nan])) is None
+
+
+def test_density_grid_matches_histogram2d():
+    rng = np.random.default_rng(0)
+    x, y = rng.normal(size=50_000), rng.exponential(size=50_000)
+    x[:10] = np.nan
+    counts, x_edges, y_edges = density_grid(x, y, bins=40)
+    keep = ~np.isnan(x)
+    expected, _, _ = np.histogram2d(x[keep], y[keep], bins=[x_edges, y_edges])
+
+    assert counts.sum() == keep.sum()
+    np.testing.assert_allclose(x_edges[[0, -1]], [x[keep].min(), x[keep].max()])
+    # Only values sitting exactly on an inner edge could land in a different bin
+    assert np.abs(counts - expected).sum() <= 2
+
+
+def test_density_grid_of_a_constant_column():
+    counts, x_edges, _ = density_grid(np.full(100, 3.0), np.arange(100.0), bins=10)
+
+    assert counts.sum() == 100
+    assert x_edges[0] < 3.0 < x_edges[-1]
+
+
+def test_pair_plot_mirrored_panels_are_transposes():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"a": rng.normal(size=5000), "b": rng.uniform(size=5000)})
+    fig = density_pair_plot(df, ["a", "b"], bins=60)
+    # Panels in row-major order: a-hist, (x=b, y=a), (x=a, y=b), b-hist
+    upper, lower = fig.data[1], fig.data[2]
+
+    np.testing.assert_array_equal(np.asarray(upper.z, dtype=float), np.asarray(lower.z, dtype=float).T)
+    np.testing.assert_allclose(upper.x, lower.y)
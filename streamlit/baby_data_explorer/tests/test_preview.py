@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from filter_engine import FilterEngine
+from preview import AggregateCache, page_bounds, preview_page
+
+
+def test_page_past_the_end_shows_the_last_page():
+    engine = FilterEngine(pd.DataFrame({"x": np.arange(60)}))
+    rows, total = preview_page(engine, page=7, page_size=25)
+    assert total == 60
+    assert rows["x"].tolist() == list(range(50, 60))
+    assert page_bounds(total, 7, 25) == (50, 60)
+
+
+def test_page_bounds_of_an_empty_result():
+    assert page_bounds(0, 3, 25) == (0, 0)
+
+
+def test_sorted_and_filtered_page():
+    engine = FilterEngine(pd.DataFrame({"x": np.arange(100)}))
+    mask = engine.combined_mask(("x", "greater than", "89"))
+    rows, total = preview_page(engine, mask, sort_by="x", descending=True, page=1, page_size=5)
+    assert total == 10
+    assert rows["x"].tolist() == [99, 98, 97, 96, 95]
+
+
+def table(rows):
+    return pd.DataFrame({"count": np.arange(rows)})
+
+
+def test_aggregate_cache_is_bounded_by_table_size():
+    size = table(1000).memory_usage(deep=True).sum()
+    cache = AggregateCache(budget_bytes=int(2.5 * size))
+    for key in "abc":
+        cache.get(key, lambda: table(1000))
+    cache.get("c", lambda: None)
+
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["used_bytes"] == 2 * size
+    assert (cache.hits, cache.misses) == (1, 3)
+    # "a" was the least recently used, so it went first
+    cache.get("b", lambda: table(1000))
+    cache.get("a", lambda: table(1000))
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_aggregate_larger_than_the_budget_is_returned_but_not_kept():
+    cache = AggregateCache(budget_bytes=1000)
+    small = cache.get("small", lambda: table(10))
+    big = cache.get("big", lambda: table(10_000))
+
+    assert len(big) == 10_000
+    assert cache.get("small", lambda: None) is small
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,86 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from streaming_loader import load_csv_streaming
+
+
+def csv_source(frame):
+    return io.BytesIO(frame.to_csv(index=False).encode())
+
+
+def test_matches_read_csv_values():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "count": rng.integers(0, 100, 1000),
+        "price": rng.random(1000).round(2),
+        "city": rng.choice(["Leeds", "York", "Hull"], 1000),
+    })
+    df, report = load_csv_streaming(csv_source(frame), chunk_rows=300)
+    assert report["chunks"] == 4
+    assert isinstance(df["city"].dtype, pd.CategoricalDtype)
+    assert df["count"].tolist() == frame["count"].tolist()
+    np.testing.assert_allclose(df["price"].to_numpy(dtype=np.float64), frame["price"], rtol=1e-6)
+    assert df["city"].astype(str).tolist() == frame["city"].tolist()
+
+
+def test_mixed_values_in_later_chunks():
+    weights = [str(i) for i in range(250)] + ["0.5 kg"] + [str(i) for i in range(49)]
+    codes = [f"c{i % 5}" for i in range(100)] + [""] * 100 + ["007"] * 100
+    flags = ["True", "False"] * 50 + ["True", ""] * 100
+    frame = pd.DataFrame({"weight": weights, "code": codes, "flag": flags})
+    df, report = load_csv_streaming(csv_source(frame), chunk_rows=100)
+
+    assert report["chunks"] == 3
+    assert len(df) == 300
+    # Numeric in the first chunk, text further down
+    assert pd.api.types.is_string_dtype(df["weight"])
+    assert df["weight"].iloc[250] == "0.5 kg"
+    assert df["weight"].iloc[7] == "7"
+    # Planned as a category; an all-blank chunk and a chunk of digits follow
+    assert isinstance(df["code"].dtype, pd.CategoricalDtype)
+    assert df["code"].iloc[150:200].isna().all()
+    assert df["code"].iloc[-1] == "007"
+    assert df["flag"].iloc[0] == "True" and pd.isna(df["flag"].iloc[-1])
+
+
+def test_single_chunk_is_read_once():
+    frame = pd.DataFrame({"a": [1, 2, 3]})
+    df, report = load_csv_streaming(csv_source(frame), chunk_rows=10)
+    assert report["chunks"] == 1
+    assert df["a"].tolist() == [1, 2, 3]
+
+
+def test_text_demotion_keeps_missing_values():
+    # Numeric with gaps in the first two chunks, text in the last
+    weights = (["1.5", ""] * 50) + (["2", ""] * 50) + ["0.5 kg", ""] * 50
+    frame = pd.DataFrame({"weight": weights})
+    df, _ = load_csv_streaming(csv_source(frame), chunk_rows=100)
+    assert df["weight"].isna().sum() == 150
+    assert not df["weight"].isin(["nan", "<NA>"]).any()
+    assert df["weight"].iloc[0] == "1.5" and df["weight"].iloc[-2] == "0.5 kg"
+
+
+class Stream(io.RawIOBase):
+    # A pipe-like source: readable once, no seeking
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self._data.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def test_non_seekable_source_keeps_every_row():
+    frame = pd.DataFrame({"n": range(250), "city": ["Leeds", "York"] * 125})
+    source = io.BufferedReader(Stream(frame.to_csv(index=False).encode()))
+    assert not source.seekable()
+    df, report = load_csv_streaming(source, chunk_rows=100)
+    assert report["chunks"] == 3
+    assert df["n"].tolist() == list(range(250))
+    assert isinstance(df["city"].dtype, pd.CategoricalDtype)
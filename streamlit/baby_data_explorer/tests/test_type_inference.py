@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from type_inference import SchemaCache, convert_column, infer_column_type, infer_schema
+
+
+@pytest.mark.parametrize("values, expected", [
+    (["1", "2.5", "n/a", "-3"], [1.0, 2.5, np.nan, -3.0]),
+    (["4", " NULL ", "", "5"], [4.0, np.nan, np.nan, 5.0]),
+    (["(null)", "--", "7", "None", "NaN"], [np.nan, np.nan, 7.0, np.nan, np.nan]),
+])
+def test_sentinels_do_not_block_numeric_columns(values, expected):
+    series = pd.Series(values, dtype=object)
+    column_type = infer_column_type(series)
+    converted = convert_column(series, column_type, "Numeric")
+
+    assert (column_type.kind, column_type.unit) == ("Numeric", None)
+    np.testing.assert_array_equal(converted.to_numpy(dtype=float), expected)
+
+
+def test_all_sentinel_column_is_text():
+    assert infer_column_type(pd.Series(["n/a", "-", None], dtype=object)).kind == "Text"
+
+
+def test_unit_suffixed_numbers():
+    series = pd.Series(["120 ml", "90ml", "n/a", "-15.5 ml", "120 ml"], dtype=object)
+    column_type = infer_column_type(series)
+    converted = convert_column(series, column_type, "Numeric")
+
+    assert (column_type.kind, column_type.unit) == ("Numeric", "ml")
+    np.testing.assert_array_equal(converted.to_numpy(dtype=float), [120.0, 90.0, np.nan, -15.5, 120.0])
+
+
+def test_mixed_units_stay_text():
+    assert infer_column_type(pd.Series(["120 ml", "4 oz"], dtype=object)).kind == "Text"
+
+
+def test_one_unambiguous_value_makes_the_column_day_first():
+    series = pd.Series(["01/02/2024", "05/06/2024", "23/08/2024", "n/a"], dtype=object)
+    column_type = infer_column_type(series)
+    converted = convert_column(series, column_type, "Date")
+
+    assert (column_type.kind, column_type.date_format) == ("Date", "%d/%m/%Y")
+    assert list(converted[:3]) == [pd.Timestamp("2024-02-01"), pd.Timestamp("2024-06-05"), pd.Timestamp("2024-08-23")]
+    assert pd.isna(converted[3])
+
+
+def test_month_first_dates():
+    column_type = infer_column_type(pd.Series(["08/23/2024 10:15", "02/01/2024 09:00"], dtype=object))
+
+    assert (column_type.kind, column_type.date_format) == ("Date", "%m/%d/%Y %H:%M")
+
+
+def test_sample_winner_is_confirmed_on_every_value():
+    # Every sampled value is a number, but one outside the sample is not
+    values = [str(i) for i in range(50)]
+    values[1] = "abc"
+    column_type = infer_column_type(pd.Series(values, dtype=object), sample_size=10)
+
+    assert column_type.kind == "Text"
+
+
+def test_schema_is_cached_per_file_hash():
+    df = pd.DataFrame({"when": ["23/08/2024", "01/09/2024"], "amount": ["120 ml", "90 ml"], "n": [1, 2]})
+    cache = SchemaCache()
+    first = cache.get("a", df)
+    # A hit never looks at the frame again
+    again = cache.get("a", None)
+
+    assert again is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert {col: column_type.kind for col, column_type in first.items()} == {
+        "when": "Date", "amount": "Numeric", "n": "Numeric"}
+    assert repr(first) == repr(infer_schema(df))
+
+
+def test_schema_cache_evicts_least_recently_used():
+    df = pd.DataFrame({"n": [1]})
+    cache = SchemaCache(max_entries=2)
+    cache.get("a", df)
+    cache.get("b", df)
+    cache.get("a", df)
+    cache.get("c", df)
+    cache.get("b", df)
+
+    assert (cache.hits, cache.misses) == (1, 4)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from filter_engine import FilterEngine
+from visualizations import FigureCache, build_figure, figure_bytes, make_spec
+
+
+@pytest.fixture
+def engine():
+    rng = np.random.default_rng(0)
+    n = 2000
+    return FilterEngine(pd.DataFrame({
+        "x": rng.random(n),
+        "y": rng.random(n),
+        "group": rng.choice(["a", "b", "c"], n),
+        "notes": rng.choice(["good sleep", "long feed", "fussy evening"], n),
+    }))
+
+
+def test_raw_figures_are_sized_by_their_points(engine):
+    raw = build_figure(engine, make_spec("Scatter Plot", x="x", y="y", color=None, point_budget=None))
+    assert figure_bytes(raw) >= 2 * 2000 * 8
+    pairs = build_figure(engine, make_spec("Pair Plot", columns=("x", "y"), point_budget=None))
+    assert figure_bytes(pairs) >= 2 * 2000 * 8
+
+
+def test_word_cloud_figures_have_a_size(engine):
+    fig = build_figure(engine, make_spec("Word Cloud", x="notes"))
+    assert figure_bytes(fig) > 0
+
+
+def test_cache_evicts_by_size(engine):
+    spec = make_spec("Scatter Plot", x="x", y="y", color=None, point_budget=None)
+    size = figure_bytes(build_figure(engine, spec))
+    cache = FigureCache(budget_bytes=int(size * 2.5))
+    for version in ("v1", "v2", "v3"):
+        (fig, error), = cache.build_all(engine, version, [spec])
+        assert error is None
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["used_bytes"] <= cache.budget_bytes
+    cache.build_all(engine, "v3", [spec, spec])
+    assert cache.stats()["hits"] == 1
+
+
+def test_build_errors_are_returned_per_spec(engine):
+    cache = FigureCache()
+    good = make_spec("Histogram", x="x", color="#636efa")
+    (fig, error), (_, failure) = cache.build_all(engine, "v1", [good, make_spec("Sankey")])
+    assert error is None and fig is not None
+    assert isinstance(failure, ValueError)
+
+
+def test_misses_built_concurrently_match_sequential_builds(engine):
+    specs = [make_spec("Histogram", x="x", color="#636efa"),
+             make_spec("Scatter Plot", x="x", y="y", color=None, point_budget=500),
+             make_spec("Box Plot", x="group", y="y", point_budget=500),
+             make_spec("Pair Plot", columns=("x", "y"), point_budget=500)]
+    concurrent = FigureCache(max_workers=4).build_all(engine, "v1", specs)
+    sequential = FigureCache(max_workers=1).build_all(engine, "v1", specs)
+    for (fig, error), (expected, _) in zip(concurrent, sequential):
+        assert error is None
+        assert figure_bytes(fig) == figure_bytes(expected)
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+from wordcloud import WordCloud
+
+from word_index import TokenIndex
+
+NOTES = [
+    "The cat sat on the mat", "Cats like milk and cats like fish", None, "Baby's bottle 120ml at 3pm",
+    "bottle bottles BOTTLE", "naïve café crème", "I'm sure it won't; it's a dress, two dresses and a glass",
+    "Fed 90 ml -- slept well!!", "slept  well\tafter the bath", "",
+]
+
+
+def process_text(series):
+    # How the app used to build a word cloud: the whole column joined into one text.
+    # Bigram collocations are left out, since the index only counts single words.
+    return WordCloud(collocations=False).process_text(" ".join(series.dropna().astype(str)))
+
+
+@pytest.fixture(scope="module")
+def notes():
+    rng = np.random.default_rng(0)
+    return pd.Series(rng.choice(np.array(NOTES, dtype=object), 5000))
+
+
+def test_frequencies_match_process_text(notes):
+    index = TokenIndex(notes)
+
+    assert index.frequencies(index.frequency_vector()) == process_text(notes)
+
+
+def test_filtered_frequencies_match_process_text(notes):
+    index = TokenIndex(notes)
+    mask = np.random.default_rng(1).random(len(notes)) < 0.3
+
+    assert index.frequencies(index.frequency_vector(mask)) == process_text(notes[mask])
+
+
+def test_category_column_matches_process_text(notes):
+    categories = notes.astype("category")
+    index = TokenIndex(categories)
+
+    assert index.frequencies(index.frequency_vector()) == process_text(notes)
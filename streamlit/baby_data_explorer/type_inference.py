@@ -0,0 +1,152 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+SAMPLE_SIZE = 1000
+SENTINEL_NULLS = frozenset({"", "(null)", "null", "none", "nan", "n/a", "na", "-", "--"})
+UNIT_NUMBER = r"^\s*([-+]?\d+(?:\.\d+)?)\s*([A-Za-z%µ°]+)\s*$"
+
+# Day-first and month-first layouts are both listed; whichever one parses every
+# sampled value wins, so a single "23/8/2024" settles the ambiguity for the column.
+DATE_FORMATS = (
+    "ISO8601",
+    "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y",
+    "%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S", "%m/%d/%Y",
+    "%d-%m-%Y %H:%M", "%d-%m-%Y",
+    "%d.%m.%Y %H:%M", "%d.%m.%Y",
+    "%Y/%m/%d %H:%M", "%Y/%m/%d",
+    "%d %b %Y", "%d %B %Y", "%b %d, %Y", "%B %d, %Y",
+)
+
+
+class ColumnType:
+    __slots__ = ('kind', 'date_format', 'unit')
+
+    def __init__(self, kind, date_format=None, unit=None):
+        self.kind = kind
+        self.date_format = date_format
+        self.unit = unit
+
+    def __repr__(self):
+        return f"ColumnType({self.kind!r}, date_format={self.date_format!r}, unit={self.unit!r})"
+
+
+def _is_sentinel(text):
+    return text.str.strip().str.lower().isin(SENTINEL_NULLS)
+
+
+def _distinct_values(series):
+    # Inference only ever needs the distinct non-null spellings, which on real exports
+    # is a small fraction of the rows
+    text = pd.Series(pd.unique(series.dropna())).astype(str).str.strip()
+    return text[~_is_sentinel(text)].reset_index(drop=True)
+
+
+def _sample(values, sample_size):
+    if len(values) <= sample_size:
+        return values
+    # Evenly spread over the column rather than the head, which is often one day/person
+    return values.iloc[np.linspace(0, len(values) - 1, sample_size).astype(int)]
+
+
+def _numeric_unit(values):
+    if pd.to_numeric(values, errors='coerce').notna().all():
+        return True, None
+    parts = values.str.extract(UNIT_NUMBER)
+    if parts[0].notna().all() and parts[1].nunique() == 1:
+        return True, parts[1].iloc[0]
+    return False, None
+
+
+def _date_formats(values):
+    for date_format in DATE_FORMATS:
+        if pd.to_datetime(values, format=date_format, errors='coerce').notna().all():
+            yield date_format
+
+
+def infer_column_type(series, sample_size=SAMPLE_SIZE):
+    if pd.api.types.is_numeric_dtype(series):
+        return ColumnType('Numeric')
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return ColumnType('Date')
+
+    values = _distinct_values(series)
+    if values.empty:
+        return ColumnType('Text')
+
+    # Decide on a bounded sample, then confirm the winner on every distinct value
+    sample = _sample(values, sample_size)
+    is_numeric, unit = _numeric_unit(sample)
+    if is_numeric and (len(values) == len(sample) or _numeric_unit(values) == (True, unit)):
+        return ColumnType('Numeric', unit=unit)
+
+    for date_format in _date_formats(sample):
+        if len(values) == len(sample) or pd.to_datetime(values, format=date_format, errors='coerce').notna().all():
+            return ColumnType('Date', date_format=date_format)
+    return ColumnType('Text')
+
+
+def infer_schema(df, sample_size=SAMPLE_SIZE):
+    return {col: infer_column_type(df[col], sample_size) for col in df.columns}
+
+
+def _convert_distinct(series, convert):
+    # Converts each distinct value once and broadcasts the results back to the rows
+    codes, uniques = pd.factorize(series)
+    converted = convert(pd.Series(uniques))
+    return pd.Series(converted.array.take(codes, allow_fill=True), index=series.index, name=series.name)
+
+
+def _parse_dates(uniques, date_format):
+    text = uniques.astype(str).str.strip()
+    return pd.to_datetime(text.mask(_is_sentinel(text)), format=date_format, errors='coerce')
+
+
+def _parse_numbers(uniques, unit):
+    text = uniques.astype(str)
+    if unit is not None:
+        return pd.to_numeric(text.str.extract(UNIT_NUMBER)[0], errors='coerce')
+    return pd.to_numeric(text.mask(_is_sentinel(text)), errors='coerce')
+
+
+def convert_column(series, column_type, selected_kind):
+    # Explicit formats/units keep the conversion vectorized instead of per-element guessing
+    if selected_kind == 'Date':
+        if column_type.date_format is None or pd.api.types.is_datetime64_any_dtype(series):
+            return pd.to_datetime(series, errors='coerce')
+        return _convert_distinct(series, lambda uniques: _parse_dates(uniques, column_type.date_format))
+    if selected_kind in ('Numeric', 'Integer'):
+        if pd.api.types.is_numeric_dtype(series):
+            return series
+        return _convert_distinct(series, lambda uniques: _parse_numbers(uniques, column_type.unit))
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Already text, and far smaller than one string object per row
+        return series
+    return series.astype(str)
+
+
+class SchemaCache:
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_hash, df):
+        with self._lock:
+            schema = self._entries.get(file_hash)
+            if schema is not None:
+                self._entries.move_to_end(file_hash)
+                self.hits += 1
+                return schema
+            self.misses += 1
+
+        schema = infer_schema(df)
+        with self._lock:
+            self._entries[file_hash] = schema
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return schema
@@ -0,0 +1,218 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import plotly.express as px
+
+from correlation import correlation_frame
+from filter_engine import FilterEngine
+from plot_reduction import (POINT_BUDGET, aggregated_bar, binned_histogram, density_pair_plot, density_scatter,
+                            downsampled_line, summarized_box)
+from word_index import WordCloudImageCache
+
+VIZ_TYPES = ["Histogram", "Bar Chart", "Scatter Plot", "Box Plot", "Correlation Heatmap", "Pair Plot",
+             "Time Series Plot", "Word Cloud"]
+FIGURE_CACHE_BUDGET_BYTES = int(os.environ.get("EDA_FIGURE_CACHE_MB", "256")) * 1024 * 1024
+# Misses built at once; the NumPy/pandas reduction and filtering release the GIL
+FIGURE_WORKERS = max(1, int(os.environ.get("EDA_FIGURE_WORKERS", "4")))
+# Trace attributes that hold per-point data, where raw-mode figures keep the filtered rows
+DATA_ATTRIBUTES = ("x", "y", "z", "customdata", "text", "hovertext", "ids", "source")
+
+
+def filter_dataframe(df, column, filter_type, value, engine=None, base_filter=None):
+    # With a shared engine the mask is computed once per (column, filter, value) over
+    # the full frame and combined with the date slicer's mask
+    if engine is None:
+        engine = FilterEngine(df)
+    return engine.select(base_filter, (column, filter_type, value))
+
+
+def needs_reduction(df, point_budget):
+    # point_budget=None is the raw-data escape hatch: every row goes to Plotly
+    return point_budget is not None and len(df) > point_budget
+
+
+def create_wordcloud(engine, text_column, filters=(), images=None):
+    # Word counts come from the column's token index, summed over the filtered rows
+    index = engine.token_index(text_column)
+    vector = index.frequency_vector(engine.combined_mask(*filters))
+    images = images if images is not None else WordCloudImageCache(max_entries=1)
+    fig = px.imshow(images.render(index, vector))
+    fig.update_layout(
+        xaxis={'showticklabels': False},
+        yaxis={'showticklabels': False},
+        hovermode='closest'
+    )
+    fig.update_traces(hoverinfo='none', hovertemplate=None)
+    return fig
+
+
+def make_spec(viz_type, row_filter=None, date_filter=None, point_budget=POINT_BUDGET, **options):
+    # Everything a figure depends on besides the dataset itself. Values must be
+    # hashable (column lists as tuples) since the spec is the figure's cache key.
+    return dict(options, viz_type=viz_type, row_filter=row_filter, date_filter=date_filter, point_budget=point_budget)
+
+
+def spec_key(dataset_version, spec):
+    return dataset_version, tuple(sorted(spec.items()))
+
+
+def build_figure(engine, spec, images=None):
+    # Pure data -> figure step; no Streamlit calls, so it can run in a worker thread
+    if spec['viz_type'] == "Word Cloud":
+        return create_wordcloud(engine, spec['x'], (spec['date_filter'], spec['row_filter']), images)
+    if spec['viz_type'] == "Correlation Heatmap":
+        corr = correlation_frame(engine, spec['date_filter'], spec['row_filter'])
+        fig = px.imshow(corr, color_continuous_scale='RdBu_r', zmin=-1, zmax=1)
+        fig.update_layout(autosize=True)
+        return fig
+    if spec['row_filter'] is not None:
+        df = filter_dataframe(engine.frame, *spec['row_filter'], engine=engine, base_filter=spec['date_filter'])
+    else:
+        df = engine.select(spec['date_filter'])
+    viz_type, point_budget = spec['viz_type'], spec['point_budget']
+    reduce = needs_reduction(df, point_budget)
+
+    if viz_type == "Histogram":
+        if reduce:
+            fig = binned_histogram(df[spec['x']], spec['color'])
+        else:
+            fig = px.histogram(df, x=spec['x'], color_discrete_sequence=[spec['color']])
+    elif viz_type == "Bar Chart":
+        if reduce:
+            fig = aggregated_bar(df, spec['x'], spec['y'], spec['color'])
+        else:
+            fig = px.bar(df, x=spec['x'], y=spec['y'], color=spec['color'])
+    elif viz_type == "Scatter Plot":
+        if reduce:
+            fig = density_scatter(df, spec['x'], spec['y'], spec['color'], point_budget)
+        else:
+            fig = px.scatter(df, x=spec['x'], y=spec['y'], color=spec['color'])
+    elif viz_type == "Box Plot":
+        if reduce:
+            fig = summarized_box(df, spec['y'], spec['x'], point_budget)
+        else:
+            fig = px.box(df, y=spec['y'], x=spec['x'])
+    elif viz_type == "Pair Plot":
+        if reduce:
+            fig = density_pair_plot(df, list(spec['columns']))
+        else:
+            fig = px.scatter_matrix(df[list(spec['columns'])])
+    elif viz_type == "Time Series Plot":
+        if reduce:
+            fig = downsampled_line(df, spec['x'], spec['y'], point_budget, spec['method'])
+        else:
+            fig = px.line(df, x=spec['x'], y=spec['y'])
+    else:
+        raise ValueError(f"Unknown visualization type '{viz_type}'")
+    fig.update_layout(autosize=True)
+    return fig
+
+
+def _values_bytes(values):
+    if values is None:
+        return 0
+    if isinstance(values, str):
+        return len(values)
+    nbytes = getattr(values, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes)
+    # Plotly keeps plain sequences as tuples; count them as 8 bytes per value
+    return 8 * len(values) if hasattr(values, '__len__') else 0
+
+
+def figure_bytes(fig):
+    # Estimated from the traces' per-point data; layout and styling are small next to it
+    total = 0
+    for trace in fig.data:
+        total += sum(_values_bytes(trace[attr]) for attr in DATA_ATTRIBUTES if attr in trace)
+        if 'marker' in trace:
+            total += sum(_values_bytes(trace.marker[attr]) for attr in ('color', 'size') if attr in trace.marker)
+        if 'dimensions' in trace:
+            total += sum(_values_bytes(dimension.values) for dimension in trace.dimensions)
+    return total
+
+
+class FigureCache:
+    # Built figures keyed by (dataset version, spec), evicted by estimated size. A
+    # rerun only builds the specs it has not seen, up to max_workers at a time, so
+    # changing one widget costs one figure.
+
+    def __init__(self, budget_bytes=FIGURE_CACHE_BUDGET_BYTES, max_workers=FIGURE_WORKERS):
+        self.budget_bytes = budget_bytes
+        self.max_workers = max_workers
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (figure, estimated size)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.images = WordCloudImageCache()
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def _store(self, key, fig):
+        size = figure_bytes(fig)
+        if size > self.budget_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.used_bytes -= previous[1]
+            self._entries[key] = (fig, size)
+            self.used_bytes += size
+            while self.used_bytes > self.budget_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.used_bytes -= evicted
+
+    def build_all(self, engine, dataset_version, specs):
+        # Returns one (figure, error) pair per spec, in order
+        keys = [spec_key(dataset_version, spec) for spec in specs]
+        results = {}
+        pending = {}
+        for key, spec in zip(keys, specs):
+            if key in results or key in pending:
+                continue
+            fig = self._lookup(key)
+            if fig is not None:
+                results[key] = (fig, None)
+            else:
+                pending[key] = spec
+
+        def build(key):
+            try:
+                fig = build_figure(engine, pending[key], self.images)
+            except Exception as e:
+                return key, None, e
+            self._store(key, fig)
+            return key, fig, None
+
+        workers = min(self.max_workers, len(pending))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                built = list(pool.map(build, pending))
+        else:
+            built = [build(key) for key in pending]
+        for key, fig, error in built:
+            results[key] = (fig, error)
+        return [results[key] for key in keys]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "used_bytes": self.used_bytes,
+            "budget_bytes": self.budget_bytes,
+        }
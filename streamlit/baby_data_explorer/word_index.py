@@ -0,0 +1,121 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import pandas as pd
+from wordcloud import STOPWORDS, WordCloud
+
+# Same tokenization as WordCloud.process_text with its defaults
+TOKEN_PATTERN = re.compile(r"\w[\w']*")
+STOPWORDS_LOWER = frozenset(word.lower() for word in STOPWORDS)
+WORDCLOUD_SIZE = (800, 400)
+
+
+def tokenize(text):
+    words = (word[:-2] if word.lower().endswith("'s") else word for word in TOKEN_PATTERN.findall(text))
+    return [word for word in words if not word.isdigit() and word.lower() not in STOPWORDS_LOWER]
+
+
+def fuse_frequencies(counts):
+    # Weighted version of wordcloud's process_tokens: case variants are merged under
+    # their most frequent spelling and simple plurals into their singular
+    cases = defaultdict(dict)
+    for word, count in counts.items():
+        cases[word.lower()][word] = count
+    for key in list(cases):
+        if key.endswith('s') and not key.endswith('ss') and key[:-1] in cases:
+            singular = cases[key[:-1]]
+            for word, count in cases.pop(key).items():
+                singular[word[:-1]] = singular.get(word[:-1], 0) + count
+    fused = {}
+    for variants in cases.values():
+        fused[max(variants.items(), key=lambda item: item[1])[0]] = sum(variants.values())
+    return fused
+
+
+class TokenIndex:
+    # Per-row token counts for one text column. Rows point at their distinct value
+    # (codes) and each distinct value's counts are stored once in CSR form, so the
+    # frequencies of any row subset are two bincounts.
+
+    def __init__(self, series):
+        codes, uniques = pd.factorize(series)
+        vocab = {}
+        indptr = [0]
+        token_ids, token_counts = [], []
+        for text in uniques:
+            counts = {}
+            for word in tokenize(str(text)):
+                token = vocab.setdefault(word, len(vocab))
+                counts[token] = counts.get(token, 0) + 1
+            token_ids.extend(counts)
+            token_counts.extend(counts.values())
+            indptr.append(len(token_ids))
+        self.codes = codes.astype(np.int32)
+        self.vocab = np.array(list(vocab), dtype=object)
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.token_ids = np.array(token_ids, dtype=np.int64)
+        self.token_counts = np.array(token_counts, dtype=np.float64)
+        self.digest = hashlib.blake2b("\0".join(self.vocab).encode(), digest_size=16).hexdigest()
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.indptr.nbytes + self.token_ids.nbytes + self.token_counts.nbytes
+
+    def frequency_vector(self, mask=None):
+        codes = self.codes if mask is None else self.codes[mask]
+        # Missing values (code -1) contribute no words
+        rows_per_value = np.bincount(codes[codes >= 0], minlength=len(self.indptr) - 1)
+        weights = np.repeat(rows_per_value, np.diff(self.indptr)) * self.token_counts
+        return np.bincount(self.token_ids, weights=weights, minlength=len(self.vocab))
+
+    def frequencies(self, vector):
+        present = np.flatnonzero(vector)
+        return fuse_frequencies(dict(zip(self.vocab[present], vector[present].astype(np.int64).tolist())))
+
+
+class WordCloudImageCache:
+    # Rendered word clouds keyed by the frequency vector, so filters that select the
+    # same words reuse one image
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, index, vector):
+        key = (index.digest, hashlib.blake2b(vector.tobytes(), digest_size=16).hexdigest())
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        image = render_wordcloud(index.frequencies(vector))
+        with self._lock:
+            self._entries[key] = image
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return image
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+def render_wordcloud(frequencies):
+    width, height = WORDCLOUD_SIZE
+    if not frequencies:
+        return np.full((height, width, 3), 255, dtype=np.uint8)
+    return WordCloud(width=width, height=height, background_color='white').generate_from_frequencies(frequencies).to_array()
@@ -0,0 +1,274 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from urllib.parse import urlsplit
+
+import numpy as np
+import streamlit.logger
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "baby_data_explorer"))
+sys.path.insert(0, os.path.join(HERE, "..", "food_recommendation"))
+
+from stub_services import StubServices  # noqa: E402
+from synthetic import write_babyfeed_csv, write_wide_csv  # noqa: E402
+
+ROW_SCALES = {"small": [1_000, 10_000], "medium": [100_000, 1_000_000], "large": [10_000_000]}
+POI_SCALES = {"small": [100, 1_000], "medium": [5_000, 20_000], "large": [50_000]}
+DATASETS = {"babyfeed": write_babyfeed_csv, "wide": write_wide_csv}
+PERCENTILES = (50, 90, 99)
+SEARCH_RADIUS = 5000
+
+
+def percentiles(values):
+    values = np.asarray(values, dtype=np.float64)
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    summary.update(mean=float(values.mean()), min=float(values.min()), max=float(values.max()), n=len(values))
+    return summary
+
+
+def measure(fn, repeat, memory_repeat):
+    # One warm-up call, `repeat` timed calls, then `memory_repeat` calls under
+    # tracemalloc (kept apart since tracing slows the timed calls down)
+    fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    peaks = []
+    for _ in range(memory_repeat):
+        tracemalloc.start()
+        try:
+            fn()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    result = {"latency_s": percentiles(latencies)}
+    if peaks:
+        result["peak_alloc_bytes"] = percentiles(peaks)
+    return result
+
+
+def dataset_path(data_dir, kind, rows, seed):
+    # Generated files are kept in data_dir, so reruns at 1M-10M rows skip generation
+    path = os.path.join(data_dir, f"{kind}_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        DATASETS[kind](f"{path}.part", rows, seed=seed)
+        os.replace(f"{path}.part", path)
+    return path
+
+
+def eda_scenarios(kind, path):
+    # The EDA app's own functions on one generated CSV, in the order a session runs them
+    import streamlit_eda_app as eda
+    from filter_engine import FilterEngine
+    from type_inference import infer_schema
+    from visualizations import build_figure, filter_dataframe, make_spec
+
+    with open(path, "rb") as f:
+        data = f.read()
+    raw = eda.read_upload(os.path.basename(path), data)
+    schema = infer_schema(raw)
+    types = {col: column_type.kind for col, column_type in schema.items()}
+    typed = eda.apply_data_types(raw.copy(), types, schema)
+
+    numeric = typed.select_dtypes(include="number").columns.tolist()
+    dates = typed.select_dtypes(include="datetime").columns.tolist()
+    text_column, text_value = ("Notes", "sleep") if kind == "babyfeed" else ("text_0", "late")
+    group_column = "Log Type" if kind == "babyfeed" else "cat_1"
+    low, high = typed[dates[0]].quantile([0.25, 0.75])
+    date_filter = (dates[0], "between", (low.date(), high.date()))
+    thresholds = itertools.count()
+
+    def filter_indexed(engine=FilterEngine(typed)):
+        # Index already built; a new threshold each call so the mask is never cached
+        return filter_dataframe(typed, numeric[0], "greater than", str(next(thresholds) % 997), engine=engine)
+
+    specs = {
+        "Histogram": make_spec("Histogram", date_filter=date_filter, x=numeric[0], color="#3366cc"),
+        "Bar Chart": make_spec("Bar Chart", date_filter=date_filter, x=group_column, y=numeric[0], color=group_column),
+        "Scatter Plot": make_spec("Scatter Plot", date_filter=date_filter, x=numeric[0], y=numeric[1], color=None),
+        "Box Plot": make_spec("Box Plot", date_filter=date_filter, x=group_column, y=numeric[0]),
+        "Correlation Heatmap": make_spec("Correlation Heatmap", date_filter=date_filter),
+        "Pair Plot": make_spec("Pair Plot", date_filter=date_filter, columns=tuple(numeric[:4])),
+        "Time Series Plot": make_spec("Time Series Plot", date_filter=date_filter, x=dates[0], y=numeric[0],
+                                      method="lttb"),
+        "Word Cloud": make_spec("Word Cloud", date_filter=date_filter, x=text_column),
+    }
+    scenarios = {
+        "read_upload": lambda: eda.read_upload(os.path.basename(path), data),
+        "auto_detect_type": lambda: [eda.auto_detect_type(raw[col]) for col in raw.columns],
+        "apply_data_types": lambda: eda.apply_data_types(raw.copy(), types, schema),
+        "filter_dataframe/cold": lambda: filter_dataframe(typed, text_column, "contains", text_value),
+        "filter_dataframe/indexed": filter_indexed,
+    }
+    for viz_type, spec in specs.items():
+        # A fresh engine per call: the first render after an upload, indexes included
+        scenarios[f"build_figure/{viz_type}"] = lambda spec=spec: build_figure(FilterEngine(typed), spec)
+    return scenarios
+
+
+def food_scenarios(services, cache_dir):
+    # The food app's functions against the local Nominatim/Overpass stand-ins
+    import food_recommendation_app as food
+    from geocoding import USER_AGENT, GeocodeCache
+    from geopy.geocoders import Nominatim
+    from map_render import render_html
+    from overpass import fetch_elements
+    from poi_table import PoiTable
+    from spatial_index import SpatialIndex
+
+    url = urlsplit(services.nominatim_url)
+    geocoder = Nominatim(user_agent=USER_AGENT, domain=url.netloc, scheme=url.scheme)
+    geocodes = GeocodeCache(geocoder, path=os.path.join(cache_dir, f"geocode_{len(services.elements)}.sqlite3"))
+    queries = (f"Benchmark Street {i}" for i in itertools.count())
+    lat, lon = services.center
+    elements = fetch_elements(lat, lon, SEARCH_RADIUS, url=services.overpass_url)
+    poi = PoiTable.from_elements(elements)
+    index = SpatialIndex(poi.lat, poi.lon)
+
+    def build_poi():
+        table = PoiTable.from_elements(elements)
+        return table, SpatialIndex(table.lat, table.lon)
+
+    return {
+        # Every query is new, so each call is a Nominatim round trip plus a cache write
+        "geocode/miss": lambda: geocodes.geocode(next(queries)),
+        "overpass/fetch_elements": lambda: fetch_elements(lat, lon, SEARCH_RADIUS, url=services.overpass_url),
+        "poi_table/build": build_poi,
+        "create_map/1km": lambda: render_html(food.create_map(lat, lon, poi, index, 1000)),
+        "create_map/5km": lambda: render_html(food.create_map(lat, lon, poi, index, SEARCH_RADIUS)),
+        "get_random_food_choices": lambda: food.get_random_food_choices(lat, lon, poi, index),
+    }
+
+
+def run(args):
+    results = {}
+
+    def record(name, fn):
+        if args.only and not any(part in name for part in args.only):
+            return
+        results[name] = measure(fn, args.repeat, args.memory_repeat)
+        latency = results[name]["latency_s"]
+        print(f"{name:<55} p50 {latency['p50'] * 1e3:>10.2f} ms  p90 {latency['p90'] * 1e3:>10.2f} ms", flush=True)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    for kind in args.datasets:
+        for rows in args.rows or ROW_SCALES[args.scale]:
+            path = dataset_path(args.data_dir, kind, rows, args.seed)
+            for name, fn in eda_scenarios(kind, path).items():
+                record(f"eda/{kind}/{rows}/{name}", fn)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for pois in args.pois or POI_SCALES[args.scale]:
+            services = StubServices.recorded(args.fixture) if args.fixture else StubServices.synthetic(pois, args.seed)
+            label = "recorded" if args.fixture else pois
+            with services:
+                for name, fn in food_scenarios(services, cache_dir).items():
+                    record(f"food/{label}/{name}", fn)
+            if args.fixture:
+                break
+
+    import pandas as pd
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "repeat": args.repeat,
+            "memory_repeat": args.memory_repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {len(results)} results to {args.out}")
+    return report
+
+
+def compare(baseline, current, threshold, min_delta_s=0.002, min_delta_bytes=1 << 20):
+    # A scenario regresses when its p50 latency or median peak allocation grows by
+    # more than `threshold` and by more than the absolute noise floor
+    regressions = []
+    print(f"{'scenario':<55} {'base p50 ms':>12} {'now p50 ms':>11} {'change':>8} {'base MB':>8} {'now MB':>7}")
+    for name in sorted(set(baseline["results"]) & set(current["results"])):
+        base, now = baseline["results"][name], current["results"][name]
+        base_t, now_t = base["latency_s"]["p50"], now["latency_s"]["p50"]
+        flags = []
+        if now_t > base_t * (1 + threshold) and now_t - base_t > min_delta_s:
+            flags.append("latency")
+        base_m = base.get("peak_alloc_bytes", {}).get("p50")
+        now_m = now.get("peak_alloc_bytes", {}).get("p50")
+        if base_m is not None and now_m is not None and now_m > base_m * (1 + threshold) and now_m - base_m > min_delta_bytes:
+            flags.append("memory")
+        mem = (f"{base_m / 2**20:>8.1f} {now_m / 2**20:>7.1f}" if base_m is not None and now_m is not None
+               else f"{'-':>8} {'-':>7}")
+        print(f"{name:<55} {base_t * 1e3:>12.2f} {now_t * 1e3:>11.2f} {now_t / base_t - 1:>+7.0%} {mem}"
+              f"{'  REGRESSION (' + ', '.join(flags) + ')' if flags else ''}")
+        if flags:
+            regressions.append((name, flags))
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print(f"{len(missing)} baseline scenarios were not run")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency/memory benchmarks of both apps' functions, run headless "
+                                                 "against synthetic data and local service stand-ins")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="run the benchmarks, optionally saving and/or comparing a baseline")
+    run_parser.add_argument("--scale", choices=sorted(ROW_SCALES), default="small")
+    run_parser.add_argument("--rows", type=int, nargs="+", help="CSV sizes (overrides --scale)")
+    run_parser.add_argument("--pois", type=int, nargs="+", help="Overpass pool sizes (overrides --scale)")
+    run_parser.add_argument("--datasets", nargs="+", choices=sorted(DATASETS), default=sorted(DATASETS))
+    run_parser.add_argument("--fixture", help="recorded Overpass response to serve instead of synthetic POIs")
+    run_parser.add_argument("--only", nargs="+", help="run scenarios whose name contains any of these")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--memory-repeat", type=int, default=1)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "app_benchmarks"))
+    run_parser.add_argument("--out", help="write results as a JSON baseline")
+    run_parser.add_argument("--compare", help="baseline JSON to compare this run against")
+    run_parser.add_argument("--threshold", type=float, default=0.2)
+    compare_parser = sub.add_parser("compare", help="compare two saved results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    # The apps run outside `streamlit run`, which logs a bare-mode warning per call;
+    # pandas/plotly deprecation notices from their calls are noise here too
+    streamlit.logger.set_log_level("error")
+    warnings.filterwarnings("ignore")
+
+    if args.command == "run":
+        current = run(args)
+        if not args.compare:
+            return
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "food_recommendation"))
+
+from poi_table import session_memory_report  # noqa: E402
+from synthetic import POI_CENTER, synthetic_elements  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes held per session for the food list, before and after PoiTable")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'POIs':>7} {'legacy/session':>15} {'compact/session':>16} {'shared table':>13} {'reduction':>10}")
+    for n in args.sizes:
+        report = session_memory_report(synthetic_elements(n), *POI_CENTER)
+        print(f"{n:>7} {report['legacy_session_bytes']:>15,} "
+              f"{report['compact_session_bytes']:>16,} {report['shared_table_bytes']:>13,} {report['reduction']:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "food_recommendation"))
+
+from distances import haversine_m  # noqa: E402
+from spatial_index import SpatialIndex  # noqa: E402
+
+CENTER = (1.3000, 103.8000)
+
+
+def synthetic_pois(n, spread_m=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    r = spread_m * np.sqrt(rng.random(n))
+    theta = rng.random(n) * 2 * np.pi
+    lats = CENTER[0] + np.degrees(r * np.sin(theta) / 6371008.8)
+    lons = CENTER[1] + np.degrees(r * np.cos(theta) / 6371008.8 / np.cos(np.radians(CENTER[0])))
+    return lats, lons
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SpatialIndex radius/nearest queries against a full scan")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--radius", type=float, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'POIs':>9} {'build ms':>9} {'scan ms':>9} {'within ms':>10} {'nearest10 ms':>13} {'speedup':>8}")
+    for n in args.sizes:
+        lats, lons = synthetic_pois(n)
+        start = time.perf_counter()
+        index = SpatialIndex(lats, lons)
+        build = time.perf_counter() - start
+
+        def scan():
+            dist = haversine_m(CENTER[0], CENTER[1], lats, lons)
+            idx = np.flatnonzero(dist <= args.radius)
+            return idx[np.argsort(dist[idx])]
+
+        expected = scan()
+        got, _ = index.within(CENTER[0], CENTER[1], args.radius)
+        assert np.array_equal(np.sort(expected), np.sort(got)), "index and scan disagree"
+
+        scan_t = best_of(scan, args.repeat)
+        within_t = best_of(lambda: index.within(CENTER[0], CENTER[1], args.radius), args.repeat)
+        nearest_t = best_of(lambda: index.nearest(CENTER[0], CENTER[1], 10), args.repeat)
+        print(f"{n:>9} {build * 1e3:>9.2f} {scan_t * 1e3:>9.3f} {within_t * 1e3:>10.3f} "
+              f"{nearest_t * 1e3:>13.3f} {scan_t / within_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
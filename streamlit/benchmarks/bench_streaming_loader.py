@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "baby_data_explorer"))
+
+from synthetic import write_babyfeed_csv  # noqa: E402
+
+
+def measure(loader, path):
+    # Runs in a fresh process so ru_maxrss is this loader's peak and nothing else's
+    import pandas as pd
+    from streaming_loader import load_csv_streaming
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if loader == "read_csv":
+        df = pd.read_csv(path)
+    else:
+        df, _ = load_csv_streaming(path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "seconds": elapsed,
+        "peak_rss_bytes": (peak - baseline) * 1024,
+        "frame_bytes": int(df.memory_usage(deep=True).sum()),
+        "rows": len(df),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of pd.read_csv vs the streaming loader")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 3_000_000])
+    parser.add_argument("--child", nargs=2, metavar=("LOADER", "PATH"), help=argparse.SUPPRESS)
+    parser.add_argument("--generate", nargs=2, metavar=("ROWS", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure(*args.child)
+        return
+    if args.generate:
+        write_babyfeed_csv(args.generate[1], int(args.generate[0]))
+        return
+
+    print(f"{'rows':>10} {'loader':>10} {'seconds':>8} {'peak RSS MB':>12} {'frame MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            # Generated in a child too: a child's ru_maxrss starts from its parent's high-water mark
+            path = os.path.join(tmp, f"babyfeed_{rows}.csv")
+            subprocess.run([sys.executable, __file__, "--generate", str(rows), path], check=True)
+            for loader in ("read_csv", "streaming"):
+                out = subprocess.run([sys.executable, __file__, "--child", loader, path],
+                                     capture_output=True, text=True, check=True).stdout
+                result = json.loads(out.strip().splitlines()[-1])
+                print(f"{rows:>10} {loader:>10} {result['seconds']:>8.2f} "
+                      f"{result['peak_rss_bytes'] / 2**20:>12.0f} {result['frame_bytes'] / 2**20:>9.0f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
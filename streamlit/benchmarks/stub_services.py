@@ -0,0 +1,168 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "food_recommendation"))
+
+from synthetic import POI_CENTER, synthetic_elements  # noqa: E402
+
+# First bbox of an Overpass QL query as written by overpass.build_query
+BBOX_PATTERN = re.compile(r"\((-?[\d.]+),(-?[\d.]+),(-?[\d.]+),(-?[\d.]+)\)")
+
+
+def element_coords(element):
+    center = element.get("center", element)
+    return center["lat"], center["lon"]
+
+
+class StubServices:
+    # Local stand-ins for Nominatim (/search) and Overpass (/api/interpreter) on one
+    # threaded HTTP server. Overpass answers come from a fixed pool of elements,
+    # either synthetic or a recorded response, cut to each query's bbox; Nominatim
+    # places every query at a deterministic spot near the pool's centre.
+
+    def __init__(self, elements, port=0, latency_ms=0.0):
+        self.elements = elements
+        self.latency_ms = latency_ms
+        coords = np.array([element_coords(e) for e in elements], dtype=np.float64).reshape(-1, 2)
+        self.lats, self.lons = coords[:, 0], coords[:, 1]
+        self.center = (float(self.lats.mean()), float(self.lons.mean())) if len(elements) else POI_CENTER
+        # Serialized once, so answering costs a bbox test and a join
+        self._encoded = [json.dumps(e) for e in elements]
+        self.requests = {"search": 0, "interpreter": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @classmethod
+    def synthetic(cls, pois, seed=0, **kwargs):
+        return cls(synthetic_elements(pois, seed), **kwargs)
+
+    @classmethod
+    def recorded(cls, path, **kwargs):
+        with open(path) as f:
+            return cls(json.load(f)["elements"], **kwargs)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def nominatim_url(self):
+        return self.url
+
+    @property
+    def overpass_url(self):
+        return f"{self.url}/api/interpreter"
+
+    def geocode(self, query):
+        # Within ~1 km of the centre, stable per query
+        digest = hashlib.blake2b(query.strip().lower().encode(), digest_size=8).digest()
+        dlat, dlon = (int.from_bytes(digest[i:i + 4], "big") / 2 ** 32 - 0.5 for i in (0, 4))
+        return self.center[0] + dlat * 0.018, self.center[1] + dlon * 0.018
+
+    def overpass(self, query):
+        match = BBOX_PATTERN.search(query)
+        if match is None:
+            return '{"elements": []}'
+        south, west, north, east = map(float, match.groups())
+        inside = np.flatnonzero((self.lats >= south) & (self.lats <= north) & (self.lons >= west) & (self.lons <= east))
+        return '{"elements": [' + ",".join(self._encoded[i] for i in inside) + "]}"
+
+    def count(self, endpoint):
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def _handler(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if services.latency_ms:
+                    time.sleep(services.latency_ms / 1000)
+                if url.path.rstrip("/").endswith("/search"):
+                    services.count("search")
+                    lat, lon = services.geocode(params.get("q", ""))
+                    body = json.dumps([{"lat": str(lat), "lon": str(lon), "display_name": params.get("q", ""),
+                                        "place_id": 1, "osm_type": "node", "osm_id": 1}])
+                elif url.path.endswith("/api/interpreter"):
+                    services.count("interpreter")
+                    body = services.overpass(params.get("data", ""))
+                else:
+                    self.send_error(404)
+                    return
+                payload = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def record_overpass(path, lat, lon, radius):
+    # Saves a real Overpass answer as a fixture for StubServices.recorded()
+    from overpass import fetch_elements
+    with open(path, "w") as f:
+        json.dump({"elements": fetch_elements(lat, lon, radius)}, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Nominatim/Overpass stand-ins for benchmarks and offline runs")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--pois", type=int, default=5000, help="size of the synthetic POI pool")
+    parser.add_argument("--fixture", help="serve a recorded Overpass response instead of synthetic POIs")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every answer")
+    parser.add_argument("--record", nargs=4, metavar=("PATH", "LAT", "LON", "RADIUS"),
+                        help="fetch a real Overpass response into PATH and exit")
+    args = parser.parse_args()
+    if args.record:
+        path, lat, lon, radius = args.record
+        record_overpass(path, float(lat), float(lon), float(radius))
+        return
+
+    kwargs = {"port": args.port, "latency_ms": args.latency_ms}
+    services = StubServices.recorded(args.fixture, **kwargs) if args.fixture else StubServices.synthetic(args.pois, **kwargs)
+    print(f"Serving {len(services.elements)} POIs; run the food app with\n"
+          f"  NOMINATIM_URL={services.nominatim_url} OVERPASS_URL={services.overpass_url}")
+    services.start()
+    try:
+        services._thread.join()
+    except KeyboardInterrupt:
+        services.stop()
+
+
+if __name__ == "__main__":
+    main()
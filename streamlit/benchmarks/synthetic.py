@@ -0,0 +1,113 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+BABYFEED_COLUMNS = ["Child", "Log Type", "Breast Used", "Start Date", "End Date", "Duration(mins)", "Amount(ml)",
+                    "Milk Type", "Nappy", "Title", "Notes", "Weight(kg)", "Length(cm)"]
+LOG_TYPES = ["Nappy", "Bottle", "Sleep", "Expressed", "Solids", "Breast", "Growth"]
+LOG_WEIGHTS = [0.31, 0.28, 0.11, 0.21, 0.04, 0.02, 0.03]
+NOTES = ["null", "null", "null", "rock to sleep", "took awhile to settle after milk", "WK take over",
+         "130ml bottle - 1 shot - 4 mins", "breast milk.", "Slight spit up", "Bath"]
+WORDS = ["quick", "review", "order", "late", "delivery", "fresh", "great", "service", "price", "return", "size",
+         "colour", "broken", "works", "again", "never", "friendly", "staff", "slow", "parking"]
+CITIES = ["Singapore", "Kuala Lumpur", "Jakarta", "Bangkok", "Manila", "Hanoi", "Taipei", "Seoul", "Tokyo"]
+
+POI_CENTER = (1.3000, 103.8000)
+CUISINES = ["chinese", "malay", "indian", "japanese", "korean", "western", "thai", "coffee_shop"]
+AMENITIES = ["restaurant", "cafe", "fast_food", "food_court"]
+
+
+def babyfeed_frame(rows, children=("Chloe", "Ethan", "Mia"), seed=0):
+    # Same columns, spellings and sentinels as the babyfeedtimer app export
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 240 * 24 * 60, rows)), unit="min")
+    log_type = rng.choice(LOG_TYPES, rows, p=LOG_WEIGHTS)
+    duration = np.where(log_type == "Sleep", rng.integers(10, 240, rows), 0)
+    end = np.where(log_type == "Sleep", (start + pd.to_timedelta(duration, unit="min")).strftime("%-d/%-m/%Y %-H:%M"), "(null)")
+    amount = np.where(np.isin(log_type, ["Bottle", "Expressed"]), rng.integers(2, 30, rows) * 10, 0)
+    return pd.DataFrame({
+        "Child": rng.choice(children, rows),
+        "Log Type": log_type,
+        "Breast Used": np.where(log_type == "Expressed", rng.choice(["Both", "Left", "Right"], rows), "(null)"),
+        "Start Date": start.strftime("%-d/%-m/%Y %-H:%M"),
+        "End Date": end,
+        "Duration(mins)": duration,
+        "Amount(ml)": [f"{a} ml" for a in amount],
+        "Milk Type": np.where(log_type == "Bottle", rng.choice(["Breast Milk", "Formula"], rows), "(null)"),
+        "Nappy": np.where(log_type == "Nappy", rng.choice(["Wet", "Dirty", "Wet&Dirty"], rows), "(null)"),
+        "Title": "null",
+        "Notes": rng.choice(NOTES, rows),
+        "Weight(kg)": np.where(log_type == "Growth", np.round(rng.uniform(3, 12, rows), 2), 0),
+        "Length(cm)": np.where(log_type == "Growth", np.round(rng.uniform(50, 80, rows), 1), 0),
+    }, columns=BABYFEED_COLUMNS)
+
+
+def wide_frame(rows, numeric=20, units=4, categories=4, text=2, dates=2, seed=0):
+    # Mixed-type frame for the generic EDA path: floats with gaps, integers, "12.5 kg"
+    # unit columns, low-cardinality labels, free text and day-first date strings
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for i in range(numeric):
+        values = rng.normal(100 * i, 10 + i, rows)
+        if i % 2 == 0:
+            columns[f"num_{i}"] = np.round(values).astype(np.int64)
+            continue
+        if i % 3 == 0:
+            values[rng.random(rows) < 0.05] = np.nan
+        columns[f"num_{i}"] = np.round(values, 3)
+    for i in range(units):
+        columns[f"unit_{i}"] = pd.Series(np.round(rng.uniform(0, 80, rows), 1)).astype(str) + " kg"
+    for i in range(categories):
+        columns[f"cat_{i}"] = rng.choice(CITIES[:3 + 2 * i], rows)
+    for i in range(text):
+        words = pd.DataFrame(rng.choice(WORDS, (rows, 6)))
+        columns[f"text_{i}"] = words[0].str.cat([words[k] for k in range(1, 6)], sep=" ")
+    for i in range(dates):
+        minutes = rng.integers(0, 4 * 365 * 24 * 60, rows)
+        stamps = np.datetime64("2020-01-01T00:00", "s") + (minutes * 60).astype("timedelta64[s]")
+        # Arrow formats millions of timestamps in well under a second; pandas' strftime doesn't
+        columns[f"date_{i}"] = pc.strftime(pa.array(stamps), format="%d/%m/%Y %H:%M").to_pandas()
+    return pd.DataFrame(columns)
+
+
+def _write_chunks(path, rows, make_frame, chunk_rows, seed):
+    for n, start in enumerate(range(0, rows, chunk_rows)):
+        frame = make_frame(min(chunk_rows, rows - start), seed=seed + n)
+        frame.to_csv(path, mode="w" if n == 0 else "a", header=n == 0, index=False)
+    return path
+
+
+def write_babyfeed_csv(path, rows, chunk_rows=500_000, seed=0):
+    return _write_chunks(path, rows, babyfeed_frame, chunk_rows, seed)
+
+
+def write_wide_csv(path, rows, chunk_rows=200_000, seed=0):
+    return _write_chunks(path, rows, wide_frame, chunk_rows, seed)
+
+
+def synthetic_elements(n, seed=0):
+    # Overpass "out center" elements around POI_CENTER, shaped like a real answer
+    rng = random.Random(seed)
+    streets = [f"Street {i}" for i in range(max(1, n // 20))]
+    elements = []
+    for i in range(n):
+        element = {"type": rng.choice(["node", "node", "way"]), "id": i, "tags": {
+            "amenity": rng.choice(AMENITIES),
+            "name": f"Food Place {i}",
+            "cuisine": rng.choice(CUISINES),
+            "addr:street": rng.choice(streets),
+            "addr:housenumber": str(rng.randint(1, 300)),
+            "opening_hours": "Mo-Su 10:00-22:00",
+            "source": "survey",
+        }}
+        coords = {"lat": POI_CENTER[0] + rng.uniform(-0.04, 0.04), "lon": POI_CENTER[1] + rng.uniform(-0.04, 0.04)}
+        if element["type"] == "way":
+            element["center"] = coords
+            element["nodes"] = list(range(i * 10, i * 10 + 6))
+        else:
+            element.update(coords)
+        elements.append(element)
+    return elements
@@ -0,0 +1,315 @@
+import argparse
+import csv
+import json
+import math
+import os
+import time
+import types
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from geopy.exc import GeopyError
+from geopy.extra.rate_limiter import RateLimiter
+
+from distances import haversine_m
+from geocoding import GeocodeCache, get_shared_geocoder, normalize_query
+from overpass import OverpassCache
+from poi_store import PoiStore
+from poi_table import PoiTable
+
+SEARCH_RADIUS = 5000
+PICK_RADIUS = 1000
+NUM_CHOICES = 10
+GROUP_CELL_DEG = 0.02  # ~2.2 km: locations in the same cell share one area fetch
+ROW_CHUNK = 256
+
+
+def _coordinate(value):
+    # Blank means missing; anything unparseable is kept as NaN so the row, not the
+    # whole batch, is reported as invalid
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def has_coordinates(location):
+    lat, lon = location["lat"], location["lon"]
+    # NaN fails both range checks
+    return lat is not None and lon is not None and -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def read_locations(path):
+    # CSV or JSONL rows with an `address` (or `query`) or `lat`/`lon` columns; plain
+    # text files hold one address or "lat,lon" pair per line.
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+    elif path.endswith(".jsonl"):
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        rows = []
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                parts = line.split(",")
+                try:
+                    rows.append({"lat": float(parts[0]), "lon": float(parts[1])} if len(parts) == 2 else {"address": line})
+                except ValueError:
+                    rows.append({"address": line})
+
+    locations = []
+    for n, row in enumerate(rows):
+        query = row.get("address") or row.get("query")
+        lat, lon = row.get("lat"), row.get("lon")
+        locations.append({
+            "id": row.get("id", n),
+            "query": query,
+            "lat": _coordinate(lat),
+            "lon": _coordinate(lon),
+        })
+    return locations
+
+
+def geocode_all(locations, geocode_cache):
+    # Each distinct normalized address is geocoded once, however often it repeats,
+    # for every row without a usable lat/lon pair of its own. Returns the number of
+    # distinct queries and the keys whose lookup failed; a failed lookup raised
+    # before reaching the cache, so it is retried next run.
+    pending = {}
+    for location in locations:
+        if not has_coordinates(location) and location["query"]:
+            pending.setdefault(normalize_query(location["query"]), location["query"])
+    resolved, failed = {}, set()
+    for key, query in pending.items():
+        try:
+            resolved[key] = geocode_cache.geocode(query)
+        except GeopyError:
+            failed.add(key)
+    for location in locations:
+        if not has_coordinates(location) and location["query"]:
+            coords = resolved.get(normalize_query(location["query"]))
+            if coords is not None:
+                location["lat"], location["lon"] = coords
+    return len(pending), failed
+
+
+def group_locations(lats, lons, cell_deg=GROUP_CELL_DEG):
+    groups = defaultdict(list)
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        groups[(math.floor(lat / cell_deg), math.floor(lon / cell_deg))].append(i)
+    return [np.array(members) for members in groups.values()]
+
+
+def nearest_within(dist, radius, k=None):
+    # Row-wise k nearest columns within radius (all of them when k is None), as
+    # (indices, distances) with -1 / inf padding
+    dist = np.where(dist <= radius, dist, np.inf)
+    k = dist.shape[1] if k is None else min(k, dist.shape[1])
+    if k < dist.shape[1]:
+        part = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(dist.shape[1]), dist.shape)
+    part_dist = np.take_along_axis(dist, part, axis=1)
+    order = np.argsort(part_dist, axis=1, kind="stable")
+    idx = np.take_along_axis(part, order, axis=1)
+    idx_dist = np.take_along_axis(part_dist, order, axis=1)
+    return np.where(np.isfinite(idx_dist), idx, -1), idx_dist
+
+
+def random_within(dist, radius, k, rng):
+    # Row-wise uniform sample of up to k columns within radius: the k smallest random keys
+    keys = rng.random(dist.shape)
+    keys[dist > radius] = np.inf
+    k = min(k, dist.shape[1])
+    idx = np.argpartition(keys, k - 1, axis=1)[:, :k] if k < dist.shape[1] else np.broadcast_to(np.arange(dist.shape[1]), dist.shape)
+    picked = np.isfinite(np.take_along_axis(keys, idx, axis=1))
+    return np.where(picked, idx, -1)
+
+
+class _PoiRecords:
+    # Builds each POI's output dict once per group; rows only add their own distance
+
+    def __init__(self, table):
+        self.table = table
+        self._base = {}
+
+    def __call__(self, i, distance):
+        base = self._base.get(i)
+        if base is None:
+            table = self.table
+            base = self._base[i] = {"type": ("node", "way", "relation")[table.osm_type[i]], "id": int(table.osm_id[i]),
+                                    "lat": float(table.lat[i]), "lon": float(table.lon[i]), "tags": table.tags(i)}
+        return dict(base, distance_m=round(float(distance), 1))
+
+
+def recommend_group(lats, lons, backend, radius=SEARCH_RADIUS, max_results=None,
+                    num_choices=NUM_CHOICES, pick_radius=PICK_RADIUS, rng=None):
+    # Per location: POIs within radius, nearest first (at most max_results), random
+    # picks, and whether the POI list holds every POI within radius
+    rng = np.random.default_rng() if rng is None else rng
+    center_lat, center_lon = float(lats.mean()), float(lons.mean())
+    spread = float(haversine_m(center_lat, center_lon, lats, lons).max())
+    table = PoiTable.from_elements(backend.get(center_lat, center_lon, radius + math.ceil(spread)))
+    poi_record = _PoiRecords(table)
+
+    # Repeated coordinates (many rows for the same office) are computed once
+    coords, inverse = np.unique(np.column_stack([lats, lons]), axis=0, return_inverse=True)
+    results, picks, complete = [], [], []
+    for start in range(0, len(coords), ROW_CHUNK):
+        chunk = coords[start:start + ROW_CHUNK]
+        if not len(table):
+            results.extend([] for _ in range(len(chunk)))
+            picks.extend([] for _ in range(len(chunk)))
+            complete.extend([True] * len(chunk))
+            continue
+        dist = haversine_m(chunk[:, :1], chunk[:, 1:], table.lat[None, :], table.lon[None, :])
+        near_idx, near_dist = nearest_within(dist, radius, max_results)
+        pick_idx = random_within(dist, pick_radius, num_choices, rng)
+        complete.extend((near_idx >= 0).sum(axis=1) == (dist <= radius).sum(axis=1))
+        for row in range(len(dist)):
+            results.append([poi_record(i, d) for i, d in zip(near_idx[row], near_dist[row]) if i >= 0])
+            picks.append([poi_record(i, dist[row, i]) for i in pick_idx[row] if i >= 0])
+    inverse = inverse.ravel()
+    return [results[j] for j in inverse], [picks[j] for j in inverse], [bool(complete[j]) for j in inverse]
+
+
+def run_batch(locations, backend, geocode_cache, radius=SEARCH_RADIUS, max_results=None,
+              num_choices=NUM_CHOICES, pick_radius=PICK_RADIUS, seed=None):
+    stats = {}
+    start = time.perf_counter()
+    stats["geocoded_queries"], failed = geocode_all(locations, geocode_cache)
+    stats["geocode_errors"] = len(failed)
+    stats["geocode_s"] = time.perf_counter() - start
+
+    located = [n for n, location in enumerate(locations) if has_coordinates(location)]
+    lats = np.array([locations[n]["lat"] for n in located], dtype=np.float64)
+    lons = np.array([locations[n]["lon"] for n in located], dtype=np.float64)
+    groups = group_locations(lats, lons)
+    rng = np.random.default_rng(seed)
+
+    start = time.perf_counter()
+    records = [dict(location, status="not_found", radius=radius, complete=False, results=[], random_picks=[])
+               for location in locations]
+    for record in records:
+        if has_coordinates(record):
+            continue
+        if record["query"] and normalize_query(record["query"]) in failed:
+            record["status"] = "geocode_error"
+        elif record["lat"] is not None or record["lon"] is not None:
+            # Half a pair, or a value that isn't a coordinate
+            record["status"] = "invalid_coordinates"
+    for members in groups:
+        results, picks, complete = recommend_group(lats[members], lons[members], backend, radius, max_results,
+                                                   num_choices, pick_radius, rng)
+        for member, result, pick, whole in zip(members, results, picks, complete):
+            record = records[located[member]]
+            record.update(status="ok", complete=whole, results=result, random_picks=pick)
+    stats["recommend_s"] = time.perf_counter() - start
+    stats["groups"] = len(groups)
+    return records, stats
+
+
+def write_output(records, path):
+    if path.endswith(".parquet"):
+        frame = pd.DataFrame(records)
+        for column in ("results", "random_picks"):
+            # Tags differ per POI; keep them as JSON so the Parquet schema stays fixed
+            frame[column] = frame[column].map(json.dumps)
+        frame["id"] = frame["id"].astype(str)
+        frame.to_parquet(path, index=False)
+    else:
+        with open(path, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+
+def read_output(path):
+    if path.endswith(".parquet"):
+        frame = pd.read_parquet(path)
+        for column in ("results", "random_picks"):
+            frame[column] = frame[column].map(json.loads)
+        return frame.to_dict("records")
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class PrecomputedResults:
+    # Serves batch output to the app: known addresses skip geocoding and known
+    # coordinates skip the POI fetch. Anything else, a larger radius than the batch
+    # used, or a POI list cut short by --max-results goes to the fallback backend.
+
+    def __init__(self, records, fallback=None):
+        self.fallback = fallback
+        self.by_query = {}
+        self.by_coords = {}
+        for record in records:
+            if record.get("status") != "ok":
+                continue
+            if record.get("query"):
+                self.by_query[normalize_query(record["query"])] = (record["lat"], record["lon"])
+            self.by_coords[(round(record["lat"], 6), round(record["lon"], 6))] = record
+
+    @classmethod
+    def load(cls, path, fallback=None):
+        return cls(read_output(path), fallback)
+
+    def locate(self, query):
+        return self.by_query.get(normalize_query(query))
+
+    def get(self, lat, lon, radius):
+        record = self.by_coords.get((round(lat, 6), round(lon, 6)))
+        covered = record is not None and record.get("complete", False) and radius <= record.get("radius", 0)
+        if not covered and self.fallback is not None:
+            return self.fallback.get(lat, lon, radius)
+        if record is None:
+            return []
+        return [element for element in record["results"] if element["distance_m"] <= radius]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute nearby food recommendations for many locations")
+    parser.add_argument("locations", help="CSV/JSONL with address or lat/lon columns, or a text file with one per line")
+    parser.add_argument("output", help="Output file (.parquet or .jsonl)")
+    parser.add_argument("--store", help="Answer from a local POI store (see ingest_osm.py) instead of Overpass")
+    parser.add_argument("--radius", type=int, default=SEARCH_RADIUS)
+    parser.add_argument("--max-results", type=int,
+                        help="Nearest POIs kept per location (default: every POI within --radius); "
+                             "the app looks up locations with a cut-off list live")
+    parser.add_argument("--choices", type=int, default=NUM_CHOICES)
+    parser.add_argument("--pick-radius", type=int, default=PICK_RADIUS)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--geocode-delay", type=float, default=1.0,
+                        help="Seconds between Nominatim requests (their usage policy asks for 1)")
+    args = parser.parse_args()
+
+    # Errors must reach geocode_all: swallowed, they would come back as None and be
+    # cached as "not found" in the cache file the app shares
+    limiter = RateLimiter(get_shared_geocoder().geocode, min_delay_seconds=args.geocode_delay,
+                          swallow_exceptions=False)
+    geocode_cache = GeocodeCache(geocoder=types.SimpleNamespace(geocode=limiter))
+    backend = PoiStore(args.store) if args.store else OverpassCache()
+
+    start = time.perf_counter()
+    locations = read_locations(args.locations)
+    records, stats = run_batch(locations, backend, geocode_cache, args.radius, args.max_results,
+                                 args.choices, args.pick_radius, args.seed)
+    write_output(records, args.output)
+    elapsed = time.perf_counter() - start
+
+    found = sum(record["status"] == "ok" for record in records)
+    print(f"{len(records)} locations ({found} located) in {elapsed:.2f}s: {len(records) / elapsed:.1f} locations/s")
+    print(f"  geocoding: {stats['geocoded_queries']} distinct queries in {stats['geocode_s']:.2f}s "
+          f"({geocode_cache.stats()['hits']} cache hits, {stats['geocode_errors']} failed)")
+    print(f"  recommendations: {stats['groups']} area fetches in {stats['recommend_s']:.2f}s")
+    print(f"  written to {os.path.abspath(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
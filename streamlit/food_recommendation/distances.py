@@ -0,0 +1,88 @@
+import hashlib
+
+import numpy as np
+from geopy.distance import geodesic
+
+EARTH_RADIUS_M = 6371008.8
+
+
+class PoiArray:
+    # Columnar view of Overpass elements: coordinates are pulled out of the
+    # 'center'/'lat'/'lon' fields once so distances can be computed in bulk.
+    __slots__ = ('elements', 'lat', 'lon', '_digest')
+
+    def __init__(self, elements, lat, lon):
+        self.elements = elements
+        self.lat = lat
+        self.lon = lon
+        self._digest = None
+
+    @classmethod
+    def from_elements(cls, elements):
+        kept, lats, lons = [], [], []
+        for element in elements:
+            if 'center' in element:
+                food_lat, food_lon = element['center']['lat'], element['center']['lon']
+            else:
+                food_lat, food_lon = element.get('lat'), element.get('lon')
+            if food_lat is None or food_lon is None:
+                continue
+            kept.append(element)
+            lats.append(food_lat)
+            lons.append(food_lon)
+        return cls(kept, np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.elements)
+
+    def digest(self):
+        # Identifies the result set, e.g. for keying rendered maps
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(self.lat.tobytes())
+            h.update(self.lon.tobytes())
+            h.update(",".join(f"{e.get('type')}/{e.get('id')}" for e in self.elements).encode())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def tag(self, i, key, default=None):
+        return self.elements[i].get('tags', {}).get(key, default)
+
+    def distances_from(self, lat, lon, method="haversine"):
+        return distances_m(lat, lon, self.lat, self.lon, method)
+
+
+def haversine_m(lat, lon, lats, lons):
+    phi1 = np.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = phi2 - phi1
+    dlmb = np.radians(np.asarray(lons) - lon)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def equirectangular_m(lat, lon, lats, lons):
+    # Fast flat-earth approximation; well under 0.1% error at the few-km scale used here
+    x = np.radians(np.asarray(lons) - lon) * np.cos(np.radians((np.asarray(lats) + lat) / 2))
+    y = np.radians(np.asarray(lats) - lat)
+    return EARTH_RADIUS_M * np.hypot(x, y)
+
+
+def geodesic_m(lat, lon, lats, lons):
+    return np.fromiter((geodesic((lat, lon), (a, b)).m for a, b in zip(lats, lons)),
+                       dtype=np.float64, count=len(lats))
+
+
+DISTANCE_METHODS = {
+    "haversine": haversine_m,
+    "equirectangular": equirectangular_m,
+    "geodesic": geodesic_m,
+}
+
+
+def distances_m(lat, lon, lats, lons, method="haversine"):
+    try:
+        kernel = DISTANCE_METHODS[method]
+    except KeyError:
+        raise ValueError(f"Unknown distance method '{method}'") from None
+    return kernel(lat, lon, lats, lons)
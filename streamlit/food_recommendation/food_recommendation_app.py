@@ -1,12 +1,19 @@
 import streamlit as st
-import requests
-import pandas as pd
-import folium
-from streamlit_folium import folium_static
-from geopy.geocoders import Nominatim
-from geopy.distance import distance
+import streamlit.components.v1 as components
+import numpy as np
 import math
+import os
 import random
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from geocoding import GeocodeCache
+from instrumentation import Metrics, debug_enabled, payload, show_debug_panel, stage
+from overpass import OverpassCache
+from poi_store import PoiStore
+from poi_table import PoiTable
+from spatial_index import SpatialIndex
+from map_render import MapHtmlCache, build_map, map_cache_key
+from batch_recommend import PrecomputedResults
 
 # Custom CSS to make the app more beautiful and modern
 st.markdown("""
@@ -107,70 +114,98 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_metrics():
+    # FOOD_METRICS_JSONL / FOOD_METRICS_PROM export every rerun's timings for dashboards
+    return Metrics("food", os.environ.get("FOOD_METRICS_JSONL"), os.environ.get("FOOD_METRICS_PROM"))
+
+@st.cache_resource
+def get_geocode_cache():
+    # One cache (and one Nominatim instance) shared by every session and rerun
+    return GeocodeCache()
+
+@st.cache_resource
+def get_precomputed():
+    # FOOD_PRECOMPUTED points at batch_recommend.py output for known locations
+    path = os.environ.get("FOOD_PRECOMPUTED")
+    return PrecomputedResults.load(path) if path else None
+
 def get_user_location():
-    geolocator = Nominatim(user_agent="food_recommendation_app")
-    location = geolocator.geocode(st.session_state.location_input)
-    return location.latitude, location.longitude
+    precomputed = get_precomputed()
+    location = precomputed.locate(st.session_state.location_input) if precomputed else None
+    if location is None:
+        location = get_geocode_cache().geocode(st.session_state.location_input)
+    if location is None:
+        raise ValueError(f"Could not find location '{st.session_state.location_input}'")
+    return location
+
+@st.cache_resource
+def get_overpass_cache():
+    return OverpassCache()
+
+@st.cache_resource
+def get_poi_backend():
+    # FOOD_POI_STORE points at a local store built with ingest_osm.py; without it we ask Overpass
+    store_path = os.environ.get("FOOD_POI_STORE")
+    backend = PoiStore(store_path) if store_path else get_overpass_cache()
+    precomputed = get_precomputed()
+    if precomputed:
+        precomputed.fallback = backend
+        return precomputed
+    return backend
 
 def get_nearby_food_options(lat, lon, radius=5000):
-    overpass_url = "http://overpass-api.de/api/interpreter"
-    overpass_query = f"""
-    [out:json];
-    (
-      node["amenity"="restaurant"](around:{radius},{lat},{lon});
-      way["amenity"="restaurant"](around:{radius},{lat},{lon});
-      relation["amenity"="restaurant"](around:{radius},{lat},{lon});
-    );
-    out center;
-    """
-    response = requests.get(overpass_url, params={'data': overpass_query})
-    data = response.json()
-    return data['elements']
-
-def create_map(lat, lon, food_options, view_radius):
-    m = folium.Map(location=[lat, lon], zoom_start=16)
-    folium.Marker([lat, lon], popup="Your Location", icon=folium.Icon(color="red", icon="info-sign")).add_to(m)
-    
-    # Add a circle to represent the view radius
-    folium.Circle(
-        [lat, lon],
-        radius=view_radius,
-        color="blue",
-        fill=True,
-        fillColor="blue",
-        fillOpacity=0.1
-    ).add_to(m)
-    
-    for food_option in food_options:
-        if 'center' in food_option:
-            food_lat, food_lon = food_option['center']['lat'], food_option['center']['lon']
-        else:
-            food_lat, food_lon = food_option['lat'], food_option['lon']
-        
-        dist = distance((lat, lon), (food_lat, food_lon)).m
-        if dist <= view_radius:
-            folium.Marker(
-                [food_lat, food_lon],
-                popup=food_option['tags'].get('name', 'Unknown'),
-                icon=folium.Icon(color="green", icon="cutlery", prefix='fa')
-            ).add_to(m)
-    
-    return m
-
-def get_random_food_choices(lat, lon, food_options, num_choices=10, max_distance=1000):
-    nearby_options = []
-    for food_option in food_options:
-        if 'center' in food_option:
-            food_lat, food_lon = food_option['center']['lat'], food_option['center']['lon']
-        else:
-            food_lat, food_lon = food_option['lat'], food_option['lon']
-        
-        dist = distance((lat, lon), (food_lat, food_lon)).m
-        if dist <= max_distance:
-            nearby_options.append((dist, food_option))
-    
-    nearby_options.sort(key=lambda x: x[0])
-    return random.sample(nearby_options, min(num_choices, len(nearby_options)))
+    return get_poi_backend().get(lat, lon, radius)
+
+@st.cache_resource(max_entries=64, ttl=3600)
+def get_food_poi(lat, lon, radius=5000):
+    # Fetch once and index once per result set; the map, the list and the random
+    # picker of every session are answered from the same compact table and index.
+    poi = PoiTable.from_elements(get_nearby_food_options(lat, lon, radius=radius))
+    return poi, SpatialIndex(poi.lat, poi.lon)
+
+MAP_RENDER_MODE = os.environ.get("FOOD_MAP_RENDER_MODE", "cluster")
+
+@st.cache_resource
+def get_map_html_cache():
+    return MapHtmlCache()
+
+def create_map(lat, lon, poi, index, view_radius, mode=MAP_RENDER_MODE):
+    nearby, _ = index.within(lat, lon, view_radius)
+    return build_map(lat, lon, poi, nearby, view_radius, mode)
+
+def get_map_html(lat, lon, poi, index, view_radius, mode=MAP_RENDER_MODE):
+    # Rendered pages are memoized, so going back to a radius already seen costs nothing
+    key = map_cache_key(lat, lon, view_radius, poi, mode)
+    return get_map_html_cache().get_or_render(key, lambda: create_map(lat, lon, poi, index, view_radius, mode))
+
+def get_random_food_choices(lat, lon, poi, index, num_choices=10, max_distance=1000):
+    nearby, distances = index.within(lat, lon, max_distance)
+    picks = random.sample(range(len(nearby)), min(num_choices, len(nearby)))
+    return nearby[picks].astype(np.int32), distances[picks].astype(np.float32)
+
+def store_food_list(lat, lon, poi, index):
+    # Sessions only keep small index/distance arrays into the shared PoiTable
+    nearby, distances = index.within(lat, lon, 5000)  # 5km max radius, nearest first
+    st.session_state.food_result = (lat, lon)
+    st.session_state.food_digest = poi.digest()
+    st.session_state.food_order = nearby.astype(np.int32)
+    st.session_state.food_distances = distances.astype(np.float32)
+    st.session_state.random_choices = None
+
+def clear_food_list():
+    st.session_state.food_result = None
+    st.session_state.food_order = None
+    st.session_state.food_distances = None
+    st.session_state.random_choices = None
+
+def get_session_food():
+    lat, lon = st.session_state.food_result
+    poi, index = get_food_poi(lat, lon, radius=5000)
+    if poi.digest() != st.session_state.food_digest:
+        # The shared result set was refreshed since this session stored its indices
+        store_food_list(lat, lon, poi, index)
+    return lat, lon, poi, index
 
 def main():
     st.markdown('<p class="big-font">Foodie Finder SG</p>', unsafe_allow_html=True)
@@ -180,14 +215,10 @@ def main():
         st.session_state.location_input = ""
     if 'current_page' not in st.session_state:
         st.session_state.current_page = 1
-    if 'food_option_distances' not in st.session_state:
-        st.session_state.food_option_distances = []
-    if 'map' not in st.session_state:
-        st.session_state.map = None
+    if 'food_result' not in st.session_state:
+        clear_food_list()
     if 'view_radius' not in st.session_state:
         st.session_state.view_radius = 1000
-    if 'random_choices' not in st.session_state:
-        st.session_state.random_choices = []
 
     location_input = st.text_input("Enter your location:", value=st.session_state.location_input, 
                                    help="Enter a city, address, or landmark")
@@ -195,83 +226,74 @@ def main():
 
     if st.button("Find Food Options", key="get_recommendations"):
         try:
-            lat, lon = get_user_location()
-            food_options = get_nearby_food_options(lat, lon, radius=5000)  # 5km radius
+            with stage("geocode"):
+                lat, lon = get_user_location()
+            with stage("poi_fetch"):
+                food_poi, food_index = get_food_poi(lat, lon, radius=5000)  # 5km radius
             
-            if not food_options:
+            if not len(food_poi):
                 st.warning("No food options found within 5km. Try a different location.")
-                st.session_state.map = None
-                st.session_state.food_option_distances = []
+                clear_food_list()
             else:
-                st.session_state.map = create_map(lat, lon, food_options, st.session_state.view_radius)
-
-                # Calculate distances and sort food options
-                st.session_state.food_option_distances = []
-                for food_option in food_options:
-                    if 'center' in food_option:
-                        food_lat, food_lon = food_option['center']['lat'], food_option['center']['lon']
-                    else:
-                        food_lat, food_lon = food_option['lat'], food_option['lon']
-                    
-                    dist = distance((lat, lon), (food_lat, food_lon)).km
-                    if dist <= 5:  # 5km max radius
-                        st.session_state.food_option_distances.append((dist, food_option))
-                
-                st.session_state.food_option_distances.sort(key=lambda x: x[0])
+                with stage("distances"):
+                    store_food_list(lat, lon, food_poi, food_index)
                 st.session_state.current_page = 1
 
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
-            st.session_state.map = None
-            st.session_state.food_option_distances = []
+            clear_food_list()
+
+    # Display the map if there are results
+    if st.session_state.food_result is not None:
+        with stage("poi_fetch"):
+            lat, lon, food_poi, food_index = get_session_food()
 
-    # Display the map if it exists
-    if st.session_state.map:
         st.markdown('<p class="medium-font">Map of Nearby Food Options</p>', unsafe_allow_html=True)
         
         # Add a slider for adjusting the view radius
         st.session_state.view_radius = st.slider("Adjust view radius (meters)", 100, 5000, st.session_state.view_radius, 100)
         
         # Update the map with the new radius
-        lat, lon = get_user_location()
-        food_options = get_nearby_food_options(lat, lon, radius=5000)
-        st.session_state.map = create_map(lat, lon, food_options, st.session_state.view_radius)
-        
-        folium_static(st.session_state.map)
+        with stage("map_render"):
+            map_html = get_map_html(lat, lon, food_poi, food_index, st.session_state.view_radius)
+        components.html(payload("map_html", map_html), width=700, height=500)
 
         # New section for random food choices
         st.markdown('<p class="random-choices-title">10 random food choices within 1km if you can\'t choose!</p>', unsafe_allow_html=True)
         
         if st.button("Generate!", key="generate_random"):
-            st.session_state.random_choices = get_random_food_choices(lat, lon, food_options)
+            with stage("distances"):
+                st.session_state.random_choices = get_random_food_choices(lat, lon, food_poi, food_index)
 
         # Only display the white box if there are random choices
-        if st.session_state.random_choices:
+        if st.session_state.random_choices is not None and len(st.session_state.random_choices[0]):
             st.markdown('<div class="random-choices">', unsafe_allow_html=True)
-            for i, (dist, food_option) in enumerate(st.session_state.random_choices, 1):
-                name = food_option['tags'].get('name', 'Unknown')
+            for i, (idx, dist) in enumerate(zip(*st.session_state.random_choices), 1):
+                name = food_poi.tag(idx, 'name', 'Unknown')
                 st.write(f"{i}. {name} - Distance: {dist:.2f} m")
             st.markdown('</div>', unsafe_allow_html=True)
 
-    if st.session_state.food_option_distances:
         st.markdown('<p class="medium-font">List of Nearby Food Options (within 5km)</p>', unsafe_allow_html=True)
         
         # Pagination
         items_per_page = 15
-        total_pages = math.ceil(len(st.session_state.food_option_distances) / items_per_page)
+        total_pages = math.ceil(len(st.session_state.food_order) / items_per_page)
         
         start_idx = (st.session_state.current_page - 1) * items_per_page
         end_idx = start_idx + items_per_page
         
-        for dist, food_option in st.session_state.food_option_distances[start_idx:end_idx]:
-            name = food_option['tags'].get('name', 'Unknown')
+        page_order = st.session_state.food_order[start_idx:end_idx]
+        page_distances = st.session_state.food_distances[start_idx:end_idx]
+        for idx, dist in zip(page_order, page_distances):
+            name = food_poi.tag(idx, 'name', 'Unknown')
             
-            with st.expander(f"{name} - Distance: {dist:.2f} km"):
-                st.write(f"Cuisine: {food_option['tags'].get('cuisine', 'N/A')}")
-                st.write(f"Address: {food_option['tags'].get('addr:street', 'N/A')} {food_option['tags'].get('addr:housenumber', '')}")
-                st.write(f"Phone: {food_option['tags'].get('phone', 'N/A')}")
-                st.write(f"Website: {food_option['tags'].get('website', 'N/A')}")
-                st.write(f"Opening Hours: {food_option['tags'].get('opening_hours', 'N/A')}")
+            with st.expander(f"{name} - Distance: {dist / 1000:.2f} km"):
+                st.write(f"Type: {food_poi.tag(idx, 'amenity', 'N/A').replace('_', ' ').title()}")
+                st.write(f"Cuisine: {food_poi.tag(idx, 'cuisine', 'N/A')}")
+                st.write(f"Address: {food_poi.tag(idx, 'addr:street', 'N/A')} {food_poi.tag(idx, 'addr:housenumber', '')}")
+                st.write(f"Phone: {food_poi.tag(idx, 'phone', 'N/A')}")
+                st.write(f"Website: {food_poi.tag(idx, 'website', 'N/A')}")
+                st.write(f"Opening Hours: {food_poi.tag(idx, 'opening_hours', 'N/A')}")
 
         # Pagination controls
         col1, col2, col3 = st.columns([1, 2, 1])
@@ -293,10 +315,27 @@ def main():
     <div class="caveats">
         <p class="caveats-title">Note on Data and Limitations</p>
         <div class="caveats-content">
-            <p>Foodie Finder uses OpenStreetMap data, which is community-driven. While we strive for accuracy, the information provided may not always be complete or up-to-date. The app has certain limitations, including a maximum fetch of 100 food options within 5km and "as the crow flies" distance calculations. Please use this tool as a helpful guide rather than a definitive source for food option information.</p>
+            <p>Foodie Finder uses OpenStreetMap data, which is community-driven. While we strive for accuracy, the information provided may not always be complete or up-to-date. The app has certain limitations, including a 5km search radius and "as the crow flies" distance calculations. Please use this tool as a helpful guide rather than a definitive source for food option information.</p>
         </div>
     </div>
     """, unsafe_allow_html=True)
 
+def record_cache_stats(rerun):
+    rerun.cache("geocode", get_geocode_cache().stats())
+    rerun.cache("map_html", get_map_html_cache().stats())
+    backend = get_poi_backend()
+    backend = getattr(backend, "fallback", backend)
+    if isinstance(backend, OverpassCache):
+        rerun.cache("overpass", backend.stats())
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    metrics = get_metrics()
+    rerun = metrics.start()
+    try:
+        main()
+    finally:
+        record_cache_stats(rerun)
+        record = metrics.finish(rerun)
+    # FOOD_DEBUG=1 or ?debug=1 shows this rerun's timings in the sidebar
+    if debug_enabled("FOOD_DEBUG"):
+        show_debug_panel(metrics, record)
\ No newline at end of file
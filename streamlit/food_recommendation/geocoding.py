@@ -0,0 +1,163 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from geopy.geocoders import Nominatim
+
+USER_AGENT = "food_recommendation_app"
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+DEFAULT_CACHE_PATH = os.environ.get(
+    "FOOD_GEOCODE_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".geocode_cache.sqlite3"),
+)
+DEFAULT_TTL = 30 * 24 * 3600  # geocodes rarely change, keep them for 30 days
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_shared_geocoder():
+    global _geocoder
+    with _geocoder_lock:
+        if _geocoder is None:
+            url = urlsplit(NOMINATIM_URL)
+            _geocoder = Nominatim(user_agent=USER_AGENT, domain=url.netloc + url.path.rstrip("/"), scheme=url.scheme)
+        return _geocoder
+
+
+def normalize_query(query):
+    query = re.sub(r"\s+", " ", str(query)).strip().lower()
+    return query.strip(" ,.")
+
+
+class StubGeocoder:
+    # Stands in for Nominatim in tests and benchmarks: answers from a fixed table
+    # and counts how often it was asked.
+
+    class Location:
+        def __init__(self, latitude, longitude, address=""):
+            self.latitude = latitude
+            self.longitude = longitude
+            self.address = address
+
+    def __init__(self, locations):
+        self.locations = {normalize_query(k): v for k, v in locations.items()}
+        self.calls = 0
+
+    def geocode(self, query):
+        self.calls += 1
+        coords = self.locations.get(normalize_query(query))
+        if coords is None:
+            return None
+        return self.Location(coords[0], coords[1], query)
+
+
+class GeocodeCache:
+    def __init__(self, geocoder=None, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_memory_entries=1024):
+        self.geocoder = geocoder
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                " query TEXT PRIMARY KEY, lat REAL, lon REAL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _get_geocoder(self):
+        if self.geocoder is None:
+            self.geocoder = get_shared_geocoder()
+        return self.geocoder
+
+    def _remember(self, key, value, created):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key, now):
+        entry = self._memory.get(key)
+        if entry is not None:
+            if now - entry[1] <= self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+            del self._memory[key]
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT lat, lon, created FROM geocode WHERE query = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[2] <= self.ttl:
+                value = None if row[0] is None else (row[0], row[1])
+                self._remember(key, value, row[2])
+                self.hits += 1
+                self.disk_hits += 1
+                return True, value
+
+        return False, None
+
+    def geocode(self, query):
+        # Returns (lat, lon), or None when the geocoder does not know the place.
+        # Unknown places are cached too so a typo does not hit the network on every rerun.
+        key = normalize_query(query)
+        if not key:
+            return None
+
+        now = time.time()
+        with self._lock:
+            found, value = self._lookup(key, now)
+            if found:
+                return value
+            self.misses += 1
+
+        location = self._get_geocoder().geocode(query)
+        value = None if location is None else (location.latitude, location.longitude)
+
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO geocode (query, lat, lon, created) VALUES (?, ?, ?, ?)",
+                    (key, None if value is None else value[0], None if value is None else value[1], now),
+                )
+                self._db.commit()
+        return value
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (_, created) in self._memory.items() if now - created > self.ttl]:
+                del self._memory[key]
+            if self._db is not None:
+                self._db.execute("DELETE FROM geocode WHERE created < ?", (now - self.ttl,))
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM geocode")
+                self._db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
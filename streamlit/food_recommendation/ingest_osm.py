@@ -0,0 +1,35 @@
+import argparse
+import time
+
+from poi_store import IMPORT_AMENITIES, PoiStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the local POI store from OSM extracts")
+    parser.add_argument("store", help="Path of the SQLite POI store to create or update")
+    parser.add_argument("extracts", nargs="+", help="Overpass JSON dumps (.json) or OSM extracts (.osm, .osm.pbf)")
+    parser.add_argument("--amenity", action="append", dest="amenities",
+                        help=f"Amenity type to import; repeatable (default: {', '.join(IMPORT_AMENITIES)})")
+    parser.add_argument("--force", action="store_true", help="Re-import extracts even if they have not changed")
+    args = parser.parse_args()
+
+    store = PoiStore(args.store)
+    for path in args.extracts:
+        start = time.perf_counter()
+        result = store.import_file(path, amenities=args.amenities or IMPORT_AMENITIES, force=args.force)
+        elapsed = time.perf_counter() - start
+        if result is None:
+            print(f"{path}: unchanged, skipped")
+        else:
+            count, removed = result
+            print(f"{path}: {count} POIs imported, {removed} removed in {elapsed:.2f}s")
+
+    stats = store.stats()
+    print(f"Store now holds {stats['pois']} POIs from {stats['sources']} extracts")
+    for amenity, count in sorted(stats["by_amenity"].items()):
+        print(f"  {amenity}: {count}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
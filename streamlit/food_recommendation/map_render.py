@@ -0,0 +1,109 @@
+import html
+import threading
+from collections import OrderedDict
+
+import folium
+from folium.plugins import FastMarkerCluster
+
+RENDER_MODES = ("cluster", "geojson", "markers")
+MAX_CACHED_MAPS = 128
+
+# Built in the browser from compact [lat, lon, name] rows instead of one
+# serialized folium.Marker per POI
+_CLUSTER_CALLBACK = """
+function (row) {
+    var icon = L.AwesomeMarkers.icon({icon: 'cutlery', prefix: 'fa', markerColor: 'green'});
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+    marker.bindPopup(row[2]);
+    return marker;
+}
+"""
+
+
+def build_map(lat, lon, poi, nearby, view_radius, mode="cluster"):
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown map render mode '{mode}'")
+
+    m = folium.Map(location=[lat, lon], zoom_start=16)
+    folium.Marker([lat, lon], popup="Your Location", icon=folium.Icon(color="red", icon="info-sign")).add_to(m)
+
+    # Add a circle to represent the view radius
+    folium.Circle(
+        [lat, lon],
+        radius=view_radius,
+        color="blue",
+        fill=True,
+        fillColor="blue",
+        fillOpacity=0.1
+    ).add_to(m)
+
+    names = [poi.tag(i, 'name', 'Unknown') for i in nearby]
+    if mode == "cluster":
+        # Both of these paths hand the name to Leaflet as raw HTML, so it is escaped here
+        rows = [[float(poi.lat[i]), float(poi.lon[i]), html.escape(name)] for i, name in zip(nearby, names)]
+        FastMarkerCluster(rows, callback=_CLUSTER_CALLBACK).add_to(m)
+    elif mode == "geojson":
+        features = [{
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [float(poi.lon[i]), float(poi.lat[i])]},
+            "properties": {"name": html.escape(name)},
+        } for i, name in zip(nearby, names)]
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": features},
+            marker=folium.CircleMarker(radius=6, color="green", fill=True, fill_opacity=0.8),
+            popup=folium.GeoJsonPopup(fields=["name"], labels=False),
+        ).add_to(m)
+    else:
+        for i, name in zip(nearby, names):
+            folium.Marker(
+                [poi.lat[i], poi.lon[i]],
+                # folium escapes the raw name itself
+                popup=folium.Popup(name, parse_html=True),
+                icon=folium.Icon(color="green", icon="cutlery", prefix='fa')
+            ).add_to(m)
+
+    return m
+
+
+def render_html(m):
+    return m.get_root().render()
+
+
+def map_cache_key(lat, lon, view_radius, poi, mode):
+    # ~1 m location tiles: the map is centred on the user, so the key must not merge distinct spots
+    return round(lat, 5), round(lon, 5), int(view_radius), poi.digest(), mode
+
+
+class MapHtmlCache:
+    def __init__(self, max_entries=MAX_CACHED_MAPS):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        page = render_html(build())
+        with self._lock:
+            self._entries[key] = page
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return page
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": sum(len(page) for page in self._entries.values()),
+        }
+
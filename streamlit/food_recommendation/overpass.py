@@ -0,0 +1,245 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from distances import EARTH_RADIUS_M, PoiArray, haversine_m
+
+OVERPASS_URL = os.environ.get("OVERPASS_URL", "http://overpass-api.de/api/interpreter")
+REQUEST_TIMEOUT = 60
+# Public Overpass gives each client IP about two query slots; more only queues or gets 429s
+MAX_CONCURRENCY = min(2, int(os.environ.get("OVERPASS_MAX_CONCURRENCY", "2")))
+MAX_RETRIES = 3
+MAX_SPLIT_DEPTH = 3  # a box that hits the server's limits is re-queried as quarters, at most this deep
+
+# Hawker centres are mapped as amenity=food_court in Singapore
+FOOD_AMENITIES = ("restaurant", "cafe", "fast_food", "food_court")
+
+TILE_SIZE_DEG = 0.005  # ~550 m at the equator
+FRESH_TTL = 3600
+MAX_AGE = 24 * 3600
+MAX_ENTRIES = 256
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    # One pooled session shared by every fetch; retries back off exponentially and
+    # honour Retry-After on 429/5xx answers from Overpass.
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=MAX_RETRIES, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=("GET",))
+            adapter = HTTPAdapter(pool_connections=MAX_CONCURRENCY, pool_maxsize=MAX_CONCURRENCY, max_retries=retry)
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def build_query(bbox, amenities=FOOD_AMENITIES):
+    south, west, north, east = bbox
+    selector = f'["amenity"~"^({"|".join(amenities)})$"]'
+    area = f"({south},{west},{north},{east})"
+    return f"""
+    [out:json][timeout:{REQUEST_TIMEOUT}];
+    (
+      node{selector}{area};
+      way{selector}{area};
+      relation{selector}{area};
+    );
+    out center;
+    """
+
+
+def circle_bbox(lat, lon, radius):
+    dlat = math.degrees(radius / EARTH_RADIUS_M)
+    dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+
+def quarter_bbox(bbox):
+    south, west, north, east = bbox
+    mid_lat, mid_lon = (south + north) / 2, (west + east) / 2
+    return [(south, west, mid_lat, mid_lon), (south, mid_lon, mid_lat, east),
+            (mid_lat, west, north, mid_lon), (mid_lat, mid_lon, north, east)]
+
+
+def hit_limits(payload):
+    # Overpass answers 200 with a "runtime error" remark, and whatever it had
+    # collected so far, when a query runs out of time or memory
+    return 'runtime error' in payload.get('remark', '')
+
+
+def query_bbox(bbox, amenities=FOOD_AMENITIES, url=None):
+    response = get_session().get(url or OVERPASS_URL, params={'data': build_query(bbox, amenities)},
+                                 timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_bbox(bbox, amenities=FOOD_AMENITIES, url=None, max_workers=MAX_CONCURRENCY, depth=MAX_SPLIT_DEPTH):
+    # One query for the whole box; only an answer cut short by the server's limits
+    # sends the box again as four quarters, at most max_workers at a time
+    payload = query_bbox(bbox, amenities, url)
+    if not hit_limits(payload):
+        return payload['elements']
+    if depth <= 0:
+        raise RuntimeError(f"Overpass query hit the server's limits: {payload['remark']}")
+    quarters = quarter_bbox(bbox)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, MAX_CONCURRENCY))) as pool:
+        # Quarters of quarters run one after another, so no more than max_workers are in flight
+        batches = list(pool.map(lambda box: fetch_bbox(box, amenities, url, 1, depth - 1), quarters))
+    return merge_elements(batches)
+
+
+def merge_elements(batches):
+    # Ways crossing a split edge come back from both neighbouring queries
+    seen = set()
+    merged = []
+    for batch in batches:
+        for element in batch:
+            key = (element['type'], element['id'])
+            if key not in seen:
+                seen.add(key)
+                merged.append(element)
+    return merged
+
+
+def fetch_elements(lat, lon, radius, amenities=FOOD_AMENITIES, url=None, max_workers=MAX_CONCURRENCY):
+    # One bbox query around the circle, cut back to the circle locally
+    elements = fetch_bbox(circle_bbox(lat, lon, radius), amenities, url, max_workers)
+    return filter_within(elements, lat, lon, radius)
+
+
+def tile_of(lat, lon, tile_size=TILE_SIZE_DEG):
+    return math.floor(lat / tile_size), math.floor(lon / tile_size)
+
+
+def filter_within(elements, lat, lon, radius):
+    poi = PoiArray.from_elements(elements)
+    inside = poi.distances_from(lat, lon) <= radius
+    return [poi.elements[i] for i in inside.nonzero()[0]]
+
+
+class _Entry:
+    __slots__ = ('tile', 'radius', 'center', 'fetch_radius', 'elements', 'fetched_at')
+
+    def __init__(self, tile, radius, center, fetch_radius, elements, fetched_at):
+        self.tile = tile
+        self.radius = radius
+        self.center = center
+        self.fetch_radius = fetch_radius
+        self.elements = elements
+        self.fetched_at = fetched_at
+
+
+class OverpassCache:
+    # Results are fetched around the centre of a quantized tile, with the radius
+    # padded by the tile's half diagonal, so one fetch answers every point in the
+    # tile. Any cached entry whose circle fully contains the requested circle is
+    # reused by filtering its elements locally.
+
+    def __init__(self, fetch=fetch_elements, amenities=FOOD_AMENITIES, tile_size=TILE_SIZE_DEG, fresh_ttl=FRESH_TTL,
+                 max_age=MAX_AGE, max_entries=MAX_ENTRIES, stale_while_revalidate=True):
+        self.fetch = fetch
+        self.amenities = tuple(amenities)
+        self.tile_size = tile_size
+        self.fresh_ttl = fresh_ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.stale_while_revalidate = stale_while_revalidate
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _tile_center(self, tile):
+        return (tile[0] + 0.5) * self.tile_size, (tile[1] + 0.5) * self.tile_size
+
+    def _fetch_entry(self, tile, radius):
+        center_lat, center_lon = self._tile_center(tile)
+        corner_lat, corner_lon = tile[0] * self.tile_size, tile[1] * self.tile_size
+        fetch_radius = radius + math.ceil(float(haversine_m(center_lat, center_lon, corner_lat, corner_lon)))
+        elements = self.fetch(center_lat, center_lon, fetch_radius, amenities=self.amenities)
+        return _Entry(tile, radius, (center_lat, center_lon), fetch_radius, elements, time.time())
+
+    def _store(self, entry):
+        with self._lock:
+            key = (entry.tile, entry.radius)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _find_covering(self, lat, lon, radius, now):
+        best_key, best = None, None
+        for key, entry in list(self._entries.items()):
+            if now - entry.fetched_at > self.max_age:
+                del self._entries[key]
+                continue
+            if float(haversine_m(lat, lon, *entry.center)) + radius > entry.fetch_radius:
+                continue
+            if best is None or entry.fetch_radius < best.fetch_radius:
+                best_key, best = key, entry
+        if best_key is not None:
+            self._entries.move_to_end(best_key)
+        return best
+
+    def _refresh(self, tile, radius):
+        try:
+            self._store(self._fetch_entry(tile, radius))
+        except Exception:
+            # Keep serving the stale entry; the next lookup will try again
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard((tile, radius))
+
+    def get(self, lat, lon, radius):
+        now = time.time()
+        with self._lock:
+            entry = self._find_covering(lat, lon, radius, now)
+            if entry is not None:
+                age = now - entry.fetched_at
+                if age <= self.fresh_ttl:
+                    self.hits += 1
+                elif self.stale_while_revalidate:
+                    self.stale_hits += 1
+                    key = (entry.tile, entry.radius)
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(target=self._refresh, args=key, daemon=True).start()
+                else:
+                    entry = None
+            if entry is None:
+                self.misses += 1
+
+        if entry is None:
+            entry = self._fetch_entry(tile_of(lat, lon, self.tile_size), radius)
+            self._store(entry)
+        return filter_within(entry.elements, lat, lon, radius)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from distances import EARTH_RADIUS_M, PoiArray
+from overpass import FOOD_AMENITIES
+
+IMPORT_AMENITIES = FOOD_AMENITIES + ("bar", "pub", "ice_cream", "bbq")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pois (
+    poi_id INTEGER PRIMARY KEY,
+    osm_type TEXT NOT NULL,
+    osm_id INTEGER NOT NULL,
+    amenity TEXT NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    tags TEXT NOT NULL,
+    source TEXT NOT NULL,
+    UNIQUE (osm_type, osm_id)
+);
+CREATE INDEX IF NOT EXISTS pois_source ON pois (source);
+CREATE VIRTUAL TABLE IF NOT EXISTS pois_rtree USING rtree (poi_id, min_lat, max_lat, min_lon, max_lon);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    imported_at REAL NOT NULL,
+    poi_count INTEGER NOT NULL
+);
+"""
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_overpass_json(path, amenities=IMPORT_AMENITIES):
+    with open(path) as f:
+        data = json.load(f)
+    wanted = set(amenities)
+    for element in data.get("elements", []):
+        if element.get("tags", {}).get("amenity") in wanted:
+            yield element
+
+
+def read_osm_file(path, amenities=IMPORT_AMENITIES):
+    # .osm / .osm.pbf extracts need pyosmium; way centres are the mean of their node locations
+    try:
+        import osmium
+    except ImportError:
+        raise ImportError("Reading .osm/.pbf extracts requires pyosmium (pip install osmium)") from None
+
+    wanted = set(amenities)
+    elements = []
+
+    class Handler(osmium.SimpleHandler):
+        def node(self, n):
+            tags = dict(n.tags)
+            if tags.get("amenity") in wanted and n.location.valid():
+                elements.append({"type": "node", "id": n.id, "lat": n.location.lat,
+                                 "lon": n.location.lon, "tags": tags})
+
+        def way(self, w):
+            tags = dict(w.tags)
+            if tags.get("amenity") not in wanted:
+                return
+            coords = [(nd.lat, nd.lon) for nd in w.nodes if nd.location.valid()]
+            if coords:
+                elements.append({"type": "way", "id": w.id, "tags": tags, "center": {
+                    "lat": sum(c[0] for c in coords) / len(coords),
+                    "lon": sum(c[1] for c in coords) / len(coords),
+                }})
+
+    Handler().apply_file(path, locations=True)
+    return elements
+
+
+def read_extract(path, amenities=IMPORT_AMENITIES):
+    if path.endswith(".json"):
+        return list(read_overpass_json(path, amenities))
+    return read_osm_file(path, amenities)
+
+
+class PoiStore:
+    # Local, offline replacement for the Overpass endpoint: POIs live in SQLite with an
+    # R-tree over their coordinates, and get() answers the same (lat, lon, radius)
+    # query shape as OverpassCache.get().
+
+    def __init__(self, path, amenities=FOOD_AMENITIES):
+        self.path = path
+        self.amenities = tuple(amenities)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def import_elements(self, elements, source):
+        # Upserts every element and drops POIs this source provided before but no longer has
+        rows = []
+        for element in elements:
+            if "center" in element:
+                lat, lon = element["center"]["lat"], element["center"]["lon"]
+            else:
+                lat, lon = element.get("lat"), element.get("lon")
+            tags = element.get("tags", {})
+            if lat is None or lon is None or not tags.get("amenity"):
+                continue
+            rows.append((element["type"], element["id"], tags["amenity"], lat, lon,
+                         json.dumps(tags, sort_keys=True, separators=(",", ":")), source))
+
+        with self._lock, self._db:
+            self._db.execute("CREATE TEMP TABLE IF NOT EXISTS incoming "
+                             "(osm_type TEXT, osm_id INTEGER, PRIMARY KEY (osm_type, osm_id))")
+            self._db.execute("DELETE FROM incoming")
+            self._db.executemany("INSERT OR IGNORE INTO incoming VALUES (?, ?)", [r[:2] for r in rows])
+            stale = ("SELECT poi_id FROM pois p WHERE source = ? AND NOT EXISTS "
+                     "(SELECT 1 FROM incoming i WHERE i.osm_type = p.osm_type AND i.osm_id = p.osm_id)")
+            removed = self._db.execute(f"DELETE FROM pois_rtree WHERE poi_id IN ({stale})", (source,)).rowcount
+            self._db.execute(f"DELETE FROM pois WHERE poi_id IN ({stale})", (source,))
+
+            self._db.executemany(
+                "INSERT INTO pois (osm_type, osm_id, amenity, lat, lon, tags, source) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (osm_type, osm_id) DO UPDATE SET amenity = excluded.amenity, lat = excluded.lat, "
+                "lon = excluded.lon, tags = excluded.tags, source = excluded.source "
+                "WHERE (pois.amenity, pois.lat, pois.lon, pois.tags, pois.source) IS NOT "
+                "(excluded.amenity, excluded.lat, excluded.lon, excluded.tags, excluded.source)",
+                rows,
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO pois_rtree (poi_id, min_lat, max_lat, min_lon, max_lon) "
+                "SELECT p.poi_id, p.lat, p.lat, p.lon, p.lon FROM pois p "
+                "JOIN incoming i ON p.osm_type = i.osm_type AND p.osm_id = i.osm_id"
+            )
+        return len(rows), removed
+
+    def import_file(self, path, amenities=IMPORT_AMENITIES, force=False):
+        # Re-importing an unchanged extract is a no-op; a changed one is applied as a diff
+        source = os.path.abspath(path)
+        digest = file_digest(path)
+        row = self._db.execute("SELECT digest FROM sources WHERE path = ?", (source,)).fetchone()
+        if row is not None and row[0] == digest and not force:
+            return None
+
+        count, removed = self.import_elements(read_extract(path, amenities), source)
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                             (source, digest, time.time(), count))
+        return count, removed
+
+    def query(self, lat, lon, radius, amenities=None):
+        amenities = tuple(amenities or self.amenities)
+        dlat = math.degrees(radius / EARTH_RADIUS_M)
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        placeholders = ",".join("?" * len(amenities))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT p.osm_type, p.osm_id, p.lat, p.lon, p.tags FROM pois_rtree r "
+                "JOIN pois p ON p.poi_id = r.poi_id "
+                "WHERE r.min_lat <= ? AND r.max_lat >= ? AND r.min_lon <= ? AND r.max_lon >= ? "
+                f"AND p.amenity IN ({placeholders})",
+                (lat + dlat, lat - dlat, lon + dlon, lon - dlon, *amenities),
+            ).fetchall()
+
+        elements = []
+        for osm_type, osm_id, poi_lat, poi_lon, tags in rows:
+            element = {"type": osm_type, "id": osm_id, "tags": json.loads(tags)}
+            if osm_type == "node":
+                element["lat"], element["lon"] = poi_lat, poi_lon
+            else:
+                element["center"] = {"lat": poi_lat, "lon": poi_lon}
+            elements.append(element)
+
+        poi = PoiArray.from_elements(elements)
+        inside = poi.distances_from(lat, lon) <= radius
+        return [poi.elements[i] for i in inside.nonzero()[0]]
+
+    def get(self, lat, lon, radius):
+        return self.query(lat, lon, radius)
+
+    def stats(self):
+        with self._lock:
+            by_amenity = dict(self._db.execute("SELECT amenity, COUNT(*) FROM pois GROUP BY amenity").fetchall())
+            sources = self._db.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+        return {"pois": sum(by_amenity.values()), "by_amenity": by_amenity, "sources": sources}
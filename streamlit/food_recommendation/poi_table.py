@@ -0,0 +1,106 @@
+import sys
+
+import numpy as np
+
+from distances import PoiArray, distances_m
+
+# The only tags the app ever shows; everything else in the Overpass answer is dropped
+DISPLAY_TAGS = ('name', 'amenity', 'cuisine', 'addr:street', 'addr:housenumber', 'phone', 'website', 'opening_hours')
+OSM_TYPES = ('node', 'way', 'relation')
+
+
+class PoiTable:
+    # Struct-of-arrays POI table shared by every session that looks at the same result
+    # set. Tag values are stored as int32 codes into one interned vocabulary, so
+    # repeated strings ("restaurant", "chinese", street names) exist once.
+    __slots__ = ('osm_type', 'osm_id', 'lat', 'lon', 'tag_codes', 'vocab', '_digest')
+
+    def __init__(self, osm_type, osm_id, lat, lon, tag_codes, vocab, digest):
+        self.osm_type = osm_type
+        self.osm_id = osm_id
+        self.lat = lat
+        self.lon = lon
+        self.tag_codes = tag_codes
+        self.vocab = vocab
+        self._digest = digest
+
+    @classmethod
+    def from_elements(cls, elements):
+        poi = PoiArray.from_elements(elements)
+        vocab = [None]
+        codes_of = {}
+        tag_codes = {key: np.zeros(len(poi), dtype=np.int32) for key in DISPLAY_TAGS}
+        for i, element in enumerate(poi.elements):
+            tags = element.get('tags', {})
+            for key in DISPLAY_TAGS:
+                value = tags.get(key)
+                if value is None:
+                    continue
+                code = codes_of.get(value)
+                if code is None:
+                    code = codes_of[value] = len(vocab)
+                    vocab.append(sys.intern(value))
+                tag_codes[key][i] = code
+        osm_type = np.array([OSM_TYPES.index(e.get('type', 'node')) for e in poi.elements], dtype=np.int8)
+        osm_id = np.array([e.get('id', 0) for e in poi.elements], dtype=np.int64)
+        return cls(osm_type, osm_id, poi.lat, poi.lon, tag_codes, vocab, poi.digest())
+
+    def __len__(self):
+        return len(self.lat)
+
+    def digest(self):
+        return self._digest
+
+    def distances_from(self, lat, lon, method="haversine"):
+        return distances_m(lat, lon, self.lat, self.lon, method)
+
+    def tag(self, i, key, default=None):
+        value = self.vocab[self.tag_codes[key][i]]
+        return default if value is None else value
+
+    def tags(self, i):
+        return {key: self.vocab[codes[i]] for key, codes in self.tag_codes.items() if codes[i]}
+
+    def nbytes(self):
+        arrays = [self.osm_type, self.osm_id, self.lat, self.lon, *self.tag_codes.values()]
+        return sum(a.nbytes for a in arrays) + deep_sizeof(self.vocab)
+
+
+def deep_sizeof(obj, seen=None):
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + sys.getsizeof(obj) - (obj.nbytes if obj.flags.owndata else 0)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def session_memory_report(elements, lat, lon, max_distance=5000, num_choices=10):
+    # Bytes one session holds for the food list and random picks: the old layout of
+    # (distance, raw Overpass dict) tuples against index/distance arrays into a shared PoiTable.
+    table = PoiTable.from_elements(elements)
+    dist = table.distances_from(lat, lon)
+    order = np.argsort(dist, kind="stable")
+    order = order[dist[order] <= max_distance]
+
+    raw = PoiArray.from_elements(elements)
+    legacy = [(float(dist[i]) / 1000, raw.elements[i]) for i in order]
+    legacy_choices = legacy[:num_choices]
+    legacy_bytes = deep_sizeof([legacy, legacy_choices])
+
+    compact = [order.astype(np.int32), dist[order].astype(np.float32),
+               order[:num_choices].astype(np.int32), dist[order[:num_choices]].astype(np.float32)]
+    compact_bytes = deep_sizeof(compact)
+    return {
+        "pois": len(table),
+        "legacy_session_bytes": legacy_bytes,
+        "compact_session_bytes": compact_bytes,
+        "shared_table_bytes": table.nbytes(),
+        "reduction": legacy_bytes / compact_bytes if compact_bytes else 0.0,
+    }
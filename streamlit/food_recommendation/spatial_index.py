@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+
+from distances import EARTH_RADIUS_M, haversine_m
+
+DEFAULT_CELL_SIZE_M = 250.0
+
+
+class SpatialIndex:
+    # Uniform grid over a local equirectangular projection. Points are sorted by
+    # cell key, so each row of cells touched by a query is one contiguous slice
+    # found with two searchsorted calls; only the points in those slices get an
+    # exact haversine check.
+
+    def __init__(self, lats, lons, cell_size=DEFAULT_CELL_SIZE_M):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_size = float(cell_size)
+        self.ref_lat = float(self.lats.mean()) if len(self.lats) else 0.0
+        self.ref_lon = float(self.lons.mean()) if len(self.lons) else 0.0
+        self._cos_ref = math.cos(math.radians(self.ref_lat))
+
+        cx, cy = self._cells(*self._project(self.lats, self.lons))
+        self._cx_min = int(cx.min()) if len(cx) else 0
+        self._cy_min = int(cy.min()) if len(cy) else 0
+        self._width = int(cy.max()) - self._cy_min + 1 if len(cy) else 1
+        self._rows = int(cx.max()) - self._cx_min + 1 if len(cx) else 0
+        keys = self._key(cx, cy)
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _project(self, lats, lons):
+        x = np.radians(np.asarray(lons) - self.ref_lon) * self._cos_ref * EARTH_RADIUS_M
+        y = np.radians(np.asarray(lats) - self.ref_lat) * EARTH_RADIUS_M
+        return x, y
+
+    def _cells(self, x, y):
+        return np.floor(x / self.cell_size).astype(np.int64), np.floor(y / self.cell_size).astype(np.int64)
+
+    def _key(self, cx, cy):
+        return (cx - self._cx_min) * self._width + (cy - self._cy_min)
+
+    def _candidates(self, lat, lon, radius):
+        if not self._rows:
+            return np.empty(0, dtype=np.int64)
+        x, y = self._project(lat, lon)
+        # Projection error grows away from the reference latitude; pad the box a little
+        pad = radius * 1.01 + 1.0
+        cx0, cy0 = self._cells(np.array([x - pad]), np.array([y - pad]))
+        cx1, cy1 = self._cells(np.array([x + pad]), np.array([y + pad]))
+        cx0 = max(int(cx0[0]), self._cx_min)
+        cx1 = min(int(cx1[0]), self._cx_min + self._rows - 1)
+        cy0 = max(int(cy0[0]), self._cy_min)
+        cy1 = min(int(cy1[0]), self._cy_min + self._width - 1)
+        if cx0 > cx1 or cy0 > cy1:
+            return np.empty(0, dtype=np.int64)
+
+        rows = np.arange(cx0, cx1 + 1)
+        starts = np.searchsorted(self._keys, self._key(rows, cy0), side="left")
+        ends = np.searchsorted(self._keys, self._key(rows, cy1), side="right")
+        slices = [self._order[s:e] for s, e in zip(starts, ends) if e > s]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices)
+
+    def annulus(self, lat, lon, inner_radius, outer_radius):
+        # Indices of points with inner_radius <= distance <= outer_radius, nearest first,
+        # together with their distances in metres.
+        candidates = self._candidates(lat, lon, outer_radius)
+        dist = haversine_m(lat, lon, self.lats[candidates], self.lons[candidates])
+        keep = (dist >= inner_radius) & (dist <= outer_radius)
+        candidates, dist = candidates[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")
+        return candidates[order], dist[order]
+
+    def within(self, lat, lon, radius):
+        return self.annulus(lat, lon, 0.0, radius)
+
+    def nearest(self, lat, lon, k):
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        # Grow the search radius until it holds k points; everything closer than the
+        # k-th point is then guaranteed to be inside it.
+        radius = self.cell_size
+        while True:
+            idx, dist = self.within(lat, lon, radius)
+            if len(idx) >= k or len(idx) == len(self):
+                return idx[:k], dist[:k]
+            radius *= 2
+            if radius > 2 * math.pi * EARTH_RADIUS_M:
+                return idx[:k], dist[:k]
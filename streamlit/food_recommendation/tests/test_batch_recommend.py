@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from geopy.exc import GeocoderTimedOut
+
+from batch_recommend import PrecomputedResults, read_locations, run_batch
+from geocoding import GeocodeCache, StubGeocoder
+
+
+class FlakyGeocoder(StubGeocoder):
+    def geocode(self, query):
+        if query == "timeout street":
+            self.calls += 1
+            raise GeocoderTimedOut("timed out")
+        return super().geocode(query)
+
+
+class ListBackend:
+    def __init__(self, elements):
+        self.elements = elements
+        self.calls = 0
+
+    def get(self, lat, lon, radius):
+        self.calls += 1
+        return self.elements
+
+
+def elements(n, lat=51.5, lon=-0.1, step=0.0001):
+    # POIs strung out northwards, ~11 m apart
+    return [{"type": "node", "id": i, "lat": lat + i * step, "lon": lon, "tags": {"amenity": "cafe", "name": f"c{i}"}}
+            for i in range(n)]
+
+
+def test_geocode_errors_are_not_cached():
+    geocoder = FlakyGeocoder({"high street": (51.5, -0.1)})
+    cache = GeocodeCache(geocoder=geocoder, path=None)
+    locations = [{"id": 0, "query": "High Street", "lat": None, "lon": None},
+                 {"id": 1, "query": "timeout street", "lat": None, "lon": None}]
+    records, stats = run_batch(locations, ListBackend(elements(3)), cache, seed=0)
+
+    assert [record["status"] for record in records] == ["ok", "geocode_error"]
+    assert stats["geocode_errors"] == 1
+    with pytest.raises(GeocoderTimedOut):
+        cache.geocode("timeout street")
+    assert geocoder.calls == 3
+
+
+def test_precomputed_keeps_every_poi_within_radius():
+    backend = ListBackend(elements(400))
+    locations = [{"id": 0, "query": None, "lat": 51.5, "lon": -0.1}]
+    records, _ = run_batch(locations, backend, GeocodeCache(path=None), radius=5000, seed=0)
+    assert records[0]["complete"] and len(records[0]["results"]) == 400
+
+    precomputed = PrecomputedResults(records, fallback=backend)
+    calls = backend.calls
+    near = precomputed.get(51.5, -0.1, 1000)
+    assert backend.calls == calls
+    assert len(near) == np.count_nonzero(np.arange(400) * 0.0001 * 111195 <= 1000)
+    # Past the batch's radius the live backend answers
+    precomputed.get(51.5, -0.1, 6000)
+    assert backend.calls == calls + 1
+
+
+def test_truncated_results_fall_back_to_live_query():
+    backend = ListBackend(elements(400))
+    locations = [{"id": 0, "query": None, "lat": 51.5, "lon": -0.1}]
+    records, _ = run_batch(locations, backend, GeocodeCache(path=None), max_results=50, seed=0)
+    assert not records[0]["complete"] and len(records[0]["results"]) == 50
+
+    precomputed = PrecomputedResults(records, fallback=backend)
+    assert len(precomputed.get(51.5, -0.1, 5000)) == 400
+
+
+def test_bad_coordinates_fail_only_their_own_row(tmp_path):
+    path = tmp_path / "locations.csv"
+    path.write_text("id,address,lat,lon\n"
+                    "good,,51.5,-0.1\n"
+                    "no_lon,,51.5,\n"
+                    "no_lat,,,-0.1\n"
+                    "typo,,51.5x,-0.1\n"
+                    "off_the_map,,95,-0.1\n"
+                    "geocoded,High Street,51.5,\n"
+                    "nothing,,,\n")
+    cache = GeocodeCache(geocoder=StubGeocoder({"high street": (51.5, -0.1)}), path=None)
+    records, stats = run_batch(read_locations(str(path)), ListBackend(elements(3)), cache, seed=0)
+
+    assert {record["id"]: record["status"] for record in records} == {
+        "good": "ok", "no_lon": "invalid_coordinates", "no_lat": "invalid_coordinates",
+        "typo": "invalid_coordinates", "off_the_map": "invalid_coordinates",
+        # An address fills in a half-given pair
+        "geocoded": "ok", "nothing": "not_found",
+    }
+    assert records[0]["results"] == records[5]["results"] != []
+    assert stats["groups"] == 1
@@ -0,0 +1,57 @@
+import time
+
+from geocoding import GeocodeCache, StubGeocoder
+
+PLACES = {"Marina Bay Sands": (1.2834, 103.8607)}
+
+
+def test_hits_and_misses():
+    geocoder = StubGeocoder(PLACES)
+    cache = GeocodeCache(geocoder=geocoder, path=None)
+
+    assert cache.geocode("Marina Bay Sands") == PLACES["Marina Bay Sands"]
+    # Normalized queries share one entry
+    assert cache.geocode("  marina bay sands, ") == PLACES["Marina Bay Sands"]
+    assert geocoder.calls == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_unknown_places_are_cached():
+    geocoder = StubGeocoder(PLACES)
+    cache = GeocodeCache(geocoder=geocoder, path=None)
+    assert cache.geocode("Nowhere At All") is None
+    assert cache.geocode("nowhere at all") is None
+    assert geocoder.calls == 1
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    path = str(tmp_path / "geocode.sqlite3")
+    GeocodeCache(geocoder=StubGeocoder(PLACES), path=path).geocode("Marina Bay Sands")
+
+    geocoder = StubGeocoder(PLACES)
+    cache = GeocodeCache(geocoder=geocoder, path=path)
+    assert cache.geocode("Marina Bay Sands") == PLACES["Marina Bay Sands"]
+    assert geocoder.calls == 0
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_expired_entries_are_fetched_again(tmp_path, monkeypatch):
+    geocoder = StubGeocoder(PLACES)
+    cache = GeocodeCache(geocoder=geocoder, path=str(tmp_path / "geocode.sqlite3"), ttl=60)
+    cache.geocode("Marina Bay Sands")
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.geocode("Marina Bay Sands") == PLACES["Marina Bay Sands"]
+    assert geocoder.calls == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_memory_tier_is_bounded():
+    geocoder = StubGeocoder(PLACES)
+    cache = GeocodeCache(geocoder=geocoder, path=None, max_memory_entries=2)
+    for query in ("a", "b", "c", "Marina Bay Sands"):
+        cache.geocode(query)
+    assert cache.stats()["memory_entries"] == 2
+    cache.geocode("a")
+    assert geocoder.calls == 5
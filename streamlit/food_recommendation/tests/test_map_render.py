@@ -0,0 +1,20 @@
+import pytest
+
+from map_render import build_map, render_html
+from poi_table import PoiTable
+
+
+def poi_named(name):
+    return PoiTable.from_elements([{"type": "node", "id": 1, "lat": 51.5, "lon": -0.1,
+                                    "tags": {"amenity": "cafe", "name": name}}])
+
+
+@pytest.mark.parametrize("mode", ["cluster", "geojson", "markers"])
+def test_names_are_escaped_exactly_once(mode):
+    page = render_html(build_map(51.5, -0.1, poi_named("A&B <b>"), [0], 500, mode))
+    # The cluster rows and GeoJSON are embedded as JSON, which escapes & < > again
+    page = page.replace("\\u0026", "&").replace("\\u003c", "<").replace("\\u003e", ">")
+
+    assert "A&amp;B &lt;b&gt;" in page
+    assert "A&B" not in page
+    assert "&amp;amp;" not in page
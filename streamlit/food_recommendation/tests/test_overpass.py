@@ -0,0 +1,115 @@
+import threading
+import time
+
+import overpass
+from overpass import OverpassCache, circle_bbox, fetch_elements
+
+
+class FakeOverpass:
+    # Answers bbox queries from a fixed grid of POIs; boxes wider than max_span
+    # degrees come back with Overpass's out-of-memory remark
+
+    def __init__(self, max_span=None):
+        self.max_span = max_span
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self.elements = [{"type": "node", "id": i * 100 + j, "lat": 51.45 + i * 0.001, "lon": -0.15 + j * 0.001}
+                         for i in range(100) for j in range(100)]
+
+    def __call__(self, bbox, amenities=None, url=None):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        time.sleep(0.01)
+        south, west, north, east = bbox
+        with self._lock:
+            self.in_flight -= 1
+        if self.max_span is not None and north - south > self.max_span:
+            return {"elements": self.elements[:10], "remark": "runtime error: Query run out of memory using about 2048 MB of RAM."}
+        return {"elements": [e for e in self.elements if south <= e["lat"] <= north and west <= e["lon"] <= east]}
+
+
+def fetch_with(fake, monkeypatch):
+    monkeypatch.setattr(overpass, "query_bbox", fake)
+    return fetch_elements(51.5, -0.1, 5000)
+
+
+def test_one_query_per_search(monkeypatch):
+    fake = FakeOverpass()
+    elements = fetch_with(fake, monkeypatch)
+    assert fake.calls == 1
+    assert elements
+
+
+def test_splits_only_when_the_server_hits_its_limits(monkeypatch):
+    expected = fetch_with(FakeOverpass(), monkeypatch)
+    fake = FakeOverpass(max_span=0.03)
+    elements = fetch_with(fake, monkeypatch)
+    # 0.09 degrees tall: the whole box and its quarters hit the limit, the 16ths don't
+    assert fake.calls == 1 + 4 + 16
+    assert fake.peak_in_flight <= 2
+    assert sorted(e["id"] for e in elements) == sorted(e["id"] for e in expected)
+
+
+def test_circle_bbox_contains_circle():
+    south, west, north, east = circle_bbox(51.5, -0.1, 1000)
+    assert south < 51.5 - 0.0089 < 51.5 + 0.0089 < north
+    assert west < -0.1 - 0.0144 and -0.1 + 0.0144 < east
+
+
+class CountingFetch:
+    def __init__(self):
+        self.grid = FakeOverpass().elements
+        self.calls = []
+
+    def __call__(self, lat, lon, radius, amenities=None):
+        self.calls.append(radius)
+        return overpass.filter_within(self.grid, lat, lon, radius)
+
+
+def test_cache_reuses_a_larger_radius_for_a_smaller_query():
+    fetch = CountingFetch()
+    cache = OverpassCache(fetch=fetch)
+    wide = cache.get(51.5, -0.1, 3000)
+    narrow = cache.get(51.5, -0.1, 1000)
+    # A nearby point whose circle lies inside the fetched one too
+    cache.get(51.505, -0.1, 1000)
+
+    assert len(fetch.calls) == 1
+    assert cache.stats()["hits"] == 2
+    assert {e["id"] for e in narrow} < {e["id"] for e in wide}
+    assert {e["id"] for e in narrow} == {e["id"] for e in overpass.filter_within(fetch.grid, 51.5, -0.1, 1000)}
+
+
+def test_cache_fetches_again_for_a_larger_radius():
+    fetch = CountingFetch()
+    cache = OverpassCache(fetch=fetch)
+    cache.get(51.5, -0.1, 1000)
+    cache.get(51.5, -0.1, 3000)
+    assert len(fetch.calls) == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_cache_evicts_least_recently_used():
+    fetch = CountingFetch()
+    cache = OverpassCache(fetch=fetch, max_entries=2)
+    for lat in (51.46, 51.48, 51.50):
+        cache.get(lat, -0.1, 500)
+    assert cache.stats()["entries"] == 2
+    cache.get(51.48, -0.1, 500)
+    assert len(fetch.calls) == 3
+    cache.get(51.46, -0.1, 500)
+    assert len(fetch.calls) == 4
+
+
+def test_cache_drops_entries_past_max_age(monkeypatch):
+    fetch = CountingFetch()
+    cache = OverpassCache(fetch=fetch, max_age=60)
+    cache.get(51.5, -0.1, 500)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    cache.get(51.5, -0.1, 500)
+    assert len(fetch.calls) == 2
@@ -0,0 +1,113 @@
+import json
+import sys
+
+import numpy as np
+
+import ingest_osm
+from distances import haversine_m
+from poi_store import PoiStore
+
+
+def node(i, lat, lon, amenity="cafe", **tags):
+    return {"type": "node", "id": i, "lat": lat, "lon": lon, "tags": {"amenity": amenity, "name": f"n{i}", **tags}}
+
+
+def grid(n=20, lat=51.5, lon=-0.1, step=0.001):
+    # n x n POIs ~110 m apart north-south, ~70 m east-west
+    return [node(r * n + c, lat + r * step, lon + c * step) for r in range(n) for c in range(n)]
+
+
+def write_extract(path, elements):
+    path.write_text(json.dumps({"elements": elements}))
+    return str(path)
+
+
+def ids(elements):
+    return sorted(e["id"] for e in elements)
+
+
+def test_import_then_unchanged_reimport_is_skipped(tmp_path):
+    store = PoiStore(str(tmp_path / "pois.sqlite"))
+    extract = write_extract(tmp_path / "london.json", grid(5) + [node(99, 51.5, -0.1, amenity="bench")])
+
+    assert store.import_file(extract) == (25, 0)
+    assert store.import_file(extract) is None
+    assert store.stats() == {"pois": 25, "by_amenity": {"cafe": 25}, "sources": 1}
+    store.close()
+
+
+def test_changed_extract_is_applied_as_a_diff(tmp_path):
+    store = PoiStore(str(tmp_path / "pois.sqlite"))
+    extract = tmp_path / "london.json"
+    before = grid(5)
+    store.import_file(write_extract(extract, before))
+
+    # Drop two POIs, move one, rename another and add a new one
+    after = [e for e in before if e["id"] not in (3, 4)]
+    after[0] = node(0, 51.6, -0.2)
+    after[1] = node(1, before[1]["lat"], before[1]["lon"], cuisine="thai")
+    after.append(node(500, 51.5002, -0.1002, amenity="restaurant"))
+    assert store.import_file(write_extract(extract, after)) == (24, 2)
+
+    everything = store.query(51.55, -0.15, 20000.0)
+    assert ids(everything) == ids(after)
+    by_id = {e["id"]: e for e in everything}
+    assert (by_id[0]["lat"], by_id[0]["lon"]) == (51.6, -0.2)
+    assert by_id[1]["tags"]["cuisine"] == "thai"
+    # The moved POI's R-tree entry moved with it
+    assert ids(store.query(51.5, -0.1, 50.0)) == [500]
+    store.close()
+
+
+def test_other_sources_survive_a_reimport(tmp_path):
+    store = PoiStore(str(tmp_path / "pois.sqlite"))
+    store.import_elements(grid(3), "a")
+    store.import_elements([node(1000, 51.5, -0.1001)], "b")
+    store.import_elements([], "a")
+
+    assert ids(store.query(51.5, -0.1, 1000.0)) == [1000]
+    store.close()
+
+
+def test_radius_query_matches_brute_force(tmp_path):
+    store = PoiStore(str(tmp_path / "pois.sqlite"))
+    elements = grid(20)
+    elements.append({"type": "way", "id": 7, "center": {"lat": 51.5052, "lon": -0.0953},
+                     "tags": {"amenity": "fast_food"}})
+    store.import_elements(elements, "grid")
+
+    lats = np.array([e.get("lat", e.get("center", {}).get("lat")) for e in elements])
+    lons = np.array([e.get("lon", e.get("center", {}).get("lon")) for e in elements])
+    for radius in (0.0, 100.0, 555.0, 1500.0):
+        dist = haversine_m(51.505, -0.095, lats, lons)
+        expected = sorted(elements[i]["id"] for i in np.flatnonzero(dist <= radius))
+        got = store.query(51.505, -0.095, radius)
+
+        assert sorted(e["id"] for e in got) == expected
+    # Ways come back with a centre, like Overpass returns them
+    way = [e for e in store.query(51.5052, -0.0953, 5.0) if e["type"] == "way"]
+    assert way == [{"type": "way", "id": 7, "tags": {"amenity": "fast_food"},
+                    "center": {"lat": 51.5052, "lon": -0.0953}}]
+    store.close()
+
+
+def test_query_filters_by_amenity(tmp_path):
+    store = PoiStore(str(tmp_path / "pois.sqlite"))
+    store.import_elements([node(1, 51.5, -0.1), node(2, 51.5, -0.1, amenity="pub")], "a")
+
+    assert ids(store.get(51.5, -0.1, 10.0)) == [1]
+    assert ids(store.query(51.5, -0.1, 10.0, amenities=["pub"])) == [2]
+    store.close()
+
+
+def test_ingest_osm_cli(tmp_path, monkeypatch, capsys):
+    db = str(tmp_path / "pois.sqlite")
+    extract = write_extract(tmp_path / "london.json", grid(2) + [node(9, 51.5, -0.1, amenity="pub")])
+    monkeypatch.setattr(sys, "argv", ["ingest_osm", db, extract])
+    ingest_osm.main()
+    ingest_osm.main()
+
+    out = capsys.readouterr().out
+    assert "5 POIs imported, 0 removed" in out
+    assert f"{extract}: unchanged, skipped" in out
+    assert "Store now holds 5 POIs from 1 extracts" in out
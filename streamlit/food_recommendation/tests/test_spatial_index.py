@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from distances import haversine_m
+from spatial_index import SpatialIndex
+
+
+@pytest.fixture(scope="module")
+def points():
+    # ~10 km square around central London, plus a few stacked on one spot
+    rng = np.random.default_rng(0)
+    lats = np.concatenate([51.5 + rng.uniform(-0.045, 0.045, 2000), [51.51] * 3])
+    lons = np.concatenate([-0.1 + rng.uniform(-0.07, 0.07, 2000), [-0.11] * 3])
+    return lats, lons
+
+
+def brute_force(lats, lons, lat, lon, inner, outer):
+    dist = haversine_m(lat, lon, lats, lons)
+    idx = np.flatnonzero((dist >= inner) & (dist <= outer))
+    return set(idx.tolist()), dist
+
+
+@pytest.mark.parametrize("cell_size", [50.0, 250.0, 2000.0])
+@pytest.mark.parametrize("radius", [0.0, 30.0, 400.0, 3000.0, 20000.0])
+def test_within_matches_brute_force(points, cell_size, radius):
+    lats, lons = points
+    index = SpatialIndex(lats, lons, cell_size=cell_size)
+    for lat, lon in [(51.5, -0.1), (51.51, -0.11), (51.55, -0.03), (51.6, -0.1)]:
+        idx, dist = index.within(lat, lon, radius)
+        expected, all_dist = brute_force(lats, lons, lat, lon, 0.0, radius)
+
+        assert set(idx.tolist()) == expected
+        assert np.all(np.diff(dist) >= 0)
+        np.testing.assert_allclose(dist, all_dist[idx])
+
+
+def test_points_exactly_on_the_radius_are_kept(points):
+    lats, lons = points
+    index = SpatialIndex(lats, lons, cell_size=100.0)
+    dist = haversine_m(51.5, -0.1, lats, lons)
+    # Each radius puts one point, in whatever cell it falls, exactly on the boundary
+    for target in np.argsort(dist)[::97]:
+        idx, _ = index.within(51.5, -0.1, dist[target])
+
+        assert target in idx
+        assert set(idx.tolist()) == set(np.flatnonzero(dist <= dist[target]).tolist())
+
+
+def test_annulus_matches_brute_force(points):
+    lats, lons = points
+    index = SpatialIndex(lats, lons, cell_size=250.0)
+    dist = haversine_m(51.5, -0.1, lats, lons)
+    inner, outer = np.sort(dist)[[300, 900]]
+    idx, got = index.annulus(51.5, -0.1, inner, outer)
+    expected, _ = brute_force(lats, lons, 51.5, -0.1, inner, outer)
+
+    assert set(idx.tolist()) == expected
+    assert got[0] == inner and got[-1] == outer
+
+
+@pytest.mark.parametrize("k", [1, 5, 250])
+def test_nearest_matches_brute_force(points, k):
+    lats, lons = points
+    index = SpatialIndex(lats, lons, cell_size=250.0)
+    for lat, lon in [(51.5, -0.1), (51.7, 0.2)]:
+        idx, dist = index.nearest(lat, lon, k)
+        expected = np.sort(haversine_m(lat, lon, lats, lons))[:k]
+
+        assert len(idx) == k
+        np.testing.assert_allclose(dist, expected)
+
+
+def test_nearest_with_k_past_the_point_count_returns_every_point(points):
+    lats, lons = points
+    index = SpatialIndex(lats[:7], lons[:7])
+    idx, dist = index.nearest(51.5, -0.1, 50)
+
+    assert sorted(idx.tolist()) == list(range(7))
+    np.testing.assert_allclose(dist, np.sort(haversine_m(51.5, -0.1, lats[:7], lons[:7])))
+
+
+def test_empty_index():
+    index = SpatialIndex([], [])
+
+    assert len(index.within(51.5, -0.1, 1000.0)[0]) == 0
+    assert len(index.nearest(51.5, -0.1, 3)[0]) == 0
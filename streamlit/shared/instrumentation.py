@@ -0,0 +1,238 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# The rerun being measured by the current script thread; Streamlit runs each
+# session's script in its own thread
+_current = threading.local()
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _array_bytes(values):
+    if values is None:
+        return 0
+    nbytes = getattr(values, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes)
+    # Plotly keeps plain sequences as tuples; count them as 8 bytes per value
+    return 8 * len(values) if hasattr(values, '__len__') and not isinstance(values, str) else 0
+
+
+def payload_size(obj):
+    # Cheap size estimate of what is sent to the browser: exact for text, data bytes
+    # for frames and plotly traces (no serialization)
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    if hasattr(obj, 'memory_usage'):
+        return int(obj.memory_usage(index=True).sum())
+    if hasattr(obj, 'data') and hasattr(obj, 'layout'):
+        return sum(_array_bytes(trace[attr]) for trace in obj.data for attr in ('x', 'y', 'z')
+                   if attr in trace)
+    return len(obj) if hasattr(obj, '__len__') else 0
+
+
+class Rerun:
+    # Stage timings and payload sizes of one script run
+
+    def __init__(self, app):
+        self.app = app
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.payloads = {}
+        self.caches = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def payload(self, name, obj):
+        self.payloads[name] = self.payloads.get(name, 0) + payload_size(obj)
+        return obj
+
+    def cache(self, name, stats):
+        self.caches[name] = stats
+
+    def record(self):
+        return {
+            "app": self.app,
+            "time": self.started,
+            "total_s": time.perf_counter() - self._start,
+            "stages": self.stages,
+            "payloads": self.payloads,
+            "caches": self.caches,
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+
+
+@contextmanager
+def stage(name):
+    # Times the block against the current rerun; a no-op outside one
+    rerun = getattr(_current, 'rerun', None)
+    if rerun is None:
+        yield
+        return
+    with rerun.stage(name):
+        yield
+
+
+def payload(name, obj):
+    rerun = getattr(_current, 'rerun', None)
+    return obj if rerun is None else rerun.payload(name, obj)
+
+
+def record_cache(name, stats):
+    rerun = getattr(_current, 'rerun', None)
+    if rerun is not None:
+        rerun.cache(name, stats)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Metrics:
+    # Totals across the reruns of every session, plus the most recent records.
+    # Each finished rerun is appended to jsonl_path and the Prometheus text is
+    # rewritten to prom_path (textfile-collector style) when they are set.
+
+    def __init__(self, app, jsonl_path=None, prom_path=None, history=50):
+        self.app = app
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.reruns = 0
+        self.rerun_seconds = 0.0
+        self.stage_totals = {}
+        self.payloads = {}
+        self.caches = {}
+        self.peak_rss_bytes = None
+        self.recent = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def start(self):
+        rerun = Rerun(self.app)
+        _current.rerun = rerun
+        return rerun
+
+    def finish(self, rerun):
+        if getattr(_current, 'rerun', None) is rerun:
+            _current.rerun = None
+        record = rerun.record()
+        with self._lock:
+            self.reruns += 1
+            self.rerun_seconds += record["total_s"]
+            for name, seconds in record["stages"].items():
+                count, total = self.stage_totals.get(name, (0, 0.0))
+                self.stage_totals[name] = (count + 1, total + seconds)
+            self.payloads.update(record["payloads"])
+            self.caches.update(record["caches"])
+            self.peak_rss_bytes = record["peak_rss_bytes"]
+            self.recent.append(record)
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+            if self.prom_path:
+                tmp_path = f"{self.prom_path}.tmp"
+                with open(tmp_path, "w") as f:
+                    f.write(self._prometheus_text())
+                os.replace(tmp_path, self.prom_path)
+        return record
+
+    @contextmanager
+    def rerun(self):
+        rerun = self.start()
+        try:
+            yield rerun
+        finally:
+            self.finish(rerun)
+
+    def _prometheus_text(self):
+        app = self.app
+        lines = [
+            "# TYPE app_reruns_total counter",
+            f"app_reruns_total{_labels(app=app)} {self.reruns}",
+            "# TYPE app_rerun_seconds summary",
+            f"app_rerun_seconds_sum{_labels(app=app)} {self.rerun_seconds}",
+            f"app_rerun_seconds_count{_labels(app=app)} {self.reruns}",
+            "# TYPE app_stage_seconds summary",
+        ]
+        for name, (count, total) in sorted(self.stage_totals.items()):
+            lines.append(f"app_stage_seconds_sum{_labels(app=app, stage=name)} {total}")
+            lines.append(f"app_stage_seconds_count{_labels(app=app, stage=name)} {count}")
+        lines.append("# TYPE app_payload_bytes gauge")
+        for name, nbytes in sorted(self.payloads.items()):
+            lines.append(f"app_payload_bytes{_labels(app=app, payload=name)} {nbytes}")
+        # Every numeric field of a cache's stats() becomes app_cache_<field>
+        fields = {}
+        for cache, stats in sorted(self.caches.items()):
+            for field, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    fields.setdefault(field, []).append(f"app_cache_{field}{_labels(app=app, cache=cache)} {value}")
+        for field, samples in sorted(fields.items()):
+            lines.append(f"# TYPE app_cache_{field} gauge")
+            lines.extend(samples)
+        if self.peak_rss_bytes is not None:
+            lines.append("# TYPE app_peak_rss_bytes gauge")
+            lines.append(f"app_peak_rss_bytes{_labels(app=app)} {self.peak_rss_bytes}")
+        return "\n".join(lines) + "\n"
+
+    def prometheus_text(self):
+        with self._lock:
+            return self._prometheus_text()
+
+    def jsonl(self):
+        with self._lock:
+            return "".join(json.dumps(record, default=str) + "\n" for record in self.recent)
+
+
+def debug_enabled(env_var):
+    # On with the app's debug environment variable or ?debug=1 in the URL
+    return os.environ.get(env_var, "") == "1" or st.query_params.get("debug") == "1"
+
+
+def show_debug_panel(metrics, record):
+    with st.sidebar.expander("Debug: performance", expanded=True):
+        st.caption(f"Rerun {record['total_s'] * 1000:.0f} ms; "
+                   f"{metrics.reruns} reruns, {metrics.rerun_seconds / max(metrics.reruns, 1) * 1000:.0f} ms average")
+        if record["stages"]:
+            st.table({"stage": list(record["stages"]),
+                      "ms": [f"{seconds * 1000:.1f}" for seconds in record["stages"].values()]})
+        if record["payloads"]:
+            st.table({"payload": list(record["payloads"]),
+                      "KB": [f"{nbytes / 1024:.1f}" for nbytes in record["payloads"].values()]})
+        if record["caches"]:
+            st.table({"cache": list(record["caches"]),
+                      "hit rate": [f"{stats.get('hit_rate', 0.0):.0%}" if 'hit_rate' in stats else "-"
+                                   for stats in record["caches"].values()],
+                      "hits": [str(stats.get("hits", "-")) for stats in record["caches"].values()],
+                      "misses": [str(stats.get("misses", "-")) for stats in record["caches"].values()]})
+        if record["peak_rss_bytes"] is not None:
+            st.caption(f"Peak RSS {record['peak_rss_bytes'] / 2 ** 20:.0f} MB")
+        st.download_button("Prometheus metrics", metrics.prometheus_text(), file_name=f"{metrics.app}_metrics.prom")
+        st.download_button("Recent reruns (JSONL)", metrics.jsonl(), file_name=f"{metrics.app}_reruns.jsonl")